@@ -9,12 +9,18 @@ setup(
     author='Matt Jackson',
     author_email='me@mattjackson.eu',
     packages=find_packages(),
-    install_requires=['colorama', 'nose', 'mock',],
+    install_requires=['colorama', 'nose', 'mock', 'numpy',],
     package_data = {
         'wordsmush.word_list': ['data/*.words']
     },
     entry_points={'console_scripts': [ 
             'wordsmush-cli = wordsmush.driver:command_line',
             'wordsmush-solve = wordsmush.cli:solve_from_letters_entry_point',
+            'wordsmush-arena = wordsmush.arena:arena_entry_point',
+            'wordsmush-bench = wordsmush.benchmark:benchmark_entry_point',
+            'wordsmush-server = wordsmush.server:server_entry_point',
+            'wordsmush-load = wordsmush.server:load_entry_point',
+            'wordsmush-boards = wordsmush.boards:boards_entry_point',
+            'wordsmush-replay = wordsmush.records:replay_entry_point',
         ]}
 )
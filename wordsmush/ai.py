@@ -1,56 +1,96 @@
-from itertools import imap, izip
-from collections import Counter
+from weakref import WeakKeyDictionary
 
 from wordsmush.player import WordsmushPlayer
 from wordsmush.game import WordsmushTurn
 from wordsmush import word_list
+from wordsmush.boards import MIN_WORD_LENGTH
+from wordsmush.solve_cache import get_solve_cache
+
+
+def solve_letters(letters, prefix=None, dictionary=None, query=None):
+    """Returns the words that can be spelled from letters, longest first
+    :param letters: iterable of letters available (e.g. the board letters)
+    :param prefix: only return words starting with prefix (optional)
+    :param dictionary: the Dictionary to solve with (optional, defaults to
+    word_list.get_dictionary())
+    :param query: a WordQuery the words must meet, which also decides their
+    order and number (optional)"""
+    dictionary = dictionary or word_list.get_dictionary()
+    if prefix:
+        words = sorted(dictionary.trie.spellable(letters, prefix), key=len, reverse=True)
+    else:
+        words = get_solve_cache(dictionary).get(letters)
+
+    return words if query is None else list(query.select(words))
 
 
 class WordsmushAIPlayer(WordsmushPlayer):
 
-    def __init__(self):
+    def __init__(self, dictionary=None, endgame_tiles=3, endgame_nodes=2000,
+                 endgame_seconds=1.0):
+        """:param dictionary: the Dictionary of words this player knows
+        (optional, defaults to the dictionary of each game played)
+        :param endgame_tiles: search exhaustively, with an EndgameSolver, once
+        this few tiles are untaken (optional, 0 never does)
+        :param endgame_nodes: most positions the endgame search visits per turn (optional)
+        :param endgame_seconds: most seconds the endgame search takes per turn (optional)"""
         self.name = "Wordbot"
-        self.playable_words = {}
+        self.dictionary = dictionary
+        self.endgame_tiles = endgame_tiles
+        self.endgame_nodes = endgame_nodes
+        self.endgame_seconds = endgame_seconds
+        self.last_endgame = None    # EndgameResult of the last endgame search
+        # evaluator of the playable words for each game, dropped with the game
+        self.playable_words = WeakKeyDictionary()
 
-    def solve_board(self, game):
+    def solve_board(self, game, prefix=None, query=None):
         """Compute list of all playable words for this board
-        :param game: WordsmushGame instance representing the board"""
+        :param game: WordsmushGame instance representing the board
+        :param prefix: only return words starting with prefix (optional)
+        :param query: a WordQuery the words must meet (optional)"""
 
-        counted_letters = Counter(tile.letter for tile in game.tiles)
-        words_by_letter_count = izip(word_list.words, imap(Counter, word_list.words))
-         
-        def is_match(word):
-            # Takes word as Counter('something')
-            for letter in word:
-                if not (word[letter] <= counted_letters[letter]):
-                    return False
-            return True
-
-        return sorted((word for word, letter_count in words_by_letter_count 
-                            if is_match(letter_count)), key=len, reverse=True)
+        dictionary = self.dictionary or game.dictionary
+        words = solve_letters([tile.letter for tile in game.tiles], prefix, dictionary, query)
+        if dictionary is not game.dictionary:
+            # only the game's dictionary decides what may be played
+            words = [word for word in words if game.is_a_word(word)]
+        return words
 
     def get_best_word(self, game):
-        turn = WordsmushTurn(game)
-
-        try:
-            word_str = next(word for word in self.playable_words[game] 
-                            if game.is_playable_word(word) and len(word) > 2)
-            self.playable_words[game].remove(word_str)
-
-            tiles_by_letter = game.tiles_by_letter()
-            for word_char in word_str:
-                turn.add_tile(next(tile for tile in tiles_by_letter[word_char]
-                                        if tile not in turn.tiles))
-        except StopIteration:  # no more words left to play!
+        """Returns the turn scoring best for this player, as ranked by the
+        game's WordsmushEvaluator. Resigns when no words are left to play."""
+        turn = self.playable_words[game].best_turn(game, self)
+
+        if turn is None:  # no more words left to play!
+            turn = WordsmushTurn(game)
             turn.resign = True
 
         return turn
 
+    def endgame_turn(self, game):
+        """Returns the turn found by an endgame search, or None if too many
+        tiles are untaken to search or the search ran out of budget"""
+        from wordsmush.endgame import EndgameSolver, untaken_tiles
+
+        self.last_endgame = None
+        if not 0 < untaken_tiles(game) <= self.endgame_tiles:
+            return None
+
+        solver = EndgameSolver(self.endgame_nodes, self.endgame_seconds)
+        self.last_endgame = solver.solve(game, self, self.playable_words[game])
+        return self.last_endgame and self.last_endgame.turn
+
     def take_turn(self, game):
-        if not self.playable_words.get(game):
-            self.playable_words[game] = self.solve_board(game) 
-                               
-        word = self.get_best_word(game)
+        from wordsmush.evaluator import WordsmushEvaluator  # imports numpy
+        from wordsmush.word_list.query import WordQuery
+
+        if game not in self.playable_words:
+            # only words long enough, and not already played, are candidates
+            query = WordQuery(min_length=MIN_WORD_LENGTH, played=game.words_played)
+            self.playable_words[game] = WordsmushEvaluator(self.solve_board(game, query=query))
+        self.playable_words[game].prune(game)
+
+        word = self.endgame_turn(game) or self.get_best_word(game)
         game.play(self, word)
 
         return word
@@ -0,0 +1,173 @@
+"""Headless self-play tournaments between AI players.
+
+Plays a number of games between two player classes across a process pool,
+on seeded boards, and streams one JSON line per finished game:
+
+    {"game": 0, "seed": 0, "player1": "WordsmushAIPlayer", ...,
+     "winner": "player1", "scores": [15, 10], "turns": 12,
+     "move_seconds": [[0.004, 0.003, ...], [0.002, ...]]}
+
+Seats alternate between games, so "player1" in a result is whichever of the
+two configured players was seated first in that game. Each game is recorded
+as it is played, and --record appends the records to a file, to be replayed
+and verified by wordsmush-replay.
+"""
+
+import sys
+import json
+import time
+import inspect
+import argparse
+import importlib
+import multiprocessing
+
+from wordsmush import game_utils
+from wordsmush.driver import WordsmushGameDriver
+from wordsmush.records import GameRecorder, encode_record
+
+
+class HeadlessWordsmushGameDriver(WordsmushGameDriver):
+
+    def __init__(self, player1, player2, seed=None, board_width=5, board_height=5,
+                 max_turns=None):
+        """Plays a game between two players with no output.
+        :param player1: the player taking the first turn
+        :param player2: the player taking the second turn
+        :param seed: seed for the board letters (optional)
+        :param board_width: the width of the board (optional, default is 5)
+        :param board_height: the height of the board (optional, default is 5)
+        :param max_turns: turns after which the game is decided on points (optional)"""
+        self.players = (player1, player2)
+        self.seed = seed
+        self.board_width = board_width
+        self.board_height = board_height
+        self.max_turns = max_turns
+
+        self.winner = None
+        self.turns = 0
+        self.move_seconds = {player1: [], player2: []}
+        super(HeadlessWordsmushGameDriver, self).__init__()
+
+    def get_players(self):
+        return self.players
+
+    def new_game(self):
+        game = game_utils.get_random_board(self.seed, self.player1, self.player2,
+                                           self.board_width, self.board_height)
+        self.recorder = GameRecorder(game, self.seed)
+        return game
+
+    def get_turn(self, player):
+        started = time.time()
+        self.recorder.take_turn(player)
+        self.move_seconds[player].append(time.time() - started)
+        self.turns += 1
+
+    def game_draw(self):
+        self.winner = None
+
+    def game_over(self, winner, loser):
+        self.winner = winner
+
+
+def load_player_class(path):
+    """Returns the player class at a path such as 'wordsmush.ai:WordsmushAIPlayer'"""
+    module_name, class_name = path.split(':')
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def load_player(path, kwargs):
+    """Returns a player of the class at path, made with kwargs. Players which
+    take a number of worker processes get one, as a tournament worker is a
+    daemon process and so may not start a pool of its own."""
+    player_class = load_player_class(path)
+    if 'workers' in inspect.getargspec(player_class.__init__).args:
+        kwargs = dict(kwargs, workers=1)
+    return player_class(**kwargs)
+
+
+def play_game(args):
+    """Plays one game of a tournament and returns its result. Run in the
+    worker processes."""
+    game_number, seed, specs, board_width, board_height, max_turns = args
+    if game_number % 2:
+        specs = specs[::-1]
+    players = [load_player(path, kwargs) for path, kwargs in specs]
+
+    driver = HeadlessWordsmushGameDriver(players[0], players[1], seed, board_width,
+                                         board_height, max_turns)
+    game = driver.game
+
+    winner = None
+    if driver.winner is not None:
+        winner = 'player1' if driver.winner == game.player1 else 'player2'
+
+    return {
+        'game': game_number,
+        'seed': seed,
+        'player1': specs[0][0],
+        'player2': specs[1][0],
+        'winner': winner,
+        'resigned': bool(game.resigned),
+        'scores': [game.scores[game.player1], game.scores[game.player2]],
+        'turns': driver.turns,
+        'move_seconds': [[round(seconds, 6) for seconds in driver.move_seconds[player]]
+                         for player in players],
+        'record': encode_record(driver.recorder.record()),
+    }
+
+
+def run_tournament(specs, games, seed=0, workers=None, board_width=5, board_height=5,
+                   max_turns=None):
+    """Iterator of game results, in the order the games finish.
+    :param specs: ((class path, kwargs), (class path, kwargs)) of the two players
+    :param games: number of games to play
+    :param seed: seed of the first game's board, each game adds one (optional)
+    :param workers: number of worker processes (optional, defaults to the
+    number of CPUs)
+    Other parameters are as for HeadlessWordsmushGameDriver."""
+    jobs = ((game_number, seed + game_number, specs, board_width, board_height, max_turns)
+            for game_number in xrange(games))
+
+    pool = multiprocessing.Pool(workers or multiprocessing.cpu_count())
+    try:
+        for result in pool.imap_unordered(play_game, jobs):
+            yield result
+    finally:
+        pool.terminate()
+
+
+def arena_entry_point():
+    p = argparse.ArgumentParser(description='Play AI players against each other.')
+    p.add_argument('--player1', default='wordsmush.ai:WordsmushAIPlayer',
+                   help="Class of the first player, e.g. 'wordsmush.search:WordsmushSearchAIPlayer'.")
+    p.add_argument('--player2', default='wordsmush.ai:WordsmushAIPlayer',
+                   help='Class of the second player.')
+    p.add_argument('--player1-args', default='{}', type=json.loads,
+                   help='JSON object of keyword arguments for the first player.')
+    p.add_argument('--player2-args', default='{}', type=json.loads,
+                   help='JSON object of keyword arguments for the second player.')
+    p.add_argument('-n', '--games', type=int, default=10, help='Number of games to play.')
+    p.add_argument('--seed', type=int, default=0, help='Seed of the first board.')
+    p.add_argument('--workers', type=int, help='Number of worker processes.')
+    p.add_argument('--width', type=int, default=5, help='Board width.')
+    p.add_argument('--height', type=int, default=5, help='Board height.')
+    p.add_argument('--max-turns', type=int, default=200,
+                   help='Turns after which a game is decided on points.')
+    p.add_argument('--record',
+                   help='File to append the game records to, for wordsmush-replay.')
+    args = p.parse_args()
+
+    specs = ((args.player1, args.player1_args), (args.player2, args.player2_args))
+    records = open(args.record, 'a') if args.record else None
+    try:
+        for result in run_tournament(specs, args.games, args.seed, args.workers,
+                                     args.width, args.height, args.max_turns):
+            record = result.pop('record')
+            if records is not None:
+                records.write(record + '\n')
+            sys.stdout.write(json.dumps(result, sort_keys=True) + '\n')
+            sys.stdout.flush()
+    finally:
+        if records is not None:
+            records.close()
@@ -0,0 +1,256 @@
+"""Benchmarks of the hot paths, with regression checks against a baseline.
+
+Each benchmark times a hot path on fixed, seeded boards, or the startup of a
+console entry point, and records the best seconds per call. Results are printed as JSON:
+
+    {"metrics": {"solve_board[5x5]": 0.0021, ...}, "python": "2.7.18",
+     "scaling": {"render": {"exponent": 1.02, "per_tile": {"5x5": 2.1e-06, ...}}, ...}}
+
+Board benchmarks run on boards from 5x5 up to 100x100, and the scaling
+section shows how each grows with the number of tiles: the seconds per tile at
+each size, and the exponent of the best fitting power curve, where 1 is
+linear growth and 2 quadratic.
+
+Given a baseline file of earlier results, any metric slower than its baseline
+by more than the threshold is reported and the run fails.
+"""
+
+import re
+import sys
+import math
+import json
+import time
+import argparse
+import platform
+import subprocess
+
+from wordsmush import game_utils
+from wordsmush.ai import WordsmushAIPlayer
+from wordsmush.arena import HeadlessWordsmushGameDriver
+
+# board sizes benchmarked by default, up to the largest boards played
+BOARD_SIZES = (5, 10, 20, 50, 100)
+
+# the board solved by test_ai.py
+TEST_BOARD = 'esprolishmtabdientsixfgmn'
+
+BOARD_SEED = 1
+
+# the console entry points in setup.py
+ENTRY_POINTS = (
+    ('wordsmush-cli', 'wordsmush.driver:command_line'),
+    ('wordsmush-solve', 'wordsmush.cli:solve_from_letters_entry_point'),
+    ('wordsmush-arena', 'wordsmush.arena:arena_entry_point'),
+    ('wordsmush-bench', 'wordsmush.benchmark:benchmark_entry_point'),
+    ('wordsmush-server', 'wordsmush.server:server_entry_point'),
+    ('wordsmush-load', 'wordsmush.server:load_entry_point'),
+    ('wordsmush-boards', 'wordsmush.boards:boards_entry_point'),
+    ('wordsmush-replay', 'wordsmush.records:replay_entry_point'),
+)
+
+
+def best_time(function, number=10, repeat=3):
+    """Returns the best seconds per call of function over repeat runs of
+    number calls each"""
+    best = None
+    for _ in range(repeat):
+        started = time.time()
+        for _ in xrange(number):
+            function()
+        seconds = (time.time() - started) / number
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def get_benchmark_board(size, player1=None, player2=None):
+    """Returns the board benchmarks run on: the test_ai.py board for 5x5,
+    otherwise a seeded random board"""
+    if size == 5:
+        return game_utils.get_board(TEST_BOARD, player1, player2)
+    return game_utils.get_random_board(BOARD_SEED, player1, player2, size, size)
+
+
+def play_opening(game, turns):
+    """Plays a few turns between the game's players, so benchmarks see a
+    game in progress rather than an empty board"""
+    players = [game.player1, game.player2]
+    for turn_number in range(turns):
+        if game.is_game_over():
+            break
+        players[turn_number % 2].take_turn(game)
+
+
+def bench_import(name, metrics):
+    """Times a fresh interpreter importing the word list"""
+    command = [sys.executable, '-c', 'import wordsmush.word_list']
+    metrics[name] = best_time(lambda: subprocess.check_call(command), number=1, repeat=5)
+
+
+def bench_startup(metrics):
+    """Times a fresh interpreter importing each console entry point, which is
+    what launching the command costs before it does any work"""
+    for name, path in ENTRY_POINTS:
+        module_name, function_name = path.split(':')
+        command = [sys.executable, '-c', 'from %s import %s' % (module_name, function_name)]
+        metrics['startup[%s]' % name] = best_time(lambda: subprocess.check_call(command),
+                                                  number=1, repeat=5)
+
+
+def bench_board(size, metrics):
+    """Times the per-board hot paths on a board of size x size"""
+    label = '[%dx%d]' % (size, size)
+    ai = WordsmushAIPlayer()
+
+    get_benchmark_board(size)  # builds the board size's neighbour tables
+    metrics['create_board' + label] = best_time(lambda: get_benchmark_board(size), number=3)
+    game = get_benchmark_board(size)
+    # solved with the letter index itself, as solve_board answers repeats from the solve cache
+    letters, letter_index = [tile.letter for tile in game.tiles], game.dictionary.letter_index
+    metrics['solve_board' + label] = best_time(lambda: letter_index.solve(letters), number=3)
+    metrics['solve_cached' + label] = best_time(lambda: ai.solve_board(game), number=3)
+
+    # a game in progress between two AIs
+    game = get_benchmark_board(size, ai, WordsmushAIPlayer())
+    play_opening(game, 6)
+
+    words = ai.solve_board(game)[:1000]
+    metrics['is_playable_word' + label] = best_time(
+        lambda: [game.is_playable_word(word) for word in words], number=3) / len(words)
+
+    def is_a_word():
+        game.dictionary.words._memo.clear()    # timed looking words up in the table
+        return [game.is_a_word(word) for word in words]
+    metrics['is_a_word' + label] = best_time(is_a_word, number=3) / len(words)
+    metrics['is_a_word_cached' + label] = best_time(
+        lambda: [game.is_a_word(word) for word in words], number=3) / len(words)
+
+    tiles = list(game.tiles)
+    metrics['calculate_protected' + label] = best_time(game.calculate_protected, number=100)
+    metrics['calculate_protected_incremental' + label] = best_time(
+        lambda: game.calculate_protected(tiles[:5]), number=100)
+
+    def tiles_by_letter():
+        game._tiles_by_letter = None    # cached on the game, so rebuilt each time
+        return game.tiles_by_letter()
+    metrics['tiles_by_letter' + label] = best_time(tiles_by_letter, number=100)
+    metrics['render' + label] = best_time(lambda: repr(game), number=3)
+    evaluator = ai.playable_words[game]
+    metrics['tiles_by_value' + label] = best_time(
+        lambda: evaluator.tiles_by_value(game, ai), number=10)
+    metrics['get_best_word' + label] = best_time(lambda: ai.get_best_word(game), number=5)
+
+    turn = ai.get_best_word(game)
+    metrics['play' + label] = best_time(
+        lambda: game.unplay(game.play_undoable(ai, turn)), number=100)
+
+
+def bench_boards(metrics, count=100):
+    """Times generating vetted 5x5 boards"""
+    from wordsmush.boards import BoardGenerator
+
+    generate = lambda min_words: BoardGenerator(BOARD_SEED, min_words=min_words,
+                                                min_vowels=5).generate(count)
+    generate(1)  # builds the word list indexes, which are timed elsewhere
+    metrics['generate_board'] = best_time(lambda: generate(0), number=1) / count
+    metrics['generate_board_vetted'] = best_time(lambda: generate(1000), number=1) / count
+
+
+def bench_ai_game(metrics, games=3, max_turns=200):
+    """Times full AI-vs-AI games on seeded 5x5 boards"""
+    def play_games():
+        for seed in range(games):
+            HeadlessWordsmushGameDriver(WordsmushAIPlayer(), WordsmushAIPlayer(), seed=seed,
+                                        max_turns=max_turns)
+
+    play_games()  # builds the word list indexes, which are timed elsewhere
+    metrics['ai_game[5x5]'] = best_time(play_games, number=1) / games
+
+
+def bench_replay(metrics, games=3, max_turns=200):
+    """Times replaying and verifying the records of AI-vs-AI games"""
+    from wordsmush.records import encode_record, verify_records
+
+    lines = [encode_record(HeadlessWordsmushGameDriver(
+        WordsmushAIPlayer(), WordsmushAIPlayer(), seed=seed,
+        max_turns=max_turns).recorder.record()) for seed in range(games)]
+    verify = lambda: list(verify_records(lines, workers=0))
+    metrics['replay_game[5x5]'] = best_time(verify) / games
+
+
+def scaling_curves(metrics):
+    """Returns {metric: {'per_tile': {size label: seconds per tile}, 'exponent': e}}
+    for each board metric timed at more than one size, where the seconds
+    grow with tiles ** e, fitted by least squares on a log-log scale"""
+    timings = {}
+    for name, seconds in metrics.items():
+        match = re.match(r'(\w+)\[((\d+)x(\d+))\]$', name)
+        if match:
+            metric, label, width, height = match.groups()
+            timings.setdefault(metric, []).append((int(width) * int(height), label, seconds))
+
+    curves = {}
+    for metric, points in timings.items():
+        points = [(tiles, label, seconds) for tiles, label, seconds in points if seconds > 0]
+        if len(set(tiles for tiles, label, seconds in points)) < 2:
+            continue
+        xs = [math.log(tiles) for tiles, label, seconds in points]
+        ys = [math.log(seconds) for tiles, label, seconds in points]
+        mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+        exponent = (sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) /
+                    sum((x - mean_x) ** 2 for x in xs))
+        curves[metric] = {'exponent': round(exponent, 2),
+                          'per_tile': {label: seconds / tiles
+                                       for tiles, label, seconds in points}}
+    return curves
+
+
+def run_benchmarks(sizes=BOARD_SIZES):
+    """Runs all benchmarks and returns {metric name: seconds}"""
+    metrics = {}
+    bench_import('word_list_import', metrics)
+    bench_startup(metrics)
+    for size in sizes:
+        bench_board(size, metrics)
+    bench_boards(metrics)
+    bench_ai_game(metrics)
+    bench_replay(metrics)
+    return metrics
+
+
+def find_regressions(metrics, baseline, threshold):
+    """Returns a list of (name, baseline seconds, seconds) for each metric
+    slower than its baseline by more than threshold (e.g. 0.25 for 25%)"""
+    return [(name, baseline[name], seconds) for name, seconds in sorted(metrics.items())
+            if name in baseline and seconds > baseline[name] * (1 + threshold)]
+
+
+def benchmark_entry_point():
+    p = argparse.ArgumentParser(description='Benchmark the Wordsmush hot paths.')
+    p.add_argument('--sizes', default=','.join(str(size) for size in BOARD_SIZES),
+                   help='Comma separated board sizes to benchmark.')
+    p.add_argument('--baseline', help='Results file to check for regressions against.')
+    p.add_argument('--threshold', type=float, default=0.25,
+                   help='Fraction a metric may slow down by before it fails (default 0.25).')
+    p.add_argument('--save', help='File to save the results to, e.g. as a new baseline.')
+    args = p.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    metrics = run_benchmarks(sizes)
+    results = {'metrics': metrics, 'python': platform.python_version(),
+               'scaling': scaling_curves(metrics)}
+
+    print(json.dumps(results, indent=2, sort_keys=True))
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['metrics']
+
+        regressions = find_regressions(results['metrics'], baseline, args.threshold)
+        for name, baseline_seconds, seconds in regressions:
+            sys.stderr.write('%s regressed: %.6fs -> %.6fs (%+.0f%%)\n' % (
+                name, baseline_seconds, seconds, 100 * (seconds / baseline_seconds - 1)))
+        if regressions:
+            sys.exit(1)
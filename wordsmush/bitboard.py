@@ -0,0 +1,154 @@
+"""Packed play state for a Wordsmush board.
+
+Tile (x, y) is bit y * width + x of each mask. Ownership is held as one mask
+per player and tile status as a taken and a protected mask, so scoring, game
+over and protection checks are a handful of integer operations rather than
+walks over tile objects.
+"""
+
+
+# neighbour tables for each board size, shared between boards of that size
+_neighbour_tables = {}
+
+
+def neighbour_tables(width, height):
+    """Returns (indexes, masks) of each tile's orthogonal neighbours on a
+    board of width x height, as a tuple of index tuples and of bitmasks"""
+    if (width, height) not in _neighbour_tables:
+        indexes = []
+        for y in range(height):
+            for x in range(width):
+                indexes.append(tuple(ny * width + nx for nx, ny in
+                                     [(x, y - 1), (x, y + 1), (x - 1, y), (x + 1, y)]
+                                     if 0 <= nx < width and 0 <= ny < height))
+
+        masks = tuple(sum(1 << index for index in neighbours) for neighbours in indexes)
+        _neighbour_tables[width, height] = (tuple(indexes), masks)
+
+    return _neighbour_tables[width, height]
+
+
+def popcount(mask):
+    """Returns the number of set bits in mask"""
+    return bin(mask).count('1')
+
+
+def mask_bits(mask, size):
+    """Returns a string of '0' or '1' for each tile of a board of size tiles,
+    by index, as to whether its bit is set in mask. Looking tiles up in the
+    string, rather than shifting mask for each, keeps walks over large boards
+    linear."""
+    return format(mask, '0%db' % size)[::-1]
+
+
+def iter_bits(mask):
+    """Iterator of the indexes of the set bits in mask, lowest first"""
+    while mask:
+        low_bit = mask & -mask
+        yield low_bit.bit_length() - 1
+        mask ^= low_bit
+
+
+class WordsmushBitboard(object):
+
+    def __init__(self, width, height):
+        """:param width: the width of the board
+        :param height: the height of the board"""
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.full = (1 << self.size) - 1
+
+        self.top_row = (1 << width) - 1
+        self.bottom_row = self.top_row << (self.size - width)
+        self.left_column = sum(1 << (y * width) for y in range(height))
+        self.right_column = self.left_column << (width - 1)
+        self.neighbour_indexes, self.neighbour_masks = neighbour_tables(width, height)
+
+        self.letters = [None] * self.size
+        self.owned = [0, 0]    # tiles owned by each player
+        self.taken = 0         # tiles with TAKEN status
+        self.protected = 0     # tiles with PROTECTED status
+
+    def snapshot(self):
+        """Returns the ownership and status masks as an immutable tuple"""
+        return (self.owned[0], self.owned[1], self.taken, self.protected)
+
+    def restore(self, snapshot):
+        """Restores ownership and status masks from a snapshot"""
+        owned0, owned1, self.taken, self.protected = snapshot
+        self.owned = [owned0, owned1]
+
+    def bit(self, x, y):
+        return 1 << (y * self.width + x)
+
+    def owner(self, index):
+        """Returns the index of the player owning the tile at index, or None"""
+        tile_bit = 1 << index
+        for player_index, owned in enumerate(self.owned):
+            if owned & tile_bit:
+                return player_index
+        return None
+
+    def set_owner(self, index, player_index):
+        tile_bit = 1 << index
+        self.owned = [owned & ~tile_bit for owned in self.owned]
+        if player_index is not None:
+            self.owned[player_index] |= tile_bit
+
+    def points(self, player_index):
+        return popcount(self.owned[player_index])
+
+    def is_full(self):
+        """Returns whether every tile is owned by a player"""
+        return (self.owned[0] | self.owned[1]) == self.full
+
+    def capture(self, player_index, mask):
+        """Gives the player every unprotected tile in mask"""
+        captured = mask & ~self.protected
+        self.owned = [owned & ~captured for owned in self.owned]
+        self.owned[player_index] |= captured
+        self.taken |= captured
+
+    def surrounded(self, mask):
+        """Returns the tiles whose orthogonal neighbours are all in mask or
+        off the edge of the board"""
+        width = self.width
+        above = ((mask << width) & self.full) | self.top_row
+        below = (mask >> width) | self.bottom_row
+        left = ((mask << 1) & ~self.left_column & self.full) | self.left_column
+        right = ((mask >> 1) & ~self.right_column) | self.right_column
+        return above & below & left & right
+
+    def neighbours_in(self, mask):
+        """Returns a tuple of the masks of tiles whose neighbour above, below,
+        left and right, respectively, is in mask"""
+        width = self.width
+        return ((mask << width) & self.full,
+                mask >> width,
+                (mask << 1) & ~self.left_column & self.full,
+                (mask >> 1) & ~self.right_column)
+
+    def neighbourhood(self, mask):
+        """Returns the tiles in mask plus their orthogonal neighbours"""
+        above, below, left, right = self.neighbours_in(mask)
+        return mask | above | below | left | right
+
+    def calculate_protected(self, mask=None):
+        """Recalculates which held tiles are protected: those whose neighbours
+        are all held by the same player. Returns the mask of tiles whose
+        status changed.
+        :param mask: tiles whose ownership changed (optional). Only these and
+        their neighbours can change status, so only they are recalculated.
+        When not given, the whole board is recalculated."""
+        affected = self.full if mask is None else self.neighbourhood(mask)
+        held = self.taken | self.protected
+        protected = self.protected & ~affected
+        for owned in self.owned:
+            player_held = owned & held
+            protected |= player_held & affected & self.surrounded(player_held)
+
+        changed = protected ^ self.protected
+        self.protected = protected
+        self.taken = held & ~protected
+        return changed
@@ -0,0 +1,155 @@
+"""Seeded, batched board generation with quality filtering.
+
+Letters are drawn by their frequency in English, from a cumulative weight
+table searched with bisect. A BoardGenerator draws boards from its own seeded
+random.Random, so the same seed always gives the same boards, and vets them in
+batches: first the cheap checks on the letters themselves (vowels), then the
+number of playable words, counted straight from the dictionary's letter-count
+index without listing the words.
+
+    generator = BoardGenerator(seed=7, min_words=500, min_vowels=5)
+    boards = generator.generate(100)    # 100 board letter strings
+"""
+
+import sys
+import random
+import argparse
+from bisect import bisect_right
+
+# letter weights from http://en.wikipedia.org/wiki/Letter_frequency
+LETTER_WEIGHTS = (
+    ('a', 8), ('b', 1), ('c', 3), ('d', 4), ('e', 12), ('f', 2), ('g', 2),
+    ('h', 6), ('i', 7), ('j', 1), ('k', 1), ('l', 4), ('m', 2), ('n', 7),
+    ('o', 8), ('p', 2), ('q', 1), ('r', 6), ('s', 6), ('t', 9), ('u', 3),
+    ('v', 1), ('w', 2), ('x', 1), ('y', 2), ('z', 1),
+)
+
+LETTERS = ''.join(letter for letter, weight in LETTER_WEIGHTS)
+
+
+def cumulative_weights(letter_weights):
+    """Returns the running totals of the weights of ((letter, weight), ...)"""
+    totals, total = [], 0
+    for letter, weight in letter_weights:
+        total += weight
+        totals.append(total)
+    return totals
+
+
+# a draw below CUMULATIVE_WEIGHTS[i], and at or above CUMULATIVE_WEIGHTS[i - 1],
+# picks LETTERS[i]
+CUMULATIVE_WEIGHTS = cumulative_weights(LETTER_WEIGHTS)
+TOTAL_WEIGHT = CUMULATIVE_WEIGHTS[-1]
+
+VOWELS = frozenset('aeiou')
+
+# shortest word that may be played
+MIN_WORD_LENGTH = 3
+
+
+def random_letter(rng=random):
+    """Returns a random letter, weighted by frequency of use in English
+    :param rng: random.Random instance to choose with (optional, defaults to the global one)"""
+    return LETTERS[bisect_right(CUMULATIVE_WEIGHTS, rng.randrange(TOTAL_WEIGHT))]
+
+
+def random_letters(count, rng=random):
+    """Returns a string of count random letters, as random_letter
+    :param rng: random.Random instance to choose with (optional, defaults to the global one)"""
+    draw, weights = rng.randrange, CUMULATIVE_WEIGHTS
+    return ''.join([LETTERS[bisect_right(weights, draw(TOTAL_WEIGHT))] for _ in xrange(count)])
+
+
+class BoardGenerator(object):
+
+    def __init__(self, seed=None, board_width=5, board_height=5, min_words=0, min_vowels=0,
+                 dictionary=None, batch_size=64):
+        """:param seed: seed for the boards (optional, defaults to random boards)
+        :param board_width: the width of the boards (optional, default is 5)
+        :param board_height: the height of the boards (optional, default is 5)
+        :param min_words: fewest playable words a board may have (optional)
+        :param min_vowels: fewest vowels a board may have (optional)
+        :param dictionary: the Dictionary words are counted in (optional,
+        defaults to word_list.get_dictionary())
+        :param batch_size: number of boards drawn and vetted at a time (optional)"""
+        self.random = random.Random(seed)
+        self.board_width = board_width
+        self.board_height = board_height
+        self.min_words = min_words
+        self.min_vowels = min_vowels
+        self.dictionary = dictionary
+        self.batch_size = batch_size
+
+    def draw(self, count):
+        """Returns a list of count boards' letters, unvetted"""
+        size = self.board_width * self.board_height
+        return [random_letters(size, self.random) for _ in xrange(count)]
+
+    def vet(self, boards):
+        """Returns the boards, from a list of boards' letters, which pass the
+        quality filters, in the same order"""
+        if self.min_vowels:
+            boards = [letters for letters in boards
+                      if sum(letters.count(vowel) for vowel in VOWELS) >= self.min_vowels]
+
+        if self.min_words and boards:
+            from wordsmush import word_list
+
+            index = (self.dictionary or word_list.get_dictionary()).letter_index
+            # boards with the same letters have the same words, so count them once
+            word_counts = {}
+            for letters in boards:
+                key = ''.join(sorted(letters))
+                if key not in word_counts:
+                    word_counts[key] = index.count_words(key, MIN_WORD_LENGTH)
+            boards = [letters for letters in boards
+                      if word_counts[''.join(sorted(letters))] >= self.min_words]
+
+        return boards
+
+    def __iter__(self):
+        """Iterator of vetted boards' letters, without end"""
+        while True:
+            for letters in self.vet(self.draw(self.batch_size)):
+                yield letters
+
+    def generate(self, count, max_draws=None):
+        """Returns a list of count vetted boards' letters
+        :param max_draws: most boards drawn before giving up (optional,
+        defaults to 1000 per board wanted)"""
+        max_draws = max_draws or 1000 * count
+        boards, draws = [], 0
+        while len(boards) < count:
+            if draws >= max_draws:
+                raise ValueError("Only %d of %d boards passed the filters in %d draws"
+                                 % (len(boards), count, draws))
+            batch = min(self.batch_size, max_draws - draws)
+            boards.extend(self.vet(self.draw(batch)))
+            draws += batch
+
+        return boards[:count]
+
+
+def boards_entry_point():
+    p = argparse.ArgumentParser(description='Generate board letters, one board per line.')
+    p.add_argument('-n', '--count', type=int, default=10, help='Number of boards.')
+    p.add_argument('--seed', type=int, help='Seed for the boards.')
+    p.add_argument('--width', type=int, default=5, help='Board width.')
+    p.add_argument('--height', type=int, default=5, help='Board height.')
+    p.add_argument('--min-words', type=int, default=0,
+                   help='Fewest playable words a board may have.')
+    p.add_argument('--min-vowels', type=int, default=0,
+                   help='Fewest vowels a board may have.')
+    p.add_argument('--dictionary',
+                   help="Name of a shipped dictionary or path of a word list to count words in.")
+    args = p.parse_args()
+
+    dictionary = None
+    if args.dictionary:
+        from wordsmush import word_list
+        dictionary = word_list.get_dictionary(args.dictionary)
+
+    generator = BoardGenerator(args.seed, args.width, args.height, args.min_words,
+                               args.min_vowels, dictionary)
+    for letters in generator.generate(args.count):
+        sys.stdout.write(letters + '\n')
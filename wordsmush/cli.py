@@ -1,5 +1,8 @@
-from itertools import groupby
+from itertools import groupby, islice
+from collections import OrderedDict
 import argparse
+import json
+import sys
 
 def loop_input(message):
     """Repeats input until user inputs valid data"""
@@ -9,21 +12,117 @@ def loop_input(message):
 
     return user_input
 
-def solve_from_letters(letters):
-    from wordsmush import game_utils
-    from wordsmush.ai import WordsmushAIPlayer
+def solve_from_letters(letters, prefix=None, dictionary=None, query=None):
+    from wordsmush.ai import solve_letters
+    from wordsmush.word_list import get_dictionary
 
-    ai = WordsmushAIPlayer()
-    board = game_utils.get_board(letters)
-    words = ai.solve_board(board)
+    dictionary = get_dictionary(dictionary)
+    if query is not None and not prefix:
+        # streamed from the index, without solving every word into the cache
+        words = dictionary.query(letters.lower(), query)
+    else:
+        words = solve_letters(letters.lower(), prefix, dictionary, query)
     words_by_len = groupby(words, key=len)
     for length, words in words_by_len:
         if length > 2:
             print "%d letter words: " % length
             print (", ".join(words)).upper()
 
+def solve_board_line(args):
+    """Solves one line of a batch, returning its result as a JSON string.
+    Run in the worker processes."""
+    from wordsmush.ai import solve_letters
+    from wordsmush.word_list import get_dictionary
+
+    letters, prefix, dictionary, query = args
+    result = OrderedDict([('letters', letters)])
+    if not letters.isalpha():
+        result['error'] = 'Boards may only contain the letters a-z.'
+    else:
+        result['words'] = OrderedDict(
+            (str(length), list(words))
+            for length, words in groupby(
+                solve_letters(letters, prefix, get_dictionary(dictionary), query), key=len)
+            if length > 2)
+
+    return json.dumps(result)
+
+def solve_batch(lines, output, prefix=None, workers=None, window=4096, dictionary=None,
+                query=None):
+    """Solves boards read line by line, writing one JSON line per board in
+    input order. Blank lines are skipped.
+    :param lines: iterable of lines of board letters
+    :param output: file to write the results to
+    :param prefix: only list words starting with prefix (optional)
+    :param workers: number of worker processes (optional, defaults to the
+    number of CPUs)
+    :param window: most boards read ahead of the results written (optional)
+    :param dictionary: name of a shipped dictionary or path of a word list
+    to solve with (optional)
+    :param query: a WordQuery the words listed must meet (optional)"""
+    import multiprocessing
+    from wordsmush import word_list
+
+    # built before the workers are forked, so they share it rather than each building it
+    word_list.get_dictionary(dictionary).build(verify=False)
+
+    boards = ((line.strip().lower(), prefix, dictionary, query)
+              for line in lines if line.strip())
+    pool = multiprocessing.Pool(workers)
+    try:
+        while True:
+            chunk = list(islice(boards, window))
+            if not chunk:
+                break
+            for result in pool.imap(solve_board_line, chunk, chunksize=64):
+                output.write(result + '\n')
+            output.flush()
+    finally:
+        pool.terminate()
+
 def solve_from_letters_entry_point():
     p = argparse.ArgumentParser()
-    p.add_argument('letters', help='The letters on the board you would like to solve.')
+    p.add_argument('letters', nargs='?', help='The letters on the board you would like to solve.')
+    p.add_argument('--prefix', help='Only list words starting with these letters.')
+    p.add_argument('--cache', help='sqlite file to keep solved boards in.')
+    p.add_argument('--dictionary',
+                   help="Name of a shipped dictionary (default 'scrabble_us') or path of a "
+                        "word list, one word per line.")
+    p.add_argument('--batch', metavar='FILE', type=argparse.FileType('r'),
+                   help="Solve the boards in FILE, one per line ('-' for stdin), "
+                        "writing the results as JSON lines.")
+    p.add_argument('--workers', type=int, help='Number of worker processes for --batch.')
+    p.add_argument('--min-length', type=int, default=1, help='Shortest word to list.')
+    p.add_argument('--max-length', type=int, help='Longest word to list.')
+    p.add_argument('--include', default='',
+                   help="Letters every word must have, repeated as often as needed, e.g. 'ee'.")
+    p.add_argument('--exclude', default='',
+                   help='Comma separated prefixes of words not to list.')
+    p.add_argument('--played', default='',
+                   help='Comma separated words already played, which with their prefixes are '
+                        'not listed.')
+    p.add_argument('--top', type=int, help='List only this many of the longest words.')
     args = p.parse_args()
-    solve_from_letters(args.letters)
+
+    query = None
+    if (args.min_length > 1 or args.max_length or args.include or args.exclude or
+            args.played or args.top):
+        from wordsmush.word_list.query import WordQuery
+        split = lambda text: [word.lower() for word in text.split(',') if word]
+        query = WordQuery(args.min_length, args.max_length, args.include.lower(),
+                          split(args.exclude), split(args.played), limit=args.top)
+
+    if args.cache:
+        from wordsmush.solve_cache import configure_solve_cache
+        configure_solve_cache(path=args.cache)
+
+    if args.batch:
+        with args.batch as lines:
+            solve_batch(lines, sys.stdout, args.prefix, args.workers,
+                        dictionary=args.dictionary, query=query)
+    elif args.letters:
+        if not args.letters.isalpha():
+            p.error('Boards may only contain the letters a-z.')
+        solve_from_letters(args.letters, args.prefix, args.dictionary, query)
+    else:
+        p.error('Give the letters of a board, or --batch.')
@@ -1,3 +1,4 @@
+import argparse
 from itertools import cycle
 
 from wordsmush.game import WordsmushGame
@@ -8,15 +9,29 @@ from wordsmush.cli import loop_input
 
 class WordsmushGameDriver(object):
 
+    # turns after which an unfinished game is decided on points (None for no limit)
+    max_turns = None
+
+    board_width = 5
+    board_height = 5
+
     def __init__(self):
         self.player1, self.player2 = self.get_players()
 
-        self.game = WordsmushGame(self.player1, self.player2)
+        self.game = self.new_game()
+        self.play_game()
+
+    def new_game(self):
+        return WordsmushGame(self.player1, self.player2, self.board_width, self.board_height)
+
+    def play_game(self):
         turn_player = cycle([self.player1, self.player2])
 
-        while not self.game.is_game_over():
+        turns = 0
+        while not self.game.is_game_over() and turns != self.max_turns:
             player = next(turn_player)
             self.get_turn(player)
+            turns += 1
 
         if self.game.resigned:
             winner = self.player1 if self.game.resigned == self.player2 else self.player2
@@ -48,7 +63,11 @@ class CommandLineWordsmushGameDriver(WordsmushGameDriver):
 
         return player1, player2
 
-    def __init__(self):
+    def __init__(self, board_width=5, board_height=5):
+        """:param board_width: the width of the board (optional, default is 5)
+        :param board_height: the height of the board (optional, default is 5)"""
+        self.board_width = board_width
+        self.board_height = board_height
         print("Starting new Wordsmush game...")
         super(CommandLineWordsmushGameDriver, self).__init__()
 
@@ -73,5 +92,12 @@ class CommandLineWordsmushGameDriver(WordsmushGameDriver):
 
 def command_line():
     """Entry point to start a new command line game"""
-    CommandLineWordsmushGameDriver()
+    p = argparse.ArgumentParser(description='Play Wordsmush on the command line.')
+    p.add_argument('--width', type=int, default=5, help='Board width.')
+    p.add_argument('--height', type=int, default=5, help='Board height.')
+    args = p.parse_args()
+    if args.width < 1 or args.height < 1:
+        p.error('The board must be at least 1x1')
+
+    CommandLineWordsmushGameDriver(args.width, args.height)
 
@@ -0,0 +1,278 @@
+"""Endgame search for nearly finished boards.
+
+Once only a few tiles are untaken, the number of different things a move can
+do is small even though many words remain: a move's outcome is mostly which
+of the tiles worth taking (untaken tiles and the opponent's unprotected ones)
+it takes. Words are grouped by how many of those tiles of each letter they
+spell, and each group is played as one move for every distinct choice of
+those tiles, as which tiles are taken decides which are protected afterwards.
+The moves are searched on the bitboard with negamax, alpha-beta pruning and a
+memo of positions already valued, deepening until every line reaches the end
+of the game. The search stops at a hard
+budget of nodes and seconds, keeping the best move of the deepest search
+completed.
+
+A search that reaches the end of every line, or finds a won or lost game,
+has proven its value.
+
+Positions are memoized by tile ownership and protection, the player to move
+and the words played during the search, as those decide which words, and so
+which moves, are still playable."""
+
+import time
+from collections import namedtuple
+from itertools import combinations, product
+
+import numpy
+
+from wordsmush.game import WordsmushTurn
+from wordsmush.bitboard import popcount, mask_bits
+from wordsmush.evaluator import (evaluate, win_score, support_counts, CAPTURE_VALUE,
+                                 UNTAKEN_VALUE)
+from wordsmush.search import EXACT, LOWER, UPPER
+
+# most groups of words numbered directly by word_groups, rather than sorted
+MAX_GROUP_NUMBERS = 1 << 20
+
+# memo entry depth of a position searched to the end of the game
+COMPLETE = float('inf')
+
+EndgameResult = namedtuple('EndgameResult', ['turn', 'value', 'proven', 'depth', 'nodes'])
+
+
+class EndgameBudgetExceeded(Exception):
+    pass
+
+
+def untaken_tiles(game):
+    """Returns the number of tiles nobody owns"""
+    state = game.state
+    return popcount(state.full & ~(state.owned[0] | state.owned[1]))
+
+
+class EndgameSolver(object):
+
+    def __init__(self, max_nodes=5000, max_seconds=1.0, max_depth=None):
+        """:param max_nodes: most positions searched (optional)
+        :param max_seconds: most seconds searched (optional)
+        :param max_depth: deepest search, in plies (optional, defaults to two
+        more than twice the number of untaken tiles)"""
+        self.max_nodes = max_nodes
+        self.max_seconds = max_seconds
+        self.max_depth = max_depth
+
+    def solve(self, game, player, evaluator):
+        """Returns an EndgameResult of the best turn for player found by the
+        deepest search completed within the budget, or None if not even a one
+        ply search completed or there are no turns to make. Its proven is
+        whether the search reached the end of the game on every line, or
+        found a won or lost game.
+        :param evaluator: the WordsmushEvaluator of the game's candidate words"""
+        self.game = game
+        self.players = (game.player1, game.player2)
+        live = numpy.flatnonzero(evaluator.alive)
+        self.words = evaluator.words[live]
+        self.counts = evaluator.counts[live]
+        self.groups = {}
+        self.memo = {}
+        self.played = []    # the words played on the line being searched
+        self.nodes = 0
+        self.deadline = time.time() + self.max_seconds
+
+        me = game.player_index(player)
+        result = None
+        for depth in range(1, (self.max_depth or 2 * untaken_tiles(game) + 2) + 1):
+            self.cutoff = False
+            try:
+                value, mask, word = self.search_root(me, depth)
+            except EndgameBudgetExceeded:
+                break
+
+            if word is None:
+                break
+            proven = not self.cutoff or abs(value) >= win_score(game.state)
+            result = EndgameResult(self.make_turn(me, mask, word), value, proven, depth,
+                                   self.nodes)
+            if proven:
+                break
+
+        return result
+
+    def valuable_tiles(self, me):
+        """Returns a dict of each letter with tiles worth taking mapped to a
+        list of their indexes, captures first. Between tiles of equal value,
+        those next to more of the player's tiles come first, as in WordsmushEvaluator.tiles_by_value."""
+        state = self.game.state
+        mine, theirs = state.owned[me], state.owned[1 - me]
+        capturable = mask_bits(theirs & ~state.protected, state.size)
+        untaken = mask_bits(state.full & ~(mine | theirs), state.size)
+        support = support_counts(state, mine).tolist()
+        key = lambda index: -support[index]
+
+        valuable = {}
+        for letter, tiles in self.game.tiles_by_letter().items():
+            captures = sorted((tile.index for tile in tiles if capturable[tile.index] == '1'),
+                              key=key)
+            untaken_indexes = sorted((tile.index for tile in tiles
+                                      if untaken[tile.index] == '1'), key=key)
+            if captures or untaken_indexes:
+                valuable[letter] = captures + untaken_indexes
+        return valuable
+
+    def word_groups(self, available):
+        """Returns (group counts, a word of each group, group of each word)
+        for the words grouped by how many valuable tiles of each letter they
+        take, given ((letter, number of valuable tiles), ...). Groups are
+        numbered by their counts, as digits of a mixed radix number."""
+        if available not in self.groups:
+            columns = [ord(letter) - ord('a') for letter, count in available] or [0]
+            limits = [count for letter, count in available] or [0]
+            radixes = numpy.cumprod([1] + [limit + 1 for limit in limits])
+            taken = numpy.minimum(self.counts[:, columns], limits)
+            if radixes[-1] > MAX_GROUP_NUMBERS:
+                # too many possible groups to number, so sort the words into them
+                rows, representatives, groups = numpy.unique(
+                    taken, axis=0, return_index=True, return_inverse=True)
+            else:
+                groups = taken.dot(radixes[:-1])
+                representatives = numpy.full(radixes[-1], -1, dtype=numpy.intp)
+                representatives[groups] = numpy.arange(len(groups))
+                numbers = numpy.flatnonzero(representatives >= 0)
+                rows = numbers[:, None] // radixes[:-1] % (numpy.array(limits) + 1)
+                # renumber the groups in use from 0, as numpy.unique does
+                renumbered = numpy.zeros(radixes[-1], dtype=numpy.intp)
+                renumbered[numbers] = numpy.arange(len(numbers))
+                groups, representatives = renumbered[groups], representatives[numbers]
+            self.groups[available] = (rows, representatives, groups)
+        return self.groups[available]
+
+    def moves(self, me):
+        """Iterator of (mask of tiles taken, word) for the distinct moves the
+        player can make, those gaining most first"""
+        if not len(self.words):
+            return
+
+        state = self.game.state
+        valuable = self.valuable_tiles(me)
+        letters = sorted(valuable)
+        rows, representatives, groups = self.word_groups(
+            tuple((letter, len(valuable[letter])) for letter in letters))
+
+        # spelled with captures first, a group gains the most it can
+        capturable = state.owned[1 - me] & ~state.protected
+        gains = numpy.zeros(len(rows), dtype=numpy.intp)
+        for column, letter in enumerate(letters):
+            values = [0] + [CAPTURE_VALUE if capturable >> index & 1 else UNTAKEN_VALUE
+                            for index in valuable[letter]]
+            gains += numpy.cumsum(values).take(rows[:, column])
+
+        is_playable_word, seen = self.game.is_playable_word, set()
+        for group in numpy.argsort(-gains, kind='mergesort'):
+            word = self.words[representatives[group]]
+            if not is_playable_word(word):
+                word = next((self.words[position]
+                             for position in numpy.flatnonzero(groups == group)
+                             if is_playable_word(self.words[position])), None)
+                if word is None:
+                    continue
+
+            # every choice of the group's tiles, starting with the captures
+            choices = [combinations(valuable[letter], count)
+                       for letter, count in zip(letters, rows[group]) if count]
+            for chosen in product(*choices):
+                mask = 0
+                for indexes in chosen:
+                    for index in indexes:
+                        mask |= 1 << index
+                if mask not in seen:
+                    seen.add(mask)
+                    yield mask, word
+
+    def search_root(self, me, depth):
+        """Returns (value, mask, word) of the best move found searching depth plies"""
+        best_value, best_mask, best_word = -float('inf'), None, None
+        alpha, beta = -float('inf'), float('inf')
+        for mask, word in self.moves(me):
+            value = -self.play_and_search(me, mask, word, depth - 1, -beta, -alpha)
+            if value > best_value:
+                best_value, best_mask, best_word = value, mask, word
+            alpha = max(alpha, value)
+
+        return best_value, best_mask, best_word
+
+    def play_and_search(self, me, mask, word, depth, alpha, beta):
+        """Takes the tiles in mask, searches the resulting position from the
+        opponent's point of view and takes the move back"""
+        state, words_played = self.game.state, self.game.words_played
+        snapshot = state.snapshot()
+        state.capture(me, mask)
+        state.calculate_protected(mask)
+        words_played.append(word)
+        self.played.append(word)
+        try:
+            return self.negamax(1 - me, depth, alpha, beta)
+        finally:
+            state.restore(snapshot)
+            words_played.remove(word)
+            self.played.pop()
+
+    def negamax(self, me, depth, alpha, beta):
+        """Returns the value of the position for the player to move, me"""
+        self.nodes += 1
+        if self.nodes > self.max_nodes or time.time() > self.deadline:
+            raise EndgameBudgetExceeded()
+
+        state = self.game.state
+        if state.is_full():
+            return evaluate(self.game, self.players[me])
+        if depth == 0:
+            self.cutoff = True
+            return evaluate(self.game, self.players[me])
+
+        key = state.snapshot() + (me, frozenset(self.played))
+        original_alpha = alpha
+        entry = self.memo.get(key)
+        if entry is not None and entry[0] >= depth:
+            entry_depth, value, bound = entry
+            if entry_depth != COMPLETE:
+                self.cutoff = True
+            if bound == EXACT:
+                return value
+            elif bound == LOWER:
+                alpha = max(alpha, value)
+            elif bound == UPPER:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+
+        cutoff, self.cutoff = self.cutoff, False
+        best_value = -win_score(state)    # no words left, so the player has to resign
+        for mask, word in self.moves(me):
+            best_value = max(best_value, -self.play_and_search(me, mask, word, depth - 1,
+                                                               -beta, -alpha))
+            alpha = max(alpha, best_value)
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            bound = UPPER
+        elif best_value >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.memo[key] = (depth if self.cutoff else COMPLETE, best_value, bound)
+        self.cutoff = self.cutoff or cutoff
+
+        return best_value
+
+    def make_turn(self, me, mask, word):
+        """Returns a WordsmushTurn spelling word with the tiles in mask, and
+        tiles not worth taking for any letters left over"""
+        state = self.game.state
+        worthless = state.owned[me] | (state.owned[1 - me] & state.protected)
+        spare = {letter: [tile for tile in tiles if mask >> tile.index & 1] +
+                         [tile for tile in tiles if worthless >> tile.index & 1]
+                 for letter, tiles in self.game.tiles_by_letter().items()}
+
+        # the tiles are not selected, as the turn may never be played
+        return WordsmushTurn(self.game, [spare[letter].pop(0) for letter in word])
@@ -0,0 +1,231 @@
+"""Move evaluation for the Wordsmush AIs.
+
+Every candidate word on a board is scored by the tiles it would take: for each
+letter the best tile instances are chosen (an opponent's unprotected tile
+before an untaken one, an untaken one before a tile that gains nothing), and
+the resulting score swing of every word is computed in one vectorised pass
+over the words' letter counts. The best few words are then played out exactly
+to account for the protection they gain.
+"""
+
+from itertools import islice
+
+import numpy
+
+from wordsmush.game import WordsmushTurn
+from wordsmush.bitboard import popcount, mask_bits
+from wordsmush.word_list.letter_counts import LetterCountIndex, ALPHABET_SIZE
+
+# weight of a protected tile over a merely taken one in evaluate
+PROTECTED_WEIGHT = 0.5
+
+# least value of a finished game, well above any difference in points on a
+# board of up to a few hundred tiles (see win_score)
+WIN_SCORE = 1000
+
+# score swing from taking a tile
+CAPTURE_VALUE = 2    # an opponent's unprotected tile
+UNTAKEN_VALUE = 1    # a tile nobody owns
+
+
+def win_score(state):
+    """Returns the value of a finished game on the board of a
+    WordsmushBitboard: WIN_SCORE, or on large boards, enough more to stay
+    above any difference in points an unfinished game can have"""
+    return max(WIN_SCORE, 2 * state.size)
+
+
+def mask_array(mask, size):
+    """Returns an array of 0 or 1 for each tile of a board of size tiles, by
+    index, as to whether its bit is set in mask"""
+    return numpy.frombuffer(mask_bits(mask, size), dtype=numpy.uint8).astype(numpy.intp) - ord('0')
+
+
+def support_counts(state, mask):
+    """Returns an array of how many of each tile's orthogonal neighbours on
+    the board of a WordsmushBitboard are in mask"""
+    return sum(mask_array(neighbours, state.size) for neighbours in state.neighbours_in(mask))
+
+
+def evaluate(game, player):
+    """Returns how good the position is for player: the difference in points,
+    plus a bonus for each protected tile. Finished games score +/-win_score.
+    :param game: WordsmushGame instance
+    :param player: the player to evaluate the position for"""
+    state = game.state
+    me = game.player_index(player)
+    mine, theirs = state.owned[me], state.owned[1 - me]
+
+    difference = popcount(mine) - popcount(theirs)
+    if state.is_full():
+        return win_score(state) * cmp(difference, 0) + difference
+
+    return difference + PROTECTED_WEIGHT * (popcount(mine & state.protected) -
+                                            popcount(theirs & state.protected))
+
+
+class WordsmushEvaluator(object):
+
+    # number of top ranked words played out exactly by best_turns
+    refine_limit = 10
+
+    # number of top ranked words sorted before the rest
+    partial_sort_size = 64
+
+    def __init__(self, words, min_length=3):
+        """:param words: the words playable on a board, e.g. from solve_board
+        :param min_length: shortest word worth considering (optional)"""
+        self.min_length = min_length
+        self.all_words = [word for word in words if len(word) >= min_length]
+        self.set_words(self.all_words)
+
+    def set_words(self, words):
+        """Sets the candidate words, all of them alive"""
+        self.words = numpy.array(words, dtype=object)
+        self.lengths = numpy.array([len(word) for word in words], dtype=numpy.intp)
+        self.counts = LetterCountIndex.build_counts(words)
+        self.alive = numpy.ones(len(words), dtype=bool)
+        self.positions = {word: position for position, word in enumerate(words)}
+        self.pruned_for = []    # the played words candidates have been pruned for
+        self._flat_counts = None
+
+    def live_words(self):
+        """Returns a list of the candidate words not yet pruned"""
+        return self.words[self.alive].tolist()
+
+    def prune(self, game):
+        """Drops the candidates made unplayable by words played since the last
+        prune: each played word and its prefixes. Only the new words played
+        are looked at, and the candidate arrays are compacted once over half
+        of them are dead, so the cost follows what changed rather than the
+        number of candidates."""
+        played = list(game.words_played)
+        if played[:len(self.pruned_for)] != self.pruned_for:
+            # turns were taken back since the last prune, so start again
+            self.set_words(self.all_words)
+
+        for word in played[len(self.pruned_for):]:
+            for end in range(self.min_length, len(word) + 1):
+                position = self.positions.get(word[:end])
+                if position is not None:
+                    self.alive[position] = False
+            self.pruned_for.append(word)
+
+        if self.alive.sum() * 2 < len(self.alive):
+            pruned_for = self.pruned_for
+            self.set_words(self.live_words())
+            self.pruned_for = pruned_for
+
+    def tiles_by_value(self, game, player):
+        """Returns a dict of each letter on the board mapped to a list of
+        (value, tile) for the tiles of that letter, most valuable first.
+        Between tiles of equal value, those next to more of player's tiles
+        come first, as they are more likely to end up protected."""
+        state = game.state
+        me = game.player_index(player)
+        mine, theirs = state.owned[me], state.owned[1 - me]
+        capturable = theirs & ~state.protected
+        untaken = state.full & ~(mine | theirs)
+
+        # every tile is valued at once, from its bits in each mask, so the
+        # cost grows with the number of tiles rather than its square
+        values = (CAPTURE_VALUE * mask_array(capturable, state.size) +
+                  UNTAKEN_VALUE * mask_array(untaken, state.size))
+        support = support_counts(state, mine)
+        # most valuable first, then most supported, then by index
+        order = numpy.lexsort((-support, -values))
+
+        tiles, letters, values = game.tiles, state.letters, values.tolist()
+        tiles_by_value = {letter: [] for letter in game.tiles_by_letter()}
+        for index in order.tolist():
+            tiles_by_value[letters[index]].append((values[index], tiles[index]))
+
+        return tiles_by_value
+
+    def swings(self, tiles_by_value):
+        """Returns an array of the score swing of playing each word with its
+        best tiles, as chosen from tiles_by_value"""
+        max_count = max(len(tiles) for tiles in tiles_by_value.values())
+        best_values = numpy.zeros((ALPHABET_SIZE, max_count + 1), dtype=numpy.intp)
+        for letter, tiles in tiles_by_value.items():
+            values = numpy.cumsum([value for value, tile in tiles])
+            row = best_values[ord(letter) - ord('a')]
+            row[1:len(values) + 1] = values
+            row[len(values) + 1:] = values[-1]
+
+        return best_values.take(self.flat_counts(max_count + 1)).sum(axis=1)
+
+    def flat_counts(self, row_size):
+        """Returns the words' letter counts, for the letters used by any word,
+        as indexes into a flattened (letter, count) table with rows of row_size"""
+        if self._flat_counts is None or self._flat_counts[0] != row_size:
+            letters = numpy.flatnonzero(self.counts.any(axis=0))
+            flat = self.counts[:, letters] + letters * row_size
+            self._flat_counts = (row_size, flat)
+
+        return self._flat_counts[1]
+
+    def ranked_words(self, game, player, tiles_by_value=None):
+        """Iterator of playable words, ordered by score swing then length
+        :param tiles_by_value: as returned by tiles_by_value (optional)"""
+        if not self.alive.any():
+            return
+
+        swings = self.swings(tiles_by_value or self.tiles_by_value(game, player))
+        keys = swings * (self.lengths.max() + 1) + self.lengths
+        keys[~self.alive] = -1
+
+        # callers rarely want more than a few words, so sort the best few
+        # first and only sort the rest when they are exhausted
+        if len(keys) > self.partial_sort_size:
+            best = numpy.argpartition(-keys, self.partial_sort_size)[:self.partial_sort_size]
+            chunks = [best, lambda: numpy.setdiff1d(numpy.arange(len(keys)), best)]
+        else:
+            chunks = [numpy.arange(len(keys))]
+
+        for chunk in chunks:
+            chunk = chunk() if callable(chunk) else chunk
+            for index in chunk[numpy.argsort(-keys[chunk], kind='mergesort')]:
+                word = self.words[index]
+                # words played since the last prune, e.g. in a search, are
+                # still caught by is_playable_word
+                if self.alive[index] and game.is_playable_word(word):
+                    yield word
+
+    def assign_tiles(self, game, word, tiles_by_value):
+        """Returns a WordsmushTurn spelling word with the most valuable tiles.
+        The tiles are not marked selected, as the turn may never be played.
+        :param tiles_by_value: as returned by tiles_by_value"""
+        tiles, used = [], dict.fromkeys(tiles_by_value, 0)
+        for letter in word:
+            tiles.append(tiles_by_value[letter][used[letter]][1])
+            used[letter] += 1
+
+        return WordsmushTurn(game, tiles)
+
+    def candidate_turns(self, game, player, limit):
+        """Returns a list of WordsmushTurn for the top ranked words, spelled
+        with their most valuable tiles, without playing them out"""
+        tiles_by_value = self.tiles_by_value(game, player)
+        return [self.assign_tiles(game, word, tiles_by_value)
+                for word in islice(self.ranked_words(game, player, tiles_by_value), limit)]
+
+    def best_turns(self, game, player, limit=None):
+        """Returns a list of (value, turn) for the best turns player can make,
+        best first. The top ranked words are played out and valued with
+        evaluate, to account for protection as well as the score swing.
+        :param limit: number of words to play out (optional, defaults to
+        refine_limit)"""
+        valued_turns = []
+        for turn in self.candidate_turns(game, player, limit or self.refine_limit):
+            record = game.play_undoable(player, turn)
+            valued_turns.append((evaluate(game, player), turn))
+            game.unplay(record)
+
+        valued_turns.sort(key=lambda valued_turn: valued_turn[0], reverse=True)
+        return valued_turns
+
+    def best_turn(self, game, player):
+        """Returns the best WordsmushTurn for player, or None if no words are left"""
+        valued_turns = self.best_turns(game, player)
+        return valued_turns[0][1] if valued_turns else None
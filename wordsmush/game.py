@@ -1,24 +1,71 @@
-from operator import add
-from collections import defaultdict
+from bisect import bisect_left, insort
+from collections import defaultdict, namedtuple
 
-from colorama import Fore, Back, Style
+from wordsmush import word_list, boards
+from wordsmush.bitboard import WordsmushBitboard, iter_bits, mask_bits
 
-from wordsmush.word_list import words
+
+# everything unplay needs to restore the game to its state before a play
+UndoRecord = namedtuple('UndoRecord', ['state', 'word', 'scores', 'resigned'])
+
+_styles = None
+
+
+def get_styles():
+    """Returns a dict of the tile status colours and styles, importing
+    colorama the first time a board is rendered"""
+    global _styles
+    if _styles is None:
+        from colorama import Fore, Back, Style
+        _styles = {
+            'untaken': Fore.BLACK + Back.WHITE + Style.NORMAL,
+            'player1_taken': Fore.CYAN + Back.BLUE + Style.DIM,
+            'player2_taken': Fore.RED + Back.YELLOW + Style.DIM,
+            'player1_protected': Fore.BLUE + Back.BLUE + Style.BRIGHT,
+            'player2_protected': Fore.RED + Back.RED + Style.BRIGHT,
+            'selected': Fore.BLACK + Back.BLACK + Style.DIM,
+            'reset': Fore.RESET + Back.RESET + Style.RESET_ALL,
+        }
+
+    return _styles
+
+
+class _Style(object):
+    """A tile style class attribute, read from get_styles when it is used so
+    colorama is still only imported to render"""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, tile, tile_class):
+        return get_styles()[self.name]
+
+
+def tile_style(styles, player_index, protected):
+    """Returns the style of a tile owned by the player at player_index (None
+    for an untaken tile), protected or not"""
+    if player_index is None:
+        return styles['untaken']
+    return styles['player%d_%s' % (player_index + 1, 'protected' if protected else 'taken')]
 
 
 class WordsmushGame(object):
 
-    def __init__(self, player1, player2, board_width=5, board_height=5):
+    def __init__(self, player1, player2, board_width=5, board_height=5, dictionary=None,
+                 letters=None):
         """Instantiates a new WordsmushGame.
         :param player1: a WordsmushPlayer instance representing player 1 of the new game
         :param player2: a WordsmushPlayer instance representing player 2 of the new game
         :param board_width: The width of the play board (optional, default is 5) 
         :param board_height: the height of the play board (optional, default is 5)
+        :param dictionary: the Dictionary of playable words (optional, defaults
+        to word_list.get_dictionary())
+        :param letters: the letters of the board, row by row (optional,
+        defaults to random letters)
         """
-        from wordsmush import game_utils  # avoid circular dep
-
         self.board_width = board_width
         self.board_height = board_height
+        self.dictionary = dictionary or word_list.get_dictionary()
 
         self.player1 = player1
         self.player2 = player2
@@ -27,37 +74,89 @@ class WordsmushGame(object):
         # scores are not attached to players so players may participate in multiple games
         self.scores = {player1: 0, player2: 0}
 
-        self.board = [[ WordsmushTile(self, n, m, game_utils.random_letter_freq())
+        # tile ownership and status live in the packed state, not on the tiles
+        self.state = WordsmushBitboard(board_width, board_height)
+
+        if letters is None:
+            letters = boards.random_letters(board_width * board_height)
+        elif len(letters) != board_width * board_height:
+            raise ValueError("%d letters for a %dx%d board" % (len(letters), board_width,
+                                                               board_height))
+        self.board = [[ WordsmushTile(self, n, m, letters[m * board_width + n])
                             for n in range(board_width)] for m in range(board_height)]
-        self.words_played = {}
+        self.words_played = WordsmushPlayedWords()
+
+    @property
+    def board(self):
+        """The tiles of the board, as a list of rows"""
+        return self._board
+
+    @board.setter
+    def board(self, board):
+        self._board = board
+        self._tiles = tuple(tile for row in board for tile in row)
+        self._tiles_by_letter = None
 
     @property
     def tiles(self):
-        """Iterator for all tiles on the board"""
-        for tile in reduce(add, self.board):
-            yield tile
+        """Sequence of all tiles on the board, row by row"""
+        return self._tiles
 
     def tiles_by_letter(self):
-        """Returns a dict of each letter in the game mapped to a list of tiles
-        of that letter"""
-        tiles_by_letter = defaultdict(list)
-        for tile in self.tiles:
-            tiles_by_letter[tile.letter].append(tile)
+        """Returns a dict of each letter in the game mapped to a tuple of tiles
+        of that letter. The dict is shared between calls, so must not be changed."""
+        if self._tiles_by_letter is None:
+            tiles_by_letter = defaultdict(list)
+            for tile in self._tiles:
+                tiles_by_letter[tile.letter].append(tile)
+
+            self._tiles_by_letter = defaultdict(tuple, ((letter, tuple(tiles))
+                for letter, tiles in tiles_by_letter.items()))
+
+        return self._tiles_by_letter
 
-        return tiles_by_letter
+    def neighbours(self, tile):
+        """Returns a tuple of the tiles orthogonally next to a tile"""
+        return tuple(self._tiles[index] for index in self.state.neighbour_indexes[tile.index])
 
     def __repr__(self):
         """Returns a colourised representation of the play state of the board"""
 
-        get_repr = (lambda t: WordsmushTile.SELECTED_STYLE + (' %s ' % tile.letter.upper())
-                        if t.selected else repr(t))
-        format_string = ''
+        styles = get_styles()
+        state = self.state
+
+        # the style of each tile, from one walk over each mask rather than a
+        # lookup in every mask for each tile
+        owner_styles = {
+            ('0', '0', '0'): styles['untaken'],
+            ('1', '0', '0'): tile_style(styles, 0, False),
+            ('1', '0', '1'): tile_style(styles, 0, True),
+            ('0', '1', '0'): tile_style(styles, 1, False),
+            ('0', '1', '1'): tile_style(styles, 1, True),
+        }
+        tile_styles = [owner_styles[bits] for bits in zip(
+            mask_bits(state.owned[0], state.size), mask_bits(state.owned[1], state.size),
+            mask_bits(state.protected, state.size))]
+
+        lines = []
         for tile_row in self.board:
             for tile in tile_row:
-                format_string += get_repr(tile)
-            format_string += Fore.RESET + Back.RESET + Style.RESET_ALL + '\n'
+                if tile.selected:
+                    lines.append(styles['selected'] + ' %s ' % tile.letter.upper())
+                else:
+                    lines.extend((tile_styles[tile.index], ' %s ' % tile.letter.upper(),
+                                  styles['reset']))
+            lines.append(styles['reset'] + '\n')
+
+        return ''.join(lines)
 
-        return format_string
+    def player_index(self, player):
+        """Returns the index of player in the packed state (0 or 1)"""
+        return 0 if player == self.player1 else 1
+
+    def get_player(self, player_index):
+        """Returns the player at an index of the packed state"""
+        return (self.player1, self.player2)[player_index]
 
     def get_tile(self, x, y):
         """Get tile at the specified index
@@ -84,102 +183,212 @@ class WordsmushGame(object):
 
             # give possession of each new letter to player, 
             # if the tiles are unprotected
+            turn_mask = 0
             for tile in turn.tiles:
-                if tile.status != WordsmushTile.PROTECTED:
-                    tile.status = WordsmushTile.TAKEN
-                    tile.owner = player
-
+                turn_mask |= 1 << tile.index
                 tile.selected = False
 
-            self.calculate_protected()
-            self.words_played.update({turn.word: True})
-            self.scores.update({player: self.get_points(player)})
+            self.state.capture(self.player_index(player), turn_mask)
+
+            self.calculate_protected(turn.tiles)
+            self.words_played.append(turn.word)
+            self.scores.update({p: self.get_points(p) for p in (self.player1, self.player2)})
         else:
             raise ValueError("Word is not playable")
 
+    def play_undoable(self, player, turn):
+        """Play a single turn as play does, returning an UndoRecord which
+        unplay can use to take the turn back.
+        :param player: the player playing the turn.
+        :param turn: the instance of WordsmushTurn representing the turn."""
+        record = UndoRecord(self.state.snapshot(), None if turn.resign else turn.word,
+                            dict(self.scores), self.resigned)
+        self.play(player, turn)
+        return record
+
+    def unplay(self, record):
+        """Take back a turn, restoring the game to its state before the turn.
+        Turns must be taken back in the reverse order they were played.
+        :param record: the UndoRecord returned by play_undoable for the turn."""
+        self.state.restore(record.state)
+        if record.word is not None:
+            self.words_played.remove(record.word)
+        self.scores = record.scores
+        self.resigned = record.resigned
+
     def get_points(self, player):
-        return sum(1 for tile in self.tiles if tile.owner == player)
+        return self.state.points(self.player_index(player))
 
     def is_game_over(self):
-        return bool(self.resigned) or all(tile.owner for tile in self.tiles)
-
-    def calculate_protected(self):
-        """Calculates the protected status of all tiles on the board"""
-
-        has_tile = lambda f: f() is not None
-        tile_owned = lambda t, p: t.status in (WordsmushTile.TAKEN, WordsmushTile.PROTECTED) and t.owner == p
-        def tile_surrounded(tile):
-            if ((not has_tile(tile.tile_above) or tile_owned(tile.tile_above(), tile.owner)) and
-               (not has_tile(tile.tile_below) or tile_owned(tile.tile_below(), tile.owner)) and
-               (not has_tile(tile.tile_left) or tile_owned(tile.tile_left(), tile.owner)) and
-               (not has_tile(tile.tile_right) or tile_owned(tile.tile_right(), tile.owner))):
-                    return True
+        return bool(self.resigned) or self.state.is_full()
+
+    def calculate_protected(self, tiles=None):
+        """Calculates the protected status of tiles on the board.
+        A held tile is protected when all its neighbours are held by its owner.
+        Returns a list of the tiles whose status changed.
+        :param tiles: tiles whose owner may have changed (optional). Only these
+        tiles and their neighbours are recalculated. When not given, all tiles
+        on the board are recalculated."""
+        mask = None
+        if tiles is not None:
+            mask = 0
+            for tile in tiles:
+                mask |= 1 << tile.index
+
+        changed = self.state.calculate_protected(mask)
+        return [self._tiles[index] for index in iter_bits(changed)]
 
-        for tile in self.tiles:
-            if tile.status in (WordsmushTile.TAKEN, WordsmushTile.PROTECTED):
-                if tile_surrounded(tile):
-                    tile.status = WordsmushTile.PROTECTED
-                else:
-                    tile.status = WordsmushTile.TAKEN
-        
     def potential_score(self, player, word):
         """Return the score that would be awarded to players if they
-        played a given word, assuming that word is valid"""
-        other_player = next(p for p in self.score if p != player)
-        potential_score = self.score.copy()
+        played a given word, assuming that word is valid
+        :param player: the player who would play the word
+        :param word: the instance of WordsmushTurn representing the word"""
+        record = UndoRecord(self.state.snapshot(), None, self.scores, self.resigned)
+
+        turn_mask = 0
         for tile in word.tiles:
-            if tile.status == WordsmushTile.TAKEN and WordsmushTile.owner == other_player:
-                potential_score[player] += 1
-                potential_score[other_player] -= 1
-            elif tile.status == WordsmushTile.UNTAKEN:
-                potential_score[player] += 1
+            turn_mask |= 1 << tile.index
+        self.state.capture(self.player_index(player), turn_mask)
+        potential_score = {p: self.get_points(p) for p in (self.player1, self.player2)}
 
+        self.unplay(record)
         return potential_score
 
     def is_a_word(self, word):
         """Returns whether or not a given word (str) is a valid dictionary word"""
-        return word in words
+        return word in self.dictionary.words
+
+    def is_a_prefix(self, prefix):
+        """Returns whether or not any dictionary word starts with prefix (str)"""
+        return self.dictionary.trie.has_prefix(prefix)
 
     def is_playable_word(self, word):
         """Returns whether or not the word is playable.
         This is simply if the word or a superstring of word has been played before."""
-        return not any(played_word.startswith(word) for played_word in self.words_played)
+        return not self.words_played.has_prefix(word)
+
+
+class WordsmushPlayedWords(object):
+    """The words played in a game, in the order they were played. They are
+    also kept sorted, so whether any played word starts with a given word is
+    a binary search rather than a scan of every word played."""
+
+    def __init__(self, words=()):
+        self.words = []
+        self.sorted_words = []
+        self.extend(words)
+
+    def __repr__(self):
+        return repr(self.words)
+
+    def __iter__(self):
+        return iter(self.words)
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, word):
+        index = bisect_left(self.sorted_words, word)
+        return index < len(self.sorted_words) and self.sorted_words[index] == word
+
+    def append(self, word):
+        self.words.append(word)
+        insort(self.sorted_words, word)
+
+    def extend(self, words):
+        for word in words:
+            self.append(word)
+
+    def remove(self, word):
+        """Removes a played word, e.g. when a turn is taken back"""
+        if self.words and self.words[-1] == word:
+            self.words.pop()
+        else:
+            self.words.remove(word)
+        del self.sorted_words[bisect_left(self.sorted_words, word)]
+
+    def has_prefix(self, prefix):
+        """Returns whether any played word starts with prefix"""
+        index = bisect_left(self.sorted_words, prefix)
+        return (index < len(self.sorted_words) and
+                self.sorted_words[index].startswith(prefix))
 
 class WordsmushTile(object):
 
+    # letter, status and owner are properties over the game's packed state
+    __slots__ = ('game', 'x', 'y', 'index', 'selected')
+
     # tile statuses
     UNTAKEN = 0
     TAKEN = 1
     PROTECTED = 2
 
-    # tile status colours and styles
-    UNTAKEN_STYLE = Fore.BLACK + Back.WHITE + Style.NORMAL
-    PLAYER1_TAKEN_STYLE = Fore.CYAN + Back.BLUE + Style.DIM
-    PLAYER2_TAKEN_STYLE = Fore.RED + Back.YELLOW + Style.DIM
-    PLAYER1_PROTECTED_STYLE = Fore.BLUE + Back.BLUE + Style.BRIGHT
-    PLAYER2_PROTECTED_STYLE = Fore.RED + Back.RED + Style.BRIGHT
-    SELECTED_STYLE = Fore.BLACK + Back.BLACK + Style.DIM
+    # tile styles, as used by __repr__
+    UNTAKEN_STYLE = _Style('untaken')
+    PLAYER1_TAKEN_STYLE = _Style('player1_taken')
+    PLAYER2_TAKEN_STYLE = _Style('player2_taken')
+    PLAYER1_PROTECTED_STYLE = _Style('player1_protected')
+    PLAYER2_PROTECTED_STYLE = _Style('player2_protected')
+    SELECTED_STYLE = _Style('selected')
 
     def __init__(self, game, x, y, letter):
         self.game = game
         self.x = x
         self.y = y
+        self.index = y * game.board_width + x
         self.letter = letter
-        self.status = self.UNTAKEN
-        self.owner = None
         self.selected = False
 
-    def __repr__(self):
-        COLOUR_MAPPING = {
-            (self.UNTAKEN, None): self.UNTAKEN_STYLE,
-            (self.TAKEN, self.game.player1): self.PLAYER1_TAKEN_STYLE, 
-            (self.TAKEN, self.game.player2): self.PLAYER2_TAKEN_STYLE,
-            (self.PROTECTED, self.game.player1): self.PLAYER1_PROTECTED_STYLE,
-            (self.PROTECTED, self.game.player2): self.PLAYER2_PROTECTED_STYLE,
-        }
+        # tiles start untaken, as every tile of a new board already is
+        state = game.state
+        if (state.owned[0] | state.owned[1]) >> self.index & 1:
+            self.status = self.UNTAKEN
+            self.owner = None
+
+    @property
+    def letter(self):
+        return self.game.state.letters[self.index]
+
+    @letter.setter
+    def letter(self, letter):
+        self.game.state.letters[self.index] = letter
+        self.game._tiles_by_letter = None
 
-        reset_string = Fore.RESET + Back.RESET + Style.RESET_ALL
-        return COLOUR_MAPPING[self.status, self.owner] + (' %s ' % self.letter.upper()) + reset_string
+    @property
+    def status(self):
+        state, tile_bit = self.game.state, 1 << self.index
+        if state.protected & tile_bit:
+            return self.PROTECTED
+        elif state.taken & tile_bit:
+            return self.TAKEN
+        else:
+            return self.UNTAKEN
+
+    @status.setter
+    def status(self, status):
+        state, tile_bit = self.game.state, 1 << self.index
+        state.taken &= ~tile_bit
+        state.protected &= ~tile_bit
+        if status == self.TAKEN:
+            state.taken |= tile_bit
+        elif status == self.PROTECTED:
+            state.protected |= tile_bit
+
+    @property
+    def owner(self):
+        player_index = self.game.state.owner(self.index)
+        return None if player_index is None else self.game.get_player(player_index)
+
+    @owner.setter
+    def owner(self, player):
+        player_index = None if player is None else self.game.player_index(player)
+        self.game.state.set_owner(self.index, player_index)
+
+    def __repr__(self):
+        styles = get_styles()
+        style = tile_style(styles, self.game.state.owner(self.index),
+                           self.status == self.PROTECTED)
+        return style + (' %s ' % self.letter.upper()) + styles['reset']
 
     def tile_above(self):
         """Return the tile above this tile on the board.
@@ -187,7 +396,7 @@ class WordsmushTile(object):
         if self.y == 0:
             return None
         else:
-            return self.game.get_tile(self.x, self.y-1) 
+            return self.game.tiles[self.index - self.game.board_width]
 
     def tile_below(self):
         """Return the tile below this tile on the board.
@@ -195,7 +404,7 @@ class WordsmushTile(object):
         if self.y+1 == self.game.board_height:
             return None
         else:
-            return self.game.get_tile(self.x, self.y+1) 
+            return self.game.tiles[self.index + self.game.board_width]
 
     def tile_left(self):
         """Return the tile left of this tile on the board.
@@ -203,7 +412,7 @@ class WordsmushTile(object):
         if self.x == 0:
             return None
         else:
-            return self.game.get_tile(self.x-1, self.y)
+            return self.game.tiles[self.index - 1]
 
     def tile_right(self):
         """Return the tile right of this tile on the board.
@@ -211,7 +420,7 @@ class WordsmushTile(object):
         if self.x+1 == self.game.board_width:
             return None
         else:
-            return self.game.get_tile(self.x+1, self.y)
+            return self.game.tiles[self.index + 1]
 
 
 class WordsmushTurn(object):
@@ -1,9 +1,10 @@
-from itertools import imap, cycle
-from collections import Iterator
-from random import randint, choice
+from itertools import imap, cycle, islice
+import random
+from random import randint
 
-from wordsmush.game import WordsmushGame, WordsmushTile
+from wordsmush.game import WordsmushGame
 from wordsmush.player import WordsmushPlayer
+from wordsmush import boards
 
 def get_alpha_board():
     """Test utility. Creates a 5x5 game populated with the letters a-z"""
@@ -15,51 +16,37 @@ def get_alpha_board():
     return get_board(letters)
     
 
-def get_board(letters):
-    """Creates a board from a list of letters"""
-
-    if not isinstance(letters, Iterator):
-        letters = iter(letters)
-
-    player1 = WordsmushPlayer() 
-    player2 = WordsmushPlayer()
-    game = WordsmushGame(player1, player2, board_width=5,
-                board_height=5)
-
-    board = ([[WordsmushTile(game, x, y, next(letters)) 
-        for x in range(game.board_width)] for y in range(game.board_height)])
-
-    game.board = board
-    return game
+def get_board(letters, player1=None, player2=None, board_width=5, board_height=5,
+              dictionary=None):
+    """Creates a board from a list of letters
+    :param letters: the letters of the board, row by row
+    :param player1: player 1 of the game (optional, defaults to a new WordsmushPlayer)
+    :param player2: player 2 of the game (optional, defaults to a new WordsmushPlayer)
+    :param board_width: the width of the board (optional, default is 5)
+    :param board_height: the height of the board (optional, default is 5)
+    :param dictionary: the Dictionary of playable words (optional)"""
+
+    # letters may be an endless iterator, as for get_alpha_board
+    letters = list(islice(letters, board_width * board_height))
+
+    player1 = player1 or WordsmushPlayer() 
+    player2 = player2 or WordsmushPlayer()
+    return WordsmushGame(player1, player2, board_width=board_width,
+                board_height=board_height, dictionary=dictionary, letters=letters)
+
+def get_random_board(seed=None, player1=None, player2=None, board_width=5, board_height=5,
+                     dictionary=None):
+    """Creates a board of random letters, weighted by letter frequency. Boards
+    created with the same seed have the same letters.
+    :param seed: seed for the letters (optional, defaults to a random board)
+    Other parameters are as for get_board."""
+    letters = boards.random_letters(board_width * board_height, random.Random(seed))
+    return get_board(letters, player1, player2, board_width, board_height, dictionary)
 
 random_letter = lambda: chr(randint(ord('a'), ord('z')))
 
-def random_letter_freq():
+def random_letter_freq(rng=random):
     """Gets a random letter, with the random choice weighted by frequency of
-    use in the english language. Weights from http://en.wikipedia.org/wiki/Letter_frequency"""
-    return choice(['a']*8 +
-                  ['b']*1 +
-                  ['c']*3 +
-                  ['d']*4 +
-                  ['e']*12 +
-                  ['f']*2 +
-                  ['g']*2 +
-                  ['h']*6 +
-                  ['i']*7 +
-                  ['j']*1 +
-                  ['k']*1 +
-                  ['l']*4 +
-                  ['m']*2 +
-                  ['n']*7 +
-                  ['o']*8 +
-                  ['p']*2 +
-                  ['q']*1 +
-                  ['r']*6 +
-                  ['s']*6 +
-                  ['t']*9 +
-                  ['u']*3 +
-                  ['v']*1 +
-                  ['w']*2 +
-                  ['x']*1 +
-                  ['y']*2 +
-                  ['z']*1 ) 
+    use in the english language, as boards.random_letter
+    :param rng: random.Random instance to choose with (optional, defaults to the global one)"""
+    return boards.random_letter(rng)
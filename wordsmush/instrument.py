@@ -0,0 +1,199 @@
+"""Optional timing hooks around the hot paths.
+
+enable() wraps each hook point (WordsmushGame.play and calculate_protected,
+WordsmushAIPlayer.solve_board, get_best_word and endgame_turn, and the word
+list loading) in a function recording its call count, seconds and a size: the
+words played, tiles changed, candidate words, endgame positions searched or
+words loaded. disable() puts the original functions back, so there is no
+overhead at all while instrumentation is off. Calls to play include the AI's
+look-ahead plays, made through play_undoable.
+
+The slowest calls of each hook point are kept with a short description (the
+word played or the board letters), to find slow turns and boards. Results are
+exported by to_json or to_prometheus.
+"""
+
+import json
+import time
+import heapq
+import threading
+from collections import namedtuple
+
+# number of slowest calls kept for each hook point
+SLOWEST_SIZE = 5
+
+HookPoint = namedtuple('HookPoint', ['name', 'owner', 'attribute', 'size', 'describe'])
+
+_metrics = {}
+_originals = {}
+_lock = threading.Lock()
+
+
+def _board_letters(game):
+    return ''.join(tile.letter for tile in game.tiles)
+
+
+def _candidate_count(result, args):
+    evaluator = args[0].playable_words.get(args[1])
+    return 0 if evaluator is None else int(evaluator.alive.sum())
+
+
+def _endgame_nodes(result, args):
+    endgame = args[0].last_endgame
+    return 0 if endgame is None else endgame.nodes
+
+
+def hook_points():
+    """Returns the HookPoints enable() instruments. A hook point's size is a
+    function of (result, args) and its describe a function of args."""
+    from wordsmush.ai import WordsmushAIPlayer
+    from wordsmush.game import WordsmushGame
+    from wordsmush.word_list import compiled
+    from wordsmush.word_list.dictionary import Dictionary
+
+    return [
+        HookPoint('game_play', WordsmushGame, 'play',
+                  lambda result, args: len(args[0].words_played),
+                  lambda args: args[2].word),
+        HookPoint('game_calculate_protected', WordsmushGame, 'calculate_protected',
+                  lambda result, args: len(result), None),
+        HookPoint('ai_solve_board', WordsmushAIPlayer, 'solve_board',
+                  lambda result, args: len(result),
+                  lambda args: _board_letters(args[1])),
+        HookPoint('ai_get_best_word', WordsmushAIPlayer, 'get_best_word',
+                  _candidate_count,
+                  lambda args: _board_letters(args[1])),
+        HookPoint('ai_endgame_turn', WordsmushAIPlayer, 'endgame_turn',
+                  _endgame_nodes,
+                  lambda args: _board_letters(args[1])),
+        HookPoint('word_list_compile', compiled, 'compile_word_table',
+                  None, lambda args: args[0]),
+        HookPoint('word_list_map', compiled.CompiledWordList, '_map_table',
+                  None, lambda args: args[0].table_path),
+        HookPoint('word_list_letter_index', Dictionary, 'load_letter_index',
+                  lambda result, args: len(result), lambda args: args[0].name),
+    ]
+
+
+class Metric(object):
+    """Call count, seconds and sizes recorded for one hook point"""
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.size_total = 0
+        self.max_size = 0
+        self.slowest = []    # heap of (seconds, description)
+
+    def record(self, seconds, size=None, describe=None, args=None):
+        self.count += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        if size is not None:
+            self.size_total += size
+            self.max_size = max(self.max_size, size)
+
+        # describe only the calls slow enough to be kept
+        if describe is not None and (len(self.slowest) < SLOWEST_SIZE or
+                                     seconds > self.slowest[0][0]):
+            entry = (seconds, describe(args))
+            if len(self.slowest) < SLOWEST_SIZE:
+                heapq.heappush(self.slowest, entry)
+            else:
+                heapq.heapreplace(self.slowest, entry)
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'seconds': self.seconds,
+            'max_seconds': self.max_seconds,
+            'mean_seconds': self.seconds / self.count if self.count else 0.0,
+            'size_total': self.size_total,
+            'max_size': self.max_size,
+            'slowest': [{'seconds': seconds, 'description': description}
+                        for seconds, description in sorted(self.slowest, reverse=True)],
+        }
+
+
+def _wrap(point, function):
+    metric = _metrics.setdefault(point.name, Metric(point.name))
+
+    def instrumented(*args, **kwargs):
+        started = time.time()
+        result = function(*args, **kwargs)
+        seconds = time.time() - started
+
+        size = None if point.size is None else point.size(result, args)
+        with _lock:
+            metric.record(seconds, size, point.describe, args)
+        return result
+
+    instrumented.__name__ = function.__name__
+    instrumented.__doc__ = function.__doc__
+    return instrumented
+
+
+def enable():
+    """Starts recording calls to the hook points"""
+    for point in hook_points():
+        key = (point.owner, point.attribute)
+        if key not in _originals:
+            function = vars(point.owner)[point.attribute]
+            _originals[key] = function
+            setattr(point.owner, point.attribute, _wrap(point, function))
+
+
+def disable():
+    """Stops recording, restoring the hook points' original functions.
+    Metrics recorded so far are kept until reset."""
+    for (owner, attribute), function in _originals.items():
+        setattr(owner, attribute, function)
+    _originals.clear()
+
+
+def is_enabled():
+    return bool(_originals)
+
+
+def reset():
+    """Discards the metrics recorded so far"""
+    with _lock:
+        for metric in _metrics.values():
+            metric.__init__(metric.name)
+
+
+def get_metrics():
+    """Returns {hook point name: metric dict} for the hook points called so far"""
+    with _lock:
+        return {name: metric.as_dict() for name, metric in _metrics.items() if metric.count}
+
+
+def to_json():
+    return json.dumps(get_metrics(), sort_keys=True)
+
+
+def to_prometheus():
+    """Returns the metrics in the Prometheus text exposition format"""
+    lines = []
+    for name, metric in sorted(get_metrics().items()):
+        seconds = 'wordsmush_%s_seconds' % name
+        size = 'wordsmush_%s_size' % name
+        lines.extend([
+            '# TYPE %s summary' % seconds,
+            '%s_count %d' % (seconds, metric['count']),
+            '%s_sum %r' % (seconds, metric['seconds']),
+            '# TYPE %s_max gauge' % seconds,
+            '%s_max %r' % (seconds, metric['max_seconds']),
+        ])
+        if not metric['max_size']:
+            continue
+        lines.extend([
+            '# TYPE %s summary' % size,
+            '%s_count %d' % (size, metric['count']),
+            '%s_sum %d' % (size, metric['size_total']),
+            '# TYPE %s_max gauge' % size,
+            '%s_max %d' % (size, metric['max_size']),
+        ])
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,197 @@
+"""Monte Carlo Tree Search AI.
+
+Each move decision is split across a pool of worker processes. Every worker
+rebuilds the position, grows its own search tree with UCT selection and short
+rollouts, and returns the visit counts of the root's moves. The counts are
+summed over the workers and the most visited move is played (root
+parallelisation), so a decision can use every core on the box.
+"""
+
+import math
+import time
+import multiprocessing
+from random import Random
+
+from wordsmush import game_utils, word_list
+from wordsmush.ai import WordsmushAIPlayer
+from wordsmush.evaluator import WordsmushEvaluator, evaluate
+
+# evaluators built by this process, for the board last searched
+_evaluator_cache = {}
+
+
+class MCTSNode(object):
+
+    def __init__(self, parent, turn, player_index):
+        """:param parent: the parent MCTSNode, None for the root
+        :param turn: the WordsmushTurn played to reach this node
+        :param player_index: index of the player to move at this node"""
+        self.parent = parent
+        self.turn = turn
+        self.player_index = player_index
+        self.children = []
+        self.untried = None    # turns not yet expanded, None until first visited
+        self.visits = 0
+        self.wins = 0.0        # for the player who played turn
+
+    def uct_child(self, exploration):
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: (
+            child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits)))
+
+
+def snapshot_game(game, player):
+    """Returns a picklable description of a game position, from which
+    restore_game rebuilds it
+    :param player: the player to move"""
+    return (game.board_width, game.board_height, [tile.letter for tile in game.tiles],
+            game.state.snapshot(), list(game.words_played), game.player_index(player),
+            game.dictionary.source_path)
+
+
+def restore_game(snapshot):
+    """Returns (game, player index to move) rebuilt from snapshot_game"""
+    width, height, letters, state, words_played, player_index, dictionary_path = snapshot
+    game = game_utils.get_board(letters, board_width=width, board_height=height,
+                                dictionary=word_list.get_dictionary(dictionary_path))
+    game.state.restore(state)
+    game.words_played.extend(words_played)
+    return game, player_index
+
+
+def search(snapshot, words, iterations, move_time, seed, branching, rollout_depth,
+           exploration):
+    """Runs one MCTS search of a position. Run in the worker processes.
+    Returns ({word: (visits, wins)} for the root's moves, number of playouts)"""
+    deadline = time.time() + move_time
+    game, player_index = restore_game(snapshot)
+    rng = Random(seed)
+
+    key = tuple(snapshot[2])
+    if key not in _evaluator_cache:
+        _evaluator_cache.clear()
+        _evaluator_cache[key] = WordsmushEvaluator(words)
+    evaluator = _evaluator_cache[key]
+    evaluator.prune(game)
+
+    root = MCTSNode(None, None, player_index)
+    playouts = 0
+    while playouts < iterations and time.time() < deadline:
+        node, records = root, []
+
+        # selection
+        while node.untried == [] and node.children:
+            node = node.uct_child(exploration)
+            mover = game.get_player(1 - node.player_index)
+            records.append(game.play_undoable(mover, node.turn))
+
+        # expansion
+        if node.untried is None:
+            node.untried = ([] if game.is_game_over() else evaluator.candidate_turns(
+                game, game.get_player(node.player_index), branching))
+        if node.untried:
+            turn = node.untried.pop(rng.randrange(len(node.untried)))
+            records.append(game.play_undoable(game.get_player(node.player_index), turn))
+            child = MCTSNode(node, turn, 1 - node.player_index)
+            node.children.append(child)
+            node = child
+
+        # rollout, picking at random between the best few moves
+        to_move = node.player_index
+        for _ in range(rollout_depth):
+            if game.is_game_over():
+                break
+            player = game.get_player(to_move)
+            turns = evaluator.candidate_turns(game, player, 3)
+            if not turns:
+                break
+            records.append(game.play_undoable(player, rng.choice(turns)))
+            to_move = 1 - to_move
+
+        value = evaluate(game, game.get_player(0))
+        result = 1.0 if value > 0 else 0.0 if value < 0 else 0.5
+
+        for record in reversed(records):
+            game.unplay(record)
+
+        # backpropagation, crediting the player who moved into each node
+        while node is not None:
+            node.visits += 1
+            node.wins += result if node.player_index == 1 else 1.0 - result
+            node = node.parent
+        playouts += 1
+
+    return {child.turn.word: (child.visits, child.wins) for child in root.children}, playouts
+
+
+def _search_star(args):
+    return search(*args)
+
+
+class WordsmushMCTSAIPlayer(WordsmushAIPlayer):
+
+    def __init__(self, iterations=2000, move_time=2.0, workers=None, branching=12,
+                 rollout_depth=6, exploration=1.4, seed=None, dictionary=None):
+        """:param iterations: most playouts per move, over all workers (optional)
+        :param move_time: seconds allowed to choose a move (optional)
+        :param workers: number of worker processes (optional, defaults to the
+        number of CPUs). With 1 worker the search runs in this process.
+        :param branching: number of best-ranked moves considered at each node
+        (optional)
+        :param rollout_depth: most moves played in a rollout (optional)
+        :param exploration: UCT exploration constant (optional)
+        :param seed: seed for the searches' random choices (optional)
+        :param dictionary: as for WordsmushAIPlayer (optional)"""
+        super(WordsmushMCTSAIPlayer, self).__init__(dictionary)
+        self.name = "MCTSbot"
+        self.iterations = iterations
+        self.move_time = move_time
+        self.workers = workers or multiprocessing.cpu_count()
+        self.branching = branching
+        self.rollout_depth = rollout_depth
+        self.exploration = exploration
+        self.random = Random(seed)
+        self.pool = None
+
+        # playouts, seconds and playouts_per_second of the last move decision
+        self.last_stats = {}
+
+    def close(self):
+        """Shuts down the worker pool"""
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool = None
+
+    def get_best_word(self, game):
+        """Returns the most visited move over all workers' searches.
+        Resigns when no words are left to play."""
+        evaluator = self.playable_words[game]
+        if next(evaluator.ranked_words(game, self), None) is None:
+            return super(WordsmushMCTSAIPlayer, self).get_best_word(game)
+
+        snapshot = snapshot_game(game, self)
+        words = evaluator.live_words()
+        jobs = [(snapshot, words, int(math.ceil(float(self.iterations) / self.workers)),
+                 self.move_time, self.random.getrandbits(32), self.branching,
+                 self.rollout_depth, self.exploration) for _ in range(self.workers)]
+
+        started = time.time()
+        if self.workers == 1:
+            results = [search(*jobs[0])]
+        else:
+            if self.pool is None:
+                self.pool = multiprocessing.Pool(self.workers)
+            results = self.pool.map(_search_star, jobs)
+        seconds = time.time() - started
+
+        visits = {}
+        for root_stats, playouts in results:
+            for word, (word_visits, wins) in root_stats.items():
+                visits[word] = visits.get(word, 0) + word_visits
+
+        playouts = sum(playouts for root_stats, playouts in results)
+        self.last_stats = {'playouts': playouts, 'seconds': seconds,
+                           'playouts_per_second': playouts / seconds if seconds else 0.0}
+
+        best_word = max(sorted(visits), key=visits.get)
+        return evaluator.assign_tiles(game, best_word, evaluator.tiles_by_value(game, self))
@@ -1,4 +1,3 @@
-import uuid
 import re
 
 from wordsmush.game import WordsmushTurn
@@ -8,7 +7,10 @@ from wordsmush.cli import loop_input
 class WordsmushPlayer(object):
     
     def __init__(self, name=None):
-        self.name = name or uuid.uuid4() 
+        if not name:
+            import uuid
+            name = uuid.uuid4()
+        self.name = name
 
 class CommandLineWordsmushPlayer(WordsmushPlayer):
 
@@ -16,8 +18,8 @@ class CommandLineWordsmushPlayer(WordsmushPlayer):
         turn = WordsmushTurn(game)
 
         move_complete = False
-        move_rx = re.compile('^(help|play|pass|resign|rem|clear|\d,\d)', re.IGNORECASE)
-        tile_rx = re.compile('^(?P<x>\d),(?P<y>\d)( (?P<pos>\d))?', re.IGNORECASE)
+        move_rx = re.compile('^(help|play|pass|resign|rem|clear|\d+,\d+)', re.IGNORECASE)
+        tile_rx = re.compile('^(?P<x>\d+),(?P<y>\d+)( (?P<pos>\d+))?', re.IGNORECASE)
 
         while not move_complete:
             move_text = ''
@@ -55,10 +57,9 @@ class CommandLineWordsmushPlayer(WordsmushPlayer):
                     tile_pos = tile_move_dict.get('pos')
                     tile_pos = int(tile_pos)-1 if tile_pos else None
 
-                    try:
-                        game_tile = game.get_tile(tile_x-1, tile_y-1)
-                        turn.add_tile(game_tile, tile_pos)
-                    except IndexError:
+                    if 1 <= tile_x <= game.board_width and 1 <= tile_y <= game.board_height:
+                        turn.add_tile(game.get_tile(tile_x-1, tile_y-1), tile_pos)
+                    else:
                         print("No such tile.")
 
         return turn
@@ -0,0 +1,336 @@
+"""Compact game records, with replay and verification.
+
+A record is one line of text holding everything needed to replay a game:
+
+    5 5 7 esprolishmtabdientsixfgmn 15 10 cAB.-.HIJK.!
+
+that is the board width and height, the seed the letters were drawn with ('-'
+when unknown), the board letters row by row, the final scores of player 1 and
+player 2, and the turns in order, separated by '.'. A turn is the indexes
+(y * width + x) of the tiles played, each written as a fixed number of base 64
+digits (one for boards of up to 64 tiles), '-' for a pass or '!' for a resign.
+A typical 5x5 game takes around 150 bytes, and archives may be gzipped.
+
+replay plays a record's turns through WordsmushGame.play, so every word is
+checked against the dictionary and the words played before it, and
+verify_records checks a stream of records, from an archive of any size,
+across a process pool.
+"""
+
+import sys
+import gzip
+import time
+import random
+import argparse
+import multiprocessing
+from collections import namedtuple, deque
+from itertools import islice
+
+GameRecord = namedtuple('GameRecord', ['board_width', 'board_height', 'seed', 'letters',
+                                       'scores', 'turns'])
+
+# turns of a GameRecord which are not tuples of tile indexes
+PASS = 'pass'
+RESIGN = 'resign'
+
+DIGITS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz+/'
+DIGIT_VALUES = {digit: value for value, digit in enumerate(DIGITS)}
+TURN_SEPARATOR = '.'
+TURN_SYMBOLS = {PASS: '-', RESIGN: '!'}
+SYMBOL_TURNS = {symbol: turn for turn, symbol in TURN_SYMBOLS.items()}
+
+
+class InvalidRecord(ValueError):
+    pass
+
+
+def index_width(board_size):
+    """Returns the number of digits each tile index of a board is written with"""
+    width = 1
+    while len(DIGITS) ** width < board_size:
+        width += 1
+    return width
+
+
+def encode_record(record):
+    """Returns a GameRecord as a line of text, without a line ending"""
+    width = index_width(record.board_width * record.board_height)
+    turns = []
+    for turn in record.turns:
+        if turn in TURN_SYMBOLS:
+            turns.append(TURN_SYMBOLS[turn])
+            continue
+        digits = []
+        for index in turn:
+            for power in range(width - 1, -1, -1):
+                digits.append(DIGITS[index // len(DIGITS) ** power % len(DIGITS)])
+        turns.append(''.join(digits))
+
+    fields = [record.board_width, record.board_height,
+              '-' if record.seed is None else record.seed, record.letters,
+              record.scores[0], record.scores[1]]
+    line = ' '.join(str(field) for field in fields)
+    return line + ' ' + TURN_SEPARATOR.join(turns) if turns else line
+
+
+def decode_record(line):
+    """Returns the GameRecord written in a line of text. Raises InvalidRecord
+    if it is malformed."""
+    fields = line.split()
+    if len(fields) not in (6, 7):
+        raise InvalidRecord("Expected 6 or 7 fields, not %d" % len(fields))
+    try:
+        board_width, board_height, score1, score2 = [int(field) for field in
+                                                     fields[:2] + fields[4:6]]
+        seed = None if fields[2] == '-' else int(fields[2])
+    except ValueError:
+        raise InvalidRecord("Board size, seed and scores must be numbers")
+
+    width = index_width(board_width * board_height)
+    turns = []
+    for text in (fields[6].split(TURN_SEPARATOR) if len(fields) == 7 else ()):
+        if text in SYMBOL_TURNS:
+            turns.append(SYMBOL_TURNS[text])
+            continue
+        if not text or len(text) % width:
+            raise InvalidRecord("Bad turn '%s'" % text)
+        try:
+            values = [DIGIT_VALUES[digit] for digit in text]
+        except KeyError:
+            raise InvalidRecord("Bad turn '%s'" % text)
+        indexes = []
+        for start in range(0, len(values), width):
+            index = 0
+            for value in values[start:start + width]:
+                index = index * len(DIGITS) + value
+            indexes.append(index)
+        turns.append(tuple(indexes))
+
+    return GameRecord(board_width, board_height, seed, fields[3], (score1, score2),
+                      tuple(turns))
+
+
+class GameRecorder(object):
+
+    def __init__(self, game, seed=None):
+        """Records the turns of a game as they are taken, from the start
+        :param game: the WordsmushGame to record, before any turns are taken
+        :param seed: the seed the board letters were drawn with (optional)"""
+        self.game = game
+        self.seed = seed
+        self.letters = ''.join(tile.letter for tile in game.tiles)
+        self.turns = []
+
+    def take_turn(self, player):
+        """Has player take a turn, records it and returns what take_turn returned"""
+        game = self.game
+        words_played = len(game.words_played)
+        result = player.take_turn(game)
+
+        if len(game.words_played) > words_played:
+            word = game.words_played.words[-1]
+            tiles = getattr(result, 'tiles', None)
+            if tiles is None or ''.join(tile.letter for tile in tiles) != word:
+                raise ValueError("The tiles of '%s' were not returned by take_turn" % word)
+            self.turns.append(tuple(tile.index for tile in tiles))
+        elif game.resigned == player:
+            self.turns.append(RESIGN)
+        else:
+            self.turns.append(PASS)
+
+        return result
+
+    def record(self):
+        """Returns the GameRecord of the game so far"""
+        game = self.game
+        return GameRecord(game.board_width, game.board_height, self.seed, self.letters,
+                          (game.scores[game.player1], game.scores[game.player2]),
+                          tuple(self.turns))
+
+
+def replay_turns(record, dictionary=None):
+    """Iterator replaying a GameRecord through WordsmushGame.play, yielding
+    (turn number, game) after each turn. Raises InvalidRecord if the letters
+    do not match the seed, any turn is not a legal play or the final scores
+    differ from the record's.
+    :param dictionary: the Dictionary the game was played with (optional,
+    defaults to word_list.get_dictionary())"""
+    from wordsmush import boards, game_utils
+    from wordsmush.game import WordsmushTurn
+    from wordsmush.player import WordsmushPlayer
+
+    size = record.board_width * record.board_height
+    if len(record.letters) != size:
+        raise InvalidRecord("%d letters for a %dx%d board" % (
+            len(record.letters), record.board_width, record.board_height))
+    if (record.seed is not None and
+            boards.random_letters(size, random.Random(record.seed)) != record.letters):
+        raise InvalidRecord("The letters were not drawn with seed %d" % record.seed)
+
+    players = WordsmushPlayer('player1'), WordsmushPlayer('player2')
+    game = game_utils.get_board(record.letters, players[0], players[1],
+                                record.board_width, record.board_height, dictionary)
+
+    for number, turn in enumerate(record.turns, 1):
+        if game.is_game_over():
+            raise InvalidRecord("Turn %d was taken after the game was over" % number)
+
+        play = WordsmushTurn(game)
+        if turn == RESIGN:
+            play.resign = True
+        elif turn != PASS:
+            if len(set(turn)) != len(turn) or not all(0 <= index < size for index in turn):
+                raise InvalidRecord("Turn %d does not play distinct tiles on the board"
+                                    % number)
+            play.tiles = [game.tiles[index] for index in turn]
+        if turn != PASS:
+            try:
+                game.play(players[(number - 1) % 2], play)
+            except ValueError:
+                raise InvalidRecord("Turn %d, '%s', is not a playable word"
+                                    % (number, play.word))
+        yield number, game
+
+    scores = (game.scores[players[0]], game.scores[players[1]])
+    if scores != tuple(record.scores):
+        raise InvalidRecord("Replayed scores %d-%d, not %d-%d" % (scores + tuple(record.scores)))
+
+
+def replay(record, dictionary=None):
+    """Replays a GameRecord, as replay_turns, and returns the finished game"""
+    game = None
+    for number, game in replay_turns(record, dictionary):
+        pass
+    return game
+
+
+def verify_line(line, dictionary=None):
+    """Returns None if the record in a line replays as recorded, otherwise
+    why it does not"""
+    try:
+        replay(decode_record(line), dictionary)
+    except InvalidRecord as e:
+        return str(e)
+    return None
+
+
+_dictionary = None
+
+
+def _init_worker(dictionary_name):
+    global _dictionary
+    from wordsmush import word_list
+    _dictionary = word_list.get_dictionary(dictionary_name).build(verify=False)
+
+
+def _verify_chunk(chunk):
+    """Returns [(line number, error), ...] for [(line number, line), ...].
+    Run in the worker processes."""
+    return [(number, verify_line(line, _dictionary)) for number, line in chunk]
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def verify_records(lines, workers=None, chunk_size=256, dictionary_name=None):
+    """Iterator of (line number, error) for each record in an iterable of
+    lines, counting from 1 and in order, where error is None for records
+    which replay as recorded. Blank lines are skipped. Only a few chunks of
+    lines are read ahead of the results, so archives of any size stream
+    through in constant memory.
+    :param workers: number of worker processes (optional, defaults to the
+    number of CPUs; 0 verifies in this process)
+    :param chunk_size: records sent to a worker at a time (optional)
+    :param dictionary_name: as for word_list.get_dictionary (optional)"""
+    numbered = ((number, line) for number, line in enumerate(lines, 1) if line.strip())
+    chunks = _chunks(numbered, chunk_size)
+
+    if workers == 0:
+        _init_worker(dictionary_name)
+        for chunk in chunks:
+            for result in _verify_chunk(chunk):
+                yield result
+        return
+
+    workers = workers or multiprocessing.cpu_count()
+    pool = multiprocessing.Pool(workers, _init_worker, (dictionary_name,))
+    try:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(_verify_chunk, (chunk,)))
+            if len(pending) > 2 * workers:
+                for result in pending.popleft().get():
+                    yield result
+        while pending:
+            for result in pending.popleft().get():
+                yield result
+    finally:
+        pool.terminate()
+
+
+def open_archive(path):
+    """Opens a file of records for reading, gunzipping it if its name ends
+    in .gz. '-' reads standard input."""
+    if path == '-':
+        return sys.stdin
+    return gzip.open(path, 'rb') if path.endswith('.gz') else open(path)
+
+
+def replay_entry_point():
+    p = argparse.ArgumentParser(
+        description='Verify game records by replaying them, printing those which fail.')
+    p.add_argument('paths', nargs='+', metavar='path',
+                   help="Files of records, one per line, optionally gzipped; '-' for stdin.")
+    p.add_argument('--workers', type=int,
+                   help='Number of worker processes (0 verifies in this process).')
+    p.add_argument('--chunk-size', type=int, default=256,
+                   help='Records sent to a worker at a time.')
+    p.add_argument('--dictionary',
+                   help="Name of a shipped dictionary or path of the word list games were played with.")
+    p.add_argument('--show', type=int, metavar='LINE',
+                   help='Print the board after every turn of the record at this line of the first file.')
+    args = p.parse_args()
+
+    if args.show:
+        from wordsmush import word_list
+
+        with open_archive(args.paths[0]) as f:
+            line = next(islice(f, args.show - 1, None), None)
+        if line is None:
+            p.error('%s has no line %d' % (args.paths[0], args.show))
+        try:
+            record = decode_record(line)
+            for number, game in replay_turns(record, word_list.get_dictionary(args.dictionary)):
+                turn = record.turns[number - 1]
+                played = turn if turn in TURN_SYMBOLS else game.words_played.words[-1]
+                print('Turn %d, player %d: %s' % (number, 2 - number % 2, played))
+                print(game)
+        except InvalidRecord as e:
+            print('Invalid: %s' % e)
+            sys.exit(1)
+        return
+
+    started, records, invalid = time.time(), 0, 0
+    for path in args.paths:
+        with open_archive(path) as f:
+            for number, error in verify_records(f, args.workers, args.chunk_size,
+                                                args.dictionary):
+                records += 1
+                if error is not None:
+                    invalid += 1
+                    sys.stdout.write('%s:%d: %s\n' % (path, number, error))
+                    sys.stdout.flush()
+
+    seconds = time.time() - started
+    sys.stderr.write('%d records, %d invalid, %.0f records/s\n' % (
+        records, invalid, records / seconds if seconds else 0))
+    if invalid:
+        sys.exit(1)
@@ -0,0 +1,206 @@
+"""Alpha-beta search AI.
+
+Searches a few plies ahead with negamax and alpha-beta pruning, deepening one
+ply at a time until the per-move time budget runs out. Moves are generated
+and ordered by the WordsmushEvaluator, and positions already searched are
+looked up in a transposition table keyed on a Zobrist hash of tile ownership,
+protection and the words played.
+"""
+
+import time
+from random import Random
+from weakref import WeakKeyDictionary
+
+from wordsmush.ai import WordsmushAIPlayer
+from wordsmush.evaluator import evaluate
+from wordsmush.bitboard import iter_bits
+
+# transposition table entry bounds
+EXACT, LOWER, UPPER = range(3)
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class ZobristHasher(object):
+    """Hashes a game position to a 64 bit key by XORing a random key for each
+    held tile (per owner and status), for each word played and for the
+    second player being the one to move."""
+
+    def __init__(self, size, seed=0):
+        """:param size: number of tiles on the board
+        :param seed: seed for the random keys (optional)"""
+        self.random = Random(seed)
+        # one key per tile for each of: taken by player 0 or 1, protected by player 0 or 1
+        self.tile_keys = [[self.random.getrandbits(64) for _ in range(4)]
+                          for _ in range(size)]
+        self.word_keys = {}
+        self.side_key = self.random.getrandbits(64)
+
+    @staticmethod
+    def categories(state):
+        """Returns the tile masks for each key category of a bitboard"""
+        owned0, owned1 = state.owned
+        return (owned0 & state.taken, owned1 & state.taken,
+                owned0 & state.protected, owned1 & state.protected)
+
+    def word_key(self, word):
+        key = self.word_keys.get(word)
+        if key is None:
+            key = self.word_keys[word] = self.random.getrandbits(64)
+        return key
+
+    def hash_game(self, game, player):
+        """Returns the full hash of a game position
+        :param player: the player to move"""
+        key = self.side_key if game.player_index(player) else 0
+        for category, mask in enumerate(self.categories(game.state)):
+            for index in iter_bits(mask):
+                key ^= self.tile_keys[index][category]
+        for word in game.words_played:
+            key ^= self.word_key(word)
+        return key
+
+    def update(self, key, before, after, word):
+        """Returns the hash after a play, updated from the hash before it.
+        The other player is to move after the play.
+        :param before: categories of the bitboard before the play
+        :param after: categories of the bitboard after the play
+        :param word: the word played"""
+        for category, (old, new) in enumerate(zip(before, after)):
+            for index in iter_bits(old ^ new):
+                key ^= self.tile_keys[index][category]
+        return key ^ self.word_key(word) ^ self.side_key
+
+
+class WordsmushSearchAIPlayer(WordsmushAIPlayer):
+
+    def __init__(self, move_time=1.0, max_depth=4, branching=8, table_size=200000,
+                 dictionary=None):
+        """:param move_time: seconds allowed to choose a move (optional)
+        :param max_depth: deepest search, in plies (optional)
+        :param branching: number of best-ranked moves searched at each
+        position (optional)
+        :param table_size: most positions kept in each game's transposition
+        table (optional)
+        :param dictionary: as for WordsmushAIPlayer (optional)"""
+        super(WordsmushSearchAIPlayer, self).__init__(dictionary)
+        self.name = "Searchbot"
+        self.move_time = move_time
+        self.max_depth = max_depth
+        self.branching = branching
+        self.table_size = table_size
+        # (hasher, transposition table) for each game, dropped with the game
+        self.tables = WeakKeyDictionary()
+
+    def get_best_word(self, game):
+        """Returns the best turn found within the time budget by iterative
+        deepening. The first ranked move is kept should even a one ply search
+        run out of time. Resigns when no words are left to play."""
+        evaluator = self.playable_words[game]
+        valued_turns = evaluator.best_turns(game, self, self.branching)
+        if not valued_turns:
+            return super(WordsmushSearchAIPlayer, self).get_best_word(game)
+
+        if game not in self.tables:
+            self.tables[game] = (ZobristHasher(game.state.size), {})
+        hasher, self.table = self.tables[game]
+        if len(self.table) > self.table_size:
+            self.table.clear()
+
+        deadline = time.time() + self.move_time
+        opponent = game.player2 if self == game.player1 else game.player1
+        key = hasher.hash_game(game, self)
+
+        best_turn = valued_turns[0][1]
+        for depth in range(1, self.max_depth + 1):
+            try:
+                value, best_turn = self.search_root(game, evaluator, hasher, key,
+                                                    opponent, depth, deadline)
+            except SearchTimeout:
+                break
+
+        return best_turn
+
+    def search_root(self, game, evaluator, hasher, key, opponent, depth, deadline):
+        """Returns (value, turn) of the best move found searching depth plies"""
+        best_value, best_turn = None, None
+        alpha, beta = -float('inf'), float('inf')
+        for turn in self.ordered_turns(game, evaluator, self, key):
+            value = -self.play_and_search(game, evaluator, hasher, key, turn, self,
+                                          opponent, depth - 1, -beta, -alpha, deadline)
+            if best_value is None or value > best_value:
+                best_value, best_turn = value, turn
+            alpha = max(alpha, value)
+
+        self.table[key] = (depth, best_value, EXACT, best_turn.word)
+        return best_value, best_turn
+
+    def ordered_turns(self, game, evaluator, player, key):
+        """Returns player's candidate turns, the transposition table's best
+        move for this position first, then in the evaluator's order"""
+        turns = [turn for value, turn in evaluator.best_turns(game, player, self.branching)]
+        entry = self.table.get(key)
+        if entry is not None:
+            turns.sort(key=lambda turn: turn.word != entry[3])
+        return turns
+
+    def play_and_search(self, game, evaluator, hasher, key, turn, player, opponent,
+                        depth, alpha, beta, deadline):
+        """Plays turn, searches the resulting position from the opponent's
+        point of view and takes the turn back"""
+        before = hasher.categories(game.state)
+        record = game.play_undoable(player, turn)
+        child_key = hasher.update(key, before, hasher.categories(game.state), turn.word)
+        try:
+            return self.negamax(game, evaluator, hasher, child_key, opponent, player,
+                                depth, alpha, beta, deadline)
+        finally:
+            game.unplay(record)
+
+    def negamax(self, game, evaluator, hasher, key, player, opponent, depth, alpha, beta,
+                deadline):
+        """Returns the value of the position for player, the player to move"""
+        if time.time() > deadline:
+            raise SearchTimeout()
+
+        if depth == 0 or game.is_game_over():
+            return evaluate(game, player)
+
+        original_alpha = alpha
+        entry = self.table.get(key)
+        if entry is not None and entry[0] >= depth:
+            entry_depth, value, bound, word = entry
+            if bound == EXACT:
+                return value
+            elif bound == LOWER:
+                alpha = max(alpha, value)
+            elif bound == UPPER:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+
+        turns = self.ordered_turns(game, evaluator, player, key)
+        if not turns:  # no words left, so the position stands as it is
+            return evaluate(game, player)
+
+        best_value, best_word = -float('inf'), None
+        for turn in turns:
+            value = -self.play_and_search(game, evaluator, hasher, key, turn, player,
+                                          opponent, depth - 1, -beta, -alpha, deadline)
+            if value > best_value:
+                best_value, best_word = value, turn.word
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            bound = UPPER
+        elif best_value >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.table[key] = (depth, best_value, bound, best_word)
+
+        return best_value
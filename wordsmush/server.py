@@ -0,0 +1,420 @@
+"""Multi-game Wordsmush server speaking a TCP line protocol.
+
+One process hosts many concurrent games, driven by an asyncore event loop.
+AI moves run in a thread pool, and their results are handed back to the loop
+through a queue and a wake-up pipe, so a slow move never stalls the loop.
+
+Requests and responses are single lines. Tile co-ordinates are 'x,y',
+counting from 1 as on the command line:
+
+    NEW [<width> <height> [<dictionary>]]
+                                -> GAME <id> <width> <height> <letters>
+    MOVE <id> <x,y> <x,y> ...   -> PLAYED <score> <ai score> <playing|over> [AI <x,y> ... | AI RESIGN]
+    PASS <id>                   -> PLAYED <score> <ai score> <playing|over> [AI ...]
+    RESIGN <id>                 -> PLAYED <score> <ai score> over
+    METRICS                     -> METRICS <JSON of the instrument metrics>
+    QUIT                        -> (closes the connection)
+
+The client plays first against a WordsmushAIPlayer. Games may use any of the
+dictionaries the server was started with, and games using the same dictionary
+share its indexes. A game can only be played over the connection that
+created it, and is dropped if that connection closes before it is over.
+Errors are answered with 'ERROR <message>'.
+
+run_load is a load-generating client: a number of concurrent connections each
+play games against the server with their own AI, and it reports games per
+second and percentiles of the move round trip (the client's move and the
+server AI's reply).
+"""
+
+import os
+import json
+import time
+import socket
+import threading
+import asyncore
+import asynchat
+import argparse
+from Queue import Queue, Empty
+from itertools import count
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+
+from wordsmush import game_utils, instrument, word_list
+from wordsmush.ai import WordsmushAIPlayer
+from wordsmush.game import WordsmushTurn
+from wordsmush.player import WordsmushPlayer
+
+MAX_BOARD_SIZE = 100
+
+
+class ServerGame(object):
+
+    def __init__(self, game_id, board_width, board_height, dictionary=None):
+        self.game_id = game_id
+        self.client = WordsmushPlayer('client')
+        self.ai = WordsmushAIPlayer()
+        self.game = game_utils.get_random_board(None, self.client, self.ai,
+                                                board_width, board_height, dictionary)
+        self.busy = False    # whether the AI is taking its turn
+
+    def result(self, ai_turn=None):
+        """Returns the response line for the game after a move"""
+        game = self.game
+        line = 'PLAYED %d %d %s' % (game.scores[self.client], game.scores[self.ai],
+                                    'over' if game.is_game_over() else 'playing')
+        if ai_turn is not None:
+            line += ' AI ' + ('RESIGN' if ai_turn.resign else format_tiles(ai_turn.tiles))
+        return line
+
+    def take_ai_turn(self):
+        """Takes the AI's turn and returns the response line. Run in the thread
+        pool, whose callback only runs if this returns, so any error is
+        answered here rather than raised."""
+        try:
+            return self.result(self.ai.take_turn(self.game))
+        except Exception as e:
+            return 'ERROR The AI failed to take its turn: %s' % (e or type(e).__name__)
+        finally:
+            self.busy = False
+
+
+def format_tiles(tiles):
+    return ' '.join('%d,%d' % (tile.x + 1, tile.y + 1) for tile in tiles)
+
+
+def parse_tiles(game, coordinates):
+    """Returns a WordsmushTurn of the tiles at a list of 'x,y' co-ordinates.
+    The tiles are not marked selected, as the turn may be rejected."""
+    tiles = []
+    for coordinate in coordinates:
+        x, y = [int(value) - 1 for value in coordinate.split(',')]
+        if not (0 <= x < game.board_width and 0 <= y < game.board_height):
+            raise ValueError("No such tile %s" % coordinate)
+        tile = game.get_tile(x, y)
+        if tile in tiles:
+            raise ValueError("Tile %s is played more than once" % coordinate)
+        tiles.append(tile)
+    return WordsmushTurn(game, tiles)
+
+
+class WordsmushChannel(asynchat.async_chat):
+    """One client connection"""
+
+    def __init__(self, server, sock):
+        asynchat.async_chat.__init__(self, sock)
+        self.server = server
+        self.buffer = []
+        self.game_ids = set()    # the unfinished games this connection created
+        self.set_terminator('\n')
+
+    def collect_incoming_data(self, data):
+        self.buffer.append(data)
+
+    def found_terminator(self):
+        line, self.buffer = ''.join(self.buffer).strip(), []
+        if line:
+            response = self.server.handle_request(self, line.split())
+            if response is not None:
+                self.push(response + '\n')
+
+    def handle_close(self):
+        self.close()
+
+    def close(self):
+        """Closes the connection, dropping the games it left unfinished. Also
+        called when a QUIT has been answered."""
+        self.server.channels.discard(self)
+        for game_id in list(self.game_ids):
+            self.server.games.pop(game_id, None)
+        self.game_ids.clear()
+        asynchat.async_chat.close(self)
+
+
+class Waker(asyncore.file_dispatcher):
+    """Wakes the event loop when the thread pool has finished a move, and
+    pushes the finished moves' responses to their channels"""
+
+    def __init__(self, server):
+        self.read_fd, self.write_fd = os.pipe()
+        asyncore.file_dispatcher.__init__(self, self.read_fd)
+        self.server = server
+        self.results = Queue()
+
+    def writable(self):
+        return False
+
+    def wake(self, channel, response):
+        """Called from the thread pool"""
+        self.results.put((channel, response))
+        os.write(self.write_fd, 'x')
+
+    def handle_read(self):
+        self.recv(4096)
+        while True:
+            try:
+                channel, response = self.results.get_nowait()
+            except Empty:
+                break
+            if channel in self.server.channels:
+                channel.push(response + '\n')
+
+
+class WordsmushServer(asyncore.dispatcher):
+
+    def __init__(self, host='127.0.0.1', port=5959, ai_threads=4, dictionaries=None):
+        """:param host: address to listen on (optional)
+        :param port: port to listen on (optional, 0 picks a free port)
+        :param ai_threads: number of threads taking AI turns (optional)
+        :param dictionaries: the Dictionary objects games may use, the first
+        being the default (optional, defaults to word_list.get_dictionary())"""
+        asyncore.dispatcher.__init__(self)
+        self.create_socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.set_reuse_addr()
+        self.bind((host, port))
+        self.listen(128)
+        self.address = self.socket.getsockname()
+
+        self.dictionaries = OrderedDict(
+            (dictionary.name, dictionary)
+            for dictionary in dictionaries or [word_list.get_dictionary()])
+        self.games = {}
+        self.game_ids = count(1)
+        self.channels = set()
+        self.pool = ThreadPool(ai_threads)
+        self.waker = Waker(self)
+        self.running = False
+
+    def handle_accept(self):
+        pair = self.accept()
+        if pair is not None:
+            self.channels.add(WordsmushChannel(self, pair[0]))
+
+    def handle_request(self, channel, words):
+        """Returns the response to a request, or None when the response will
+        be sent once the AI has taken its turn"""
+        command, args = words[0].upper(), words[1:]
+        try:
+            if command == 'NEW':
+                return self.new_game(channel, *[int(arg) for arg in args[:2]] + args[2:3])
+            elif command in ('MOVE', 'PASS', 'RESIGN'):
+                return self.move(channel, command, int(args[0]), args[1:])
+            elif command == 'METRICS':
+                return 'METRICS ' + instrument.to_json()
+            elif command == 'QUIT':
+                channel.close_when_done()
+                return None
+            return 'ERROR Unknown command %s' % command
+        except (ValueError, IndexError, TypeError) as e:
+            return 'ERROR %s' % (e or 'Bad request')
+
+    def new_game(self, channel, board_width=5, board_height=5, dictionary_name=None):
+        if not (0 < board_width <= MAX_BOARD_SIZE and 0 < board_height <= MAX_BOARD_SIZE):
+            raise ValueError("Boards may be at most %dx%d" % (MAX_BOARD_SIZE, MAX_BOARD_SIZE))
+        if dictionary_name is None:
+            dictionary = next(self.dictionaries.itervalues())
+        elif dictionary_name in self.dictionaries:
+            dictionary = self.dictionaries[dictionary_name]
+        else:
+            raise ValueError("No such dictionary %s" % dictionary_name)
+
+        server_game = ServerGame(next(self.game_ids), board_width, board_height, dictionary)
+        self.games[server_game.game_id] = server_game
+        channel.game_ids.add(server_game.game_id)
+        letters = ''.join(tile.letter for tile in server_game.game.tiles)
+        return 'GAME %d %d %d %s' % (server_game.game_id, board_width, board_height, letters)
+
+    def move(self, channel, command, game_id, coordinates):
+        server_game = self.games.get(game_id)
+        # other connections' games are not revealed, let alone played
+        if server_game is None or game_id not in channel.game_ids:
+            return 'ERROR No such game %d' % game_id
+        if server_game.busy:
+            return 'ERROR Wait for the AI to take its turn'
+
+        game = server_game.game
+        turn = WordsmushTurn(game)
+        if command == 'RESIGN':
+            turn.resign = True
+            game.play(server_game.client, turn)
+        elif command == 'MOVE':
+            turn = parse_tiles(game, coordinates)
+            if not game.is_playable(turn):
+                return "ERROR '%s' is not a playable word" % turn.word
+
+            game.play(server_game.client, turn)
+
+        if game.is_game_over():
+            del self.games[game_id]
+            channel.game_ids.discard(game_id)
+            return server_game.result()
+
+        server_game.busy = True
+        self.pool.apply_async(server_game.take_ai_turn,
+                              callback=lambda response: self.ai_turn_taken(
+                                  channel, server_game, response))
+        return None
+
+    def ai_turn_taken(self, channel, server_game, response):
+        """Called from the thread pool once the AI has taken its turn"""
+        if server_game.game.is_game_over():
+            self.games.pop(server_game.game_id, None)
+            channel.game_ids.discard(server_game.game_id)
+        self.waker.wake(channel, response)
+
+    def serve_forever(self, poll_seconds=0.5):
+        """Runs the event loop until shutdown is called"""
+        self.running = True
+        try:
+            while self.running:
+                asyncore.loop(timeout=poll_seconds, use_poll=True, count=1)
+        finally:
+            for channel in list(self.channels):
+                channel.close()
+            self.waker.close()
+            self.close()
+            self.pool.terminate()
+
+    def shutdown(self):
+        """Stops serve_forever, which may be running in another thread"""
+        self.running = False
+
+
+def server_entry_point():
+    p = argparse.ArgumentParser(description='Host Wordsmush games against the AI.')
+    p.add_argument('--host', default='127.0.0.1', help='Address to listen on.')
+    p.add_argument('--port', type=int, default=5959, help='Port to listen on.')
+    p.add_argument('--ai-threads', type=int, default=4,
+                   help='Number of threads taking AI turns.')
+    p.add_argument('--dictionary', action='append', dest='dictionaries',
+                   help="Name of a shipped dictionary or path of a word list games may use. "
+                        "Repeat for more, the first is the default (default 'scrabble_us').")
+    p.add_argument('--metrics', action='store_true',
+                   help='Record timings of the hot paths, reported by the METRICS command.')
+    args = p.parse_args()
+
+    if args.metrics:
+        instrument.enable()
+    # built before serving, so the first game with each does not wait for it
+    dictionaries = [word_list.get_dictionary(name).build()
+                    for name in args.dictionaries or [None]]
+    server = WordsmushServer(args.host, args.port, args.ai_threads, dictionaries)
+    print("Wordsmush server listening on %s:%d" % server.address)
+    server.serve_forever()
+
+
+def percentile(values, fraction):
+    """Returns the value at a fraction (e.g. 0.99) of a sorted list of values"""
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+class LoadClientConnection(object):
+    """One connection of the load client, playing games with its own AI on a
+    local copy of each board"""
+
+    def __init__(self, address, games, board_width, board_height):
+        self.address = address
+        self.games = games
+        self.board_width = board_width
+        self.board_height = board_height
+        self.move_seconds = []
+        self.games_played = 0
+        self.error = None
+
+    def request(self, line):
+        self.file.write(line + '\n')
+        self.file.flush()
+        response = self.file.readline().split()
+        if not response or response[0] == 'ERROR':
+            raise ValueError("%s: %s" % (line, ' '.join(response) or 'connection closed'))
+        return response
+
+    def play_game(self):
+        game_id, width, height, letters = self.request(
+            'NEW %d %d' % (self.board_width, self.board_height))[1:]
+        me, server = WordsmushAIPlayer(), WordsmushPlayer('server')
+        game = game_utils.get_board(letters, me, server, int(width), int(height))
+
+        while not game.is_game_over():
+            turn = me.take_turn(game)
+            if turn.resign:
+                self.request('RESIGN %s' % game_id)
+                break
+
+            started = time.time()
+            response = self.request('MOVE %s %s' % (game_id, format_tiles(turn.tiles)))
+            self.move_seconds.append(time.time() - started)
+
+            ai_move = response[5:]
+            if ai_move == ['RESIGN']:
+                ai_turn = WordsmushTurn(game)
+                ai_turn.resign = True
+                game.play(server, ai_turn)
+            elif ai_move:
+                game.play(server, parse_tiles(game, ai_move))
+
+    def run(self):
+        try:
+            sock = socket.create_connection(self.address)
+            self.file = sock.makefile('r+')
+            for _ in xrange(self.games):
+                self.play_game()
+                self.games_played += 1
+            self.file.write('QUIT\n')
+            self.file.close()
+            sock.close()
+        except (socket.error, ValueError) as e:
+            self.error = e
+
+
+def run_load(address, connections=8, games=10, board_width=5, board_height=5):
+    """Plays games against a server over concurrent connections and returns
+    {'games', 'seconds', 'games_per_second', 'move_latency': {'p50', ...}}
+    :param address: (host, port) of the server
+    :param connections: number of concurrent connections (optional)
+    :param games: number of games played over each connection (optional)
+    :param board_width: the width of the boards (optional, default is 5)
+    :param board_height: the height of the boards (optional, default is 5)"""
+    clients = [LoadClientConnection(address, games, board_width, board_height)
+               for _ in range(connections)]
+    threads = [threading.Thread(target=client.run) for client in clients]
+
+    started = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    seconds = time.time() - started
+
+    errors = [client.error for client in clients if client.error is not None]
+    if errors:
+        raise errors[0]
+
+    move_seconds = sorted(s for client in clients for s in client.move_seconds)
+    games_played = sum(client.games_played for client in clients)
+    return {
+        'games': games_played,
+        'moves': len(move_seconds),
+        'seconds': round(seconds, 3),
+        'games_per_second': round(games_played / seconds, 3),
+        'move_latency': {name: round(percentile(move_seconds, fraction), 6)
+                         for name, fraction in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99),
+                                                ('max', 1.0))} if move_seconds else {},
+    }
+
+
+def load_entry_point():
+    p = argparse.ArgumentParser(description='Generate load against a Wordsmush server.')
+    p.add_argument('--host', default='127.0.0.1', help='Address of the server.')
+    p.add_argument('--port', type=int, default=5959, help='Port of the server.')
+    p.add_argument('-c', '--connections', type=int, default=8,
+                   help='Number of concurrent connections.')
+    p.add_argument('-n', '--games', type=int, default=10,
+                   help='Number of games played over each connection.')
+    p.add_argument('--width', type=int, default=5, help='Board width.')
+    p.add_argument('--height', type=int, default=5, help='Board height.')
+    args = p.parse_args()
+
+    results = run_load((args.host, args.port), args.connections, args.games,
+                       args.width, args.height)
+    print(json.dumps(results, indent=2, sort_keys=True))
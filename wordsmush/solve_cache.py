@@ -0,0 +1,115 @@
+"""Cache of solved boards.
+
+The words playable on a board depend only on the multiset of its letters, so
+solutions are cached under the board's sorted letters and the version of the
+word list. Solutions are kept in an in-memory LRU and, optionally, in an
+sqlite database shared between processes and runs.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+from wordsmush import word_list
+
+# the solve cache of each Dictionary, and the settings they are made with
+_caches = {}
+_caches_lock = threading.Lock()
+_settings = {'size': 1024, 'path': None}
+
+
+class SolveCache(object):
+
+    def __init__(self, solve, version, size=1024, path=None):
+        """:param solve: function returning the words, longest first, that can
+        be spelled from an iterable of letters
+        :param version: version of the word list solve uses
+        :param size: number of solutions kept in memory (optional)
+        :param path: path of an sqlite database to keep solutions in
+        (optional, solutions are only kept in memory without it)"""
+        self.solve = solve
+        self.version = version
+        self.size = size
+        self.path = path
+        self.solutions = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @staticmethod
+    def key(letters):
+        """Returns the cache key for a board's letters"""
+        return ''.join(sorted(letters))
+
+    @property
+    def connection(self):
+        """The sqlite connection, opened on first use in each process and thread"""
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            import sqlite3
+            local.connection = sqlite3.connect(self.path, timeout=30)
+            local.connection.execute(
+                'CREATE TABLE IF NOT EXISTS solutions (version TEXT, letters TEXT, words TEXT, '
+                'PRIMARY KEY (version, letters))')
+            local.pid = os.getpid()
+        return local.connection
+
+    def _load(self, key):
+        row = self.connection.execute(
+            'SELECT words FROM solutions WHERE version = ? AND letters = ?',
+            (self.version, key)).fetchone()
+        return None if row is None else tuple(row[0].split())
+
+    def _store(self, key, words):
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO solutions VALUES (?, ?, ?)',
+                                    (self.version, key, ' '.join(words)))
+
+    def get(self, letters):
+        """Returns a list of the words, longest first, that can be spelled from
+        letters, solving them only if they are not cached
+        :param letters: iterable of letters available (e.g. the board letters)"""
+        key = self.key(letters)
+
+        with self._lock:
+            words = self.solutions.pop(key, None)
+        if words is None and self.path:
+            words = self._load(key)
+        if words is None:
+            words = tuple(self.solve(key))
+            if self.path:
+                self._store(key, words)
+
+        with self._lock:
+            self.solutions[key] = words
+            if len(self.solutions) > self.size:
+                self.solutions.popitem(last=False)
+
+        return list(words)
+
+
+def configure_solve_cache(size=1024, path=None):
+    """Configures the solve caches shared by the AI and wordsmush-solve,
+    replacing any made so far
+    :param size: number of solutions kept in memory for each dictionary (optional)
+    :param path: path of an sqlite database to keep solutions in (optional,
+    defaults to $WORDSMUSH_SOLVE_CACHE, solutions are only kept in memory
+    without either)"""
+    with _caches_lock:
+        _settings.update(size=size, path=path)
+        _caches.clear()
+
+
+def get_solve_cache(dictionary=None):
+    """Returns the solve cache shared by the AI and wordsmush-solve for a
+    dictionary. Solutions are kept under the dictionary's version, so all
+    dictionaries can share one database.
+    :param dictionary: the Dictionary solved with (optional, defaults to
+    word_list.get_dictionary())"""
+    dictionary = dictionary or word_list.get_dictionary()
+    with _caches_lock:
+        cache = _caches.get(dictionary)
+        if cache is None:
+            cache = _caches[dictionary] = SolveCache(
+                lambda letters: dictionary.letter_index.solve(letters), dictionary.version,
+                _settings['size'], _settings['path'] or os.environ.get('WORDSMUSH_SOLVE_CACHE'))
+        return cache
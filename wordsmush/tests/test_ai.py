@@ -1,7 +1,15 @@
+import os
+import shutil
+import tempfile
 import unittest
+from collections import Counter
 
 from wordsmush import game_utils
 from wordsmush.ai import WordsmushAIPlayer
+from wordsmush import word_list
+from wordsmush.game import WordsmushTurn, WordsmushTile
+from wordsmush.evaluator import WordsmushEvaluator
+from wordsmush.word_list.dictionary import Dictionary
 
 class TestAI(unittest.TestCase):
 
@@ -21,4 +29,125 @@ class TestAI(unittest.TestCase):
                  'stab', 'stand', 'spasm', 'stream', 'espresso']
 
         for word in words:
-            self.assertTrue(word in solved_game) 
+            self.assertTrue(word in solved_game)
+
+    def test_solve_board_matches_letter_counts(self):
+        game = game_utils.get_board('espro' 'lishm' 'tabdi' 'entsi' 'xfgmn')
+        board_letters = Counter(tile.letter for tile in game.tiles)
+
+        expected = set(word for word in word_list.words
+                       if all(count <= board_letters[letter]
+                              for letter, count in Counter(word).items()))
+
+        solved_game = self.ai.solve_board(game)
+        self.assertEqual(set(solved_game), expected)
+        self.assertEqual(len(solved_game), len(expected))
+
+        # longest words come first
+        lengths = [len(word) for word in solved_game]
+        self.assertEqual(lengths, sorted(lengths, reverse=True))
+
+    def test_solve_board_with_prefix(self):
+        game = game_utils.get_board('espro' 'lishm' 'tabdi' 'entsi' 'xfgmn')
+
+        all_words = self.ai.solve_board(game)
+        solved_game = self.ai.solve_board(game, prefix='stab')
+
+        self.assertEqual(sorted(solved_game),
+                         sorted(word for word in all_words if word.startswith('stab')))
+        self.assertTrue('stablemen' in solved_game)
+
+    def test_dictionaries(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            source_path = os.path.join(tmp_dir, 'small.words')
+            with open(source_path, 'w') as f:
+                f.write('cat\nact\ntact\nzzz\n')
+            small = Dictionary(source_path, table_path=os.path.join(tmp_dir, 'small.table'))
+
+            game = game_utils.get_board('catxx' 'xxxxx' 'xxxxx' 'xxxxx' 'xxxxx',
+                                        dictionary=small)
+            self.assertTrue(game.is_a_word('cat'))
+            self.assertFalse(game.is_a_word('tax'))
+            self.assertEqual(self.ai.solve_board(game), ['act', 'cat'])
+
+            # a player knowing fewer words than the game only plays those
+            game = game_utils.get_board('catxx' 'xxxxx' 'xxxxx' 'xxxxx' 'xxxxx')
+            self.assertEqual(WordsmushAIPlayer(small).solve_board(game), ['act', 'cat'])
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_best_turn_takes_opponent_tiles(self):
+        game = game_utils.get_board(
+            'catxx'
+            'xxxxx'
+            'xxxxx'
+            'xxxxx'
+            'xxact')
+        opponent = game.player2
+
+        # the opponent owns the top row 'cat', which is unprotected
+        turn = WordsmushTurn(game)
+        for x in range(3):
+            turn.add_tile(game.get_tile(x, 0))
+        game.play(opponent, turn)
+
+        evaluator = WordsmushEvaluator(['act', 'tax'])
+        best_turn = evaluator.best_turn(game, game.player1)
+
+        # act can be spelled entirely from the opponent's tiles, where tax
+        # would have to use an untaken x
+        self.assertEqual(best_turn.word, 'act')
+        self.assertTrue(all(tile.owner == opponent for tile in best_turn.tiles))
+
+        # turns considered but not played leave no tiles selected
+        evaluator.candidate_turns(game, game.player1, 2)
+        self.assertFalse(any(tile.selected for tile in game.tiles))
+
+    def test_tiles_by_value_large_board(self):
+        game = game_utils.get_random_board(5, board_width=60, board_height=40)
+        player, opponent = game.player1, game.player2
+        for tile in game.tiles[::3]:
+            tile.owner, tile.status = player, WordsmushTile.TAKEN
+        for tile in game.tiles[1::5]:
+            tile.owner, tile.status = opponent, WordsmushTile.TAKEN
+        game.calculate_protected()
+
+        tiles_by_value = WordsmushEvaluator([]).tiles_by_value(game, player)
+
+        def key(tile):
+            if tile.owner == opponent and tile.status != WordsmushTile.PROTECTED:
+                value = 2
+            else:
+                value = 1 if tile.owner is None else 0
+            support = sum(neighbour.owner == player for neighbour in game.neighbours(tile))
+            return -value, -support, tile.index
+
+        for letter, tiles in game.tiles_by_letter().items():
+            expected = sorted(tiles, key=key)
+            self.assertEqual([tile for value, tile in tiles_by_value[letter]], expected)
+            self.assertEqual([value for value, tile in tiles_by_value[letter]],
+                             [-key(tile)[0] for tile in expected])
+
+    def test_get_best_word_resigns_when_no_words_left(self):
+        game = game_utils.get_alpha_board()
+        self.ai.playable_words[game] = WordsmushEvaluator([])
+        self.assertTrue(self.ai.get_best_word(game).resign)
+
+    def test_evaluator_prune(self):
+        game = game_utils.get_board('plant' 'ingxx' 'catsx' 'xxxxx' 'xxxxx')
+        evaluator = WordsmushEvaluator(['planting', 'plant', 'plan', 'cats', 'cat', 'act', 'at'])
+
+        game.words_played.append('planting')
+        evaluator.prune(game)
+        self.assertEqual(evaluator.live_words(), ['cats', 'cat', 'act'])
+
+        game.words_played.append('cats')
+        evaluator.prune(game)
+        self.assertEqual(evaluator.live_words(), ['act'])
+        self.assertEqual(list(evaluator.ranked_words(game, game.player1)), ['act'])
+
+        # taking turns back restores the candidates
+        game.words_played.remove('cats')
+        evaluator.prune(game)
+        self.assertEqual(evaluator.live_words(), ['cats', 'cat', 'act'])
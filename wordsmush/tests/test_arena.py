@@ -0,0 +1,34 @@
+import unittest
+
+from wordsmush.ai import WordsmushAIPlayer
+from wordsmush.arena import HeadlessWordsmushGameDriver, play_game, run_tournament
+
+
+class TestArena(unittest.TestCase):
+
+    def test_headless_game(self):
+        player1, player2 = WordsmushAIPlayer(), WordsmushAIPlayer()
+        driver = HeadlessWordsmushGameDriver(player1, player2, seed=3)
+
+        self.assertTrue(driver.game.is_game_over())
+        self.assertEqual(len(driver.move_seconds[player1]) + len(driver.move_seconds[player2]),
+                         driver.turns)
+
+    def test_play_game(self):
+        specs = (('wordsmush.ai:WordsmushAIPlayer', {}), ('wordsmush.ai:WordsmushAIPlayer', {}))
+        result = play_game((1, 3, specs, 5, 5, 4))
+
+        self.assertEqual(result['game'], 1)
+        self.assertEqual(result['turns'], 4)
+        self.assertEqual([len(seconds) for seconds in result['move_seconds']], [2, 2])
+        self.assertEqual(result, dict(play_game((1, 3, specs, 5, 5, 4)),
+                                      move_seconds=result['move_seconds']))
+
+    def test_tournament_with_pooled_players(self):
+        # MCTS players would start pools of their own inside the tournament's workers
+        specs = (('wordsmush.mcts:WordsmushMCTSAIPlayer', {'iterations': 8, 'workers': 2}),
+                 ('wordsmush.ai:WordsmushAIPlayer', {}))
+        results = list(run_tournament(specs, 2, seed=3, workers=2, max_turns=2))
+
+        self.assertEqual(sorted(result['game'] for result in results), [0, 1])
+        self.assertEqual([result['turns'] for result in results], [2, 2])
@@ -0,0 +1,52 @@
+import os
+import re
+import sys
+import unittest
+import subprocess
+
+from wordsmush.benchmark import ENTRY_POINTS, find_regressions, scaling_curves
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_find_regressions(self):
+        baseline = {'solve_board[5x5]': 0.010, 'tiles_by_letter[5x5]': 0.001,
+                    'removed_metric': 1.0}
+        metrics = {'solve_board[5x5]': 0.014, 'tiles_by_letter[5x5]': 0.0012,
+                   'new_metric': 5.0}
+
+        self.assertEqual(find_regressions(metrics, baseline, 0.25),
+                         [('solve_board[5x5]', 0.010, 0.014)])
+        self.assertEqual(find_regressions(metrics, baseline, 0.5), [])
+        self.assertEqual(find_regressions(metrics, baseline, 0.1),
+                         [('solve_board[5x5]', 0.010, 0.014),
+                          ('tiles_by_letter[5x5]', 0.001, 0.0012)])
+
+    def test_scaling_curves(self):
+        metrics = {'render[10x10]': 0.001, 'render[20x20]': 0.004, 'render[40x40]': 0.016,
+                   'solve[10x10]': 0.002, 'solve[20x20]': 0.032,
+                   'ai_game[5x5]': 0.5, 'startup[wordsmush-cli]': 0.1}
+        curves = scaling_curves(metrics)
+
+        self.assertEqual(sorted(curves), ['render', 'solve'])
+        self.assertAlmostEqual(curves['render']['exponent'], 1.0)
+        self.assertAlmostEqual(curves['solve']['exponent'], 2.0)
+        self.assertAlmostEqual(curves['render']['per_tile']['40x40'], 0.016 / 1600)
+
+    def test_entry_points(self):
+        setup_py = os.path.join(os.path.dirname(__file__), '..', '..', 'setup.py')
+        with open(setup_py) as f:
+            entry_points = re.findall(r"'([\w-]+) = ([\w.]+:\w+)'", f.read())
+
+        self.assertEqual(sorted(entry_points), sorted(ENTRY_POINTS))
+
+    def test_cheap_imports(self):
+        # rendering a board needs neither the dictionary nor numpy
+        script = ('import sys\n'
+                  'from wordsmush import driver, cli, server, game_utils, word_list\n'
+                  'repr(game_utils.get_random_board(1))\n'
+                  'print([name for name in ("numpy", "pkg_resources", "sqlite3") '
+                  'if name in sys.modules] + [word_list.words._map])')
+        output = subprocess.check_output([sys.executable, '-c', script])
+
+        self.assertEqual(output.strip(), '[None]')
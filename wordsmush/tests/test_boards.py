@@ -0,0 +1,43 @@
+import random
+import unittest
+from collections import Counter
+
+from wordsmush import boards, word_list
+
+
+class TestBoards(unittest.TestCase):
+
+    def test_cumulative_weights(self):
+        self.assertEqual(boards.CUMULATIVE_WEIGHTS[:3], [8, 9, 12])
+        self.assertEqual(boards.TOTAL_WEIGHT,
+                         sum(weight for letter, weight in boards.LETTER_WEIGHTS))
+
+    def test_random_letters(self):
+        letters = boards.random_letters(10000, random.Random(1))
+        counts = Counter(letters)
+
+        self.assertEqual(len(letters), 10000)
+        self.assertTrue(counts['e'] > counts['t'] > counts['z'])
+        self.assertEqual(boards.random_letters(25, random.Random(2)),
+                         boards.random_letters(25, random.Random(2)))
+
+    def test_seeded_generation(self):
+        generator = boards.BoardGenerator(seed=5, board_width=4, board_height=3)
+        generated = generator.generate(10)
+
+        self.assertEqual(len(generated), 10)
+        self.assertTrue(all(len(letters) == 12 for letters in generated))
+        self.assertEqual(generated, boards.BoardGenerator(seed=5, board_width=4,
+                                                          board_height=3).generate(10))
+
+    def test_quality_filters(self):
+        generator = boards.BoardGenerator(seed=5, min_words=2000, min_vowels=8)
+        index = word_list.get_letter_index()
+
+        for letters in generator.generate(5):
+            self.assertTrue(sum(letters.count(vowel) for vowel in 'aeiou') >= 8)
+            self.assertTrue(len([word for word in index.solve(letters) if len(word) > 2]) >= 2000)
+
+    def test_impossible_filters(self):
+        generator = boards.BoardGenerator(seed=5, min_vowels=26)
+        self.assertRaises(ValueError, generator.generate, 1, max_draws=100)
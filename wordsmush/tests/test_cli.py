@@ -0,0 +1,67 @@
+import sys
+import json
+import unittest
+import subprocess
+from StringIO import StringIO
+
+from wordsmush.cli import solve_batch
+from wordsmush.word_list.query import WordQuery
+
+
+class TestSolveBatch(unittest.TestCase):
+
+    def test_solve_batch(self):
+        lines = ['catdog\n', '\n', 'x1\n', 'TAC\n', 'catdog\n']
+        output = StringIO()
+        solve_batch(lines, output, workers=2, window=2)
+
+        results = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([result['letters'] for result in results],
+                         ['catdog', 'x1', 'tac', 'catdog'])
+
+        self.assertEqual(results[0], results[3])
+        self.assertEqual(results[0]['words']['5'], ['octad'])
+        self.assertTrue('dog' in results[0]['words']['3'])
+        self.assertTrue('error' in results[1])
+        self.assertEqual(results[2]['words'], {'3': ['act', 'cat']})
+
+    def test_solve_batch_with_prefix(self):
+        output = StringIO()
+        solve_batch(['catdog\n'], output, prefix='do', workers=1)
+
+        self.assertEqual(json.loads(output.getvalue())['words'],
+                         {'4': ['doat'], '3': ['doc', 'dog', 'dot']})
+
+    def test_solve_batch_with_query(self):
+        output = StringIO()
+        solve_batch(['catdog\n'], output, workers=1,
+                    query=WordQuery(min_length=4, include='g', played=['goats']))
+
+        self.assertEqual(json.loads(output.getvalue())['words'], {'4': ['dago', 'goad', 'toga']})
+
+
+class TestSolveEntryPoint(unittest.TestCase):
+
+    def test_rejects_letters_outside_alphabet(self):
+        script = ('import sys; sys.argv = ["wordsmush-solve", "abc1"]\n'
+                  'from wordsmush.cli import solve_from_letters_entry_point\n'
+                  'solve_from_letters_entry_point()')
+        process = subprocess.Popen([sys.executable, '-c', script], stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE)
+        stdout, stderr = process.communicate()
+
+        self.assertEqual(process.returncode, 2)
+        self.assertTrue('only contain the letters a-z' in stderr)
+        self.assertFalse('Traceback' in stderr)
+
+    def test_reports_missing_batch_file(self):
+        script = ('import sys; sys.argv = ["wordsmush-solve", "--batch", "/missing/boards"]\n'
+                  'from wordsmush.cli import solve_from_letters_entry_point\n'
+                  'solve_from_letters_entry_point()')
+        process = subprocess.Popen([sys.executable, '-c', script], stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE)
+        stdout, stderr = process.communicate()
+
+        self.assertEqual(process.returncode, 2)
+        self.assertTrue('/missing/boards' in stderr)
+        self.assertFalse('Traceback' in stderr)
@@ -0,0 +1,87 @@
+import unittest
+from collections import Counter
+from itertools import combinations
+
+from wordsmush import game_utils
+from wordsmush.ai import WordsmushAIPlayer
+from wordsmush.game import WordsmushTile
+from wordsmush.evaluator import WordsmushEvaluator, WIN_SCORE
+from wordsmush.endgame import EndgameSolver, untaken_tiles
+
+
+class TestEndgameSolver(unittest.TestCase):
+
+    def setUp(self):
+        self.ai = WordsmushAIPlayer()
+        self.opponent = WordsmushAIPlayer()
+        self.game = game_utils.get_board(
+            'espro'
+            'lishm'
+            'tabdi'
+            'entsi'
+            'xfgmn', self.ai, self.opponent)
+
+        # the last tile is left untaken, the rest split between the players
+        for tile in self.game.tiles[:12]:
+            tile.owner, tile.status = self.ai, WordsmushTile.TAKEN
+        for tile in self.game.tiles[12:24]:
+            tile.owner, tile.status = self.opponent, WordsmushTile.TAKEN
+        self.game.calculate_protected()
+        self.evaluator = WordsmushEvaluator(self.ai.solve_board(self.game))
+
+    def test_untaken_tiles(self):
+        self.assertEqual(untaken_tiles(self.game), 1)
+
+    def test_proven_win(self):
+        snapshot = self.game.state.snapshot()
+        solver = EndgameSolver()
+        result = solver.solve(self.game, self.ai, self.evaluator)
+
+        self.assertTrue(result.proven)
+        self.assertTrue(result.value > WIN_SCORE)
+        self.assertEqual(result.depth, 1)
+        # the search leaves the game as it found it
+        self.assertEqual(self.game.state.snapshot(), snapshot)
+        self.assertEqual(len(self.game.words_played), 0)
+        self.assertEqual(solver.played, [])
+        self.assertFalse(any(tile.selected for tile in self.game.tiles))
+
+        self.game.play(self.ai, result.turn)
+        self.assertTrue(self.game.is_game_over())
+        self.assertTrue(self.game.scores[self.ai] > self.game.scores[self.opponent])
+
+    def test_moves_try_every_choice_of_tiles(self):
+        solver = EndgameSolver()
+        solver.solve(self.game, self.ai, self.evaluator)
+        me = self.game.player_index(self.ai)
+        valuable = solver.valuable_tiles(me)
+        letters = dict((index, letter) for letter, indexes in valuable.items()
+                       for index in indexes)
+
+        masks = [mask for mask, word in solver.moves(me)]
+        self.assertEqual(len(masks), len(set(masks)))
+        groups = Counter(tuple(sorted(Counter(letter for index, letter in letters.items()
+                                              if mask >> index & 1).items()))
+                         for mask in masks)
+        for group, choices in groups.items():
+            expected = 1
+            for letter, count in group:
+                expected *= len(list(combinations(valuable[letter], count)))
+            self.assertEqual(choices, expected)
+        # some letter has more than two tiles worth taking to choose between
+        self.assertTrue(max(choices for choices in groups.values()) > 2)
+
+    def test_node_budget(self):
+        result = EndgameSolver(max_nodes=1).solve(self.game, self.ai, self.evaluator)
+        self.assertEqual(result, None)
+
+    def test_take_turn(self):
+        turn = self.ai.take_turn(self.game)
+        self.assertTrue(self.ai.last_endgame.proven)
+        self.assertEqual(turn, self.ai.last_endgame.turn)
+        self.assertTrue(self.game.is_game_over())
+
+    def test_take_turn_without_endgame(self):
+        self.ai.endgame_tiles = 0
+        self.ai.take_turn(self.game)
+        self.assertEqual(self.ai.last_endgame, None)
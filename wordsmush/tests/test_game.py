@@ -1,9 +1,12 @@
 import unittest
 from itertools import cycle
+from random import Random
 
 from mock import Mock
 
-from wordsmush.game import WordsmushTile, WordsmushTurn
+from wordsmush.game import (WordsmushGame, WordsmushTile, WordsmushTurn, WordsmushPlayedWords,
+                            get_styles)
+from wordsmush.player import WordsmushPlayer
 from wordsmush import game_utils
 
 
@@ -84,6 +87,136 @@ class TestWordsmushGame(unittest.TestCase):
         self.assertTrue(protected_tile2.owner == self.game.player1)
 
 
+    def test_calculate_protected_random_boards(self):
+        rng = Random(42)
+        for width, height in [(5, 5), (1, 4), (7, 3), (3, 7)] * 20:
+            game = WordsmushGame(WordsmushPlayer(), WordsmushPlayer(),
+                                 board_width=width, board_height=height)
+            for tile in game.tiles:
+                tile.owner = rng.choice([None, game.player1, game.player2])
+                tile.status = WordsmushTile.UNTAKEN if tile.owner is None else WordsmushTile.TAKEN
+
+            game.calculate_protected()
+
+            for tile in game.tiles:
+                neighbours = [tile.tile_above(), tile.tile_below(), tile.tile_left(), tile.tile_right()]
+                surrounded = all(neighbour.owner == tile.owner
+                                 for neighbour in neighbours if neighbour is not None)
+                if tile.owner is None:
+                    self.assertEqual(tile.status, WordsmushTile.UNTAKEN)
+                elif surrounded:
+                    self.assertEqual(tile.status, WordsmushTile.PROTECTED)
+                else:
+                    self.assertEqual(tile.status, WordsmushTile.TAKEN)
+
+    def test_calculate_protected_incremental(self):
+        rng = Random(7)
+        for width, height in [(5, 5), (7, 3), (3, 7)] * 10:
+            game = WordsmushGame(WordsmushPlayer(), WordsmushPlayer(),
+                                 board_width=width, board_height=height)
+            tiles = list(game.tiles)
+
+            for _ in range(20):
+                played = rng.sample(tiles, rng.randint(1, 6))
+                player = rng.choice([game.player1, game.player2])
+                for tile in played:
+                    if tile.status != WordsmushTile.PROTECTED:
+                        tile.status = WordsmushTile.TAKEN
+                        tile.owner = player
+
+                before = [tile.status for tile in tiles]
+                changed = game.calculate_protected(played)
+                after = [tile.status for tile in tiles]
+
+                self.assertEqual(set(changed), set(tile for tile, old, new in
+                                                   zip(tiles, before, after) if old != new))
+                self.assertEqual(game.calculate_protected(), [])
+
+    def test_large_board(self):
+        rng = Random(3)
+        game = game_utils.get_random_board(3, board_width=100, board_height=60)
+        self.assertEqual(len(game.tiles), 6000)
+        self.assertEqual(game.get_tile(99, 59).index, 5999)
+        self.assertEqual(game.get_tile(99, 59).status, WordsmushTile.UNTAKEN)
+
+        for tile in rng.sample(game.tiles, 4000):
+            tile.owner = rng.choice([game.player1, game.player2])
+            tile.status = WordsmushTile.TAKEN
+        game.calculate_protected()
+
+        for tile in rng.sample(game.tiles, 500):
+            surrounded = all(neighbour.owner == tile.owner for neighbour in game.neighbours(tile))
+            if tile.owner is None:
+                self.assertEqual(tile.status, WordsmushTile.UNTAKEN)
+            elif surrounded:
+                self.assertEqual(tile.status, WordsmushTile.PROTECTED)
+            else:
+                self.assertEqual(tile.status, WordsmushTile.TAKEN)
+
+        # the board renders as its tiles do, row by row
+        reset = get_styles()['reset']
+        rows = repr(game).split('\n')
+        self.assertEqual(len(rows), 61)
+        for y in rng.sample(range(60), 10):
+            self.assertEqual(rows[y], ''.join(repr(tile) for tile in game.board[y]) + reset)
+
+    def test_get_board_letters(self):
+        game = game_utils.get_board('abcdef', board_width=3, board_height=2)
+        self.assertEqual([tile.letter for tile in game.board[1]], ['d', 'e', 'f'])
+        self.assertRaises(ValueError, game_utils.get_board, 'abcde', board_width=3,
+                          board_height=2)
+
+    def test_unplay(self):
+        def game_state():
+            return ([(tile.status, tile.owner) for tile in self.game.tiles],
+                    sorted(self.game.words_played), dict(self.game.scores),
+                    self.game.resigned)
+
+        plays = [(self.game.player1, [(2,0), (0,0), (4,3)]),            # cat
+                 (self.game.player2, [(1,0), (0,0), (4,3)]),            # bat
+                 (self.game.player1, [(0,1), (0,0), (1,0), (2,3), (3,1), (2,0)]),  # fabric
+                 (self.game.player2, [(2,0), (0,0), (1,0)])]            # cab
+
+        states, records = [], []
+        for player, coords in plays:
+            turn = WordsmushTurn(self.game)
+            for x, y in coords:
+                turn.add_tile(self.game.get_tile(x, y))
+
+            states.append(game_state())
+            records.append(self.game.play_undoable(player, turn))
+
+        resign = WordsmushTurn(self.game)
+        resign.resign = True
+        states.append(game_state())
+        records.append(self.game.play_undoable(self.game.player1, resign))
+        self.assertTrue(self.game.is_game_over())
+
+        for state, record in reversed(zip(states, records)):
+            self.game.unplay(record)
+            self.assertEqual(game_state(), state)
+
+    def test_potential_score(self):
+        word_cat = WordsmushTurn(self.game)
+        word_cat.add_tile(self.game.get_tile(2,0))
+        word_cat.add_tile(self.game.get_tile(0,0))
+        word_cat.add_tile(self.game.get_tile(4,3))
+
+        self.assertEqual(self.game.potential_score(self.game.player1, word_cat),
+                         {self.game.player1: 3, self.game.player2: 0})
+        self.assertEqual(self.game.get_points(self.game.player1), 0)
+
+        self.game.play(self.game.player1, word_cat)
+
+        word_bat = WordsmushTurn(self.game)
+        word_bat.add_tile(self.game.get_tile(1,0))
+        word_bat.add_tile(self.game.get_tile(0,0))
+        word_bat.add_tile(self.game.get_tile(4,3))
+
+        self.assertEqual(self.game.potential_score(self.game.player2, word_bat),
+                         {self.game.player1: 1, self.game.player2: 3})
+        self.assertEqual(self.game.scores, {self.game.player1: 3, self.game.player2: 0})
+
     def test_is_a_word(self):
         # Tested by is_playable method
         pass
@@ -158,6 +291,29 @@ class TestWordsmushGame(unittest.TestCase):
         self.assertTrue(self.game.get_points(self.game.player2) == 3)
 
 
+class TestWordsmushPlayedWords(unittest.TestCase):
+
+    def test_played_words(self):
+        words = WordsmushPlayedWords(['planting', 'cat', 'dog'])
+        words.append('bat')
+
+        self.assertEqual(list(words), ['planting', 'cat', 'dog', 'bat'])
+        self.assertEqual(len(words), 4)
+        self.assertTrue('cat' in words)
+        self.assertFalse('plan' in words)
+
+        for prefix in ['plan', 'planting', 'ca', 'b', '']:
+            self.assertTrue(words.has_prefix(prefix))
+        for prefix in ['plants', 'cats', 'x', 'ac']:
+            self.assertFalse(words.has_prefix(prefix))
+
+        words.remove('bat')
+        words.remove('cat')
+        self.assertEqual(list(words), ['planting', 'dog'])
+        self.assertFalse(words.has_prefix('ca'))
+        self.assertFalse(words.has_prefix('b'))
+
+
 class TestWordsmushTile(unittest.TestCase):
 
     def setUp(self):
@@ -204,6 +360,30 @@ class TestWordsmushTile(unittest.TestCase):
         self.assertEqual(y_tile.tile_left(), self.game.get_tile(3,4))
 
 
+    def test_neighbours(self):
+        a_tile = self.game.get_tile(0,0)  # a
+        self.assertEqual(set(self.game.neighbours(a_tile)),
+                         set([self.game.get_tile(1,0), self.game.get_tile(0,1)]))
+
+        g_tile = self.game.get_tile(1,1)  # g
+        self.assertEqual(set(self.game.neighbours(g_tile)),
+                         set([g_tile.tile_above(), g_tile.tile_below(),
+                              g_tile.tile_left(), g_tile.tile_right()]))
+
+    def test_slots(self):
+        a_tile = self.game.get_tile(0,0)
+        self.assertFalse(hasattr(a_tile, '__dict__'))
+
+    def test_styles(self):
+        from colorama import Fore, Back, Style
+
+        self.assertEqual(WordsmushTile.UNTAKEN_STYLE, Fore.BLACK + Back.WHITE + Style.NORMAL)
+        self.assertEqual(WordsmushTile.SELECTED_STYLE, Fore.BLACK + Back.BLACK + Style.DIM)
+        a_tile = self.game.get_tile(0,0)
+        self.assertEqual(a_tile.PLAYER2_PROTECTED_STYLE, Fore.RED + Back.RED + Style.BRIGHT)
+        self.assertTrue(repr(a_tile).startswith(a_tile.UNTAKEN_STYLE))
+
+
 class TestWordsmushTurn(unittest.TestCase):
 
     def setUp(self):
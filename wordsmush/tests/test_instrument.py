@@ -0,0 +1,52 @@
+import json
+import unittest
+
+from wordsmush import instrument, game_utils
+from wordsmush.ai import WordsmushAIPlayer
+from wordsmush.game import WordsmushGame
+
+
+class TestInstrument(unittest.TestCase):
+
+    def setUp(self):
+        instrument.reset()
+
+    def tearDown(self):
+        instrument.disable()
+        instrument.reset()
+
+    def play_turns(self, turns):
+        player1, player2 = WordsmushAIPlayer(), WordsmushAIPlayer()
+        game = game_utils.get_random_board(5, player1, player2)
+        for turn_number in range(turns):
+            (player1, player2)[turn_number % 2].take_turn(game)
+        return game
+
+    def test_disabled(self):
+        play = vars(WordsmushGame)['play']
+        instrument.enable()
+        instrument.disable()
+
+        self.assertFalse(instrument.is_enabled())
+        self.assertIs(vars(WordsmushGame)['play'], play)
+        self.play_turns(2)
+        self.assertEqual(instrument.get_metrics(), {})
+
+    def test_enabled(self):
+        instrument.enable()
+        instrument.enable()  # enabling twice wraps once
+        self.play_turns(4)
+
+        metrics = instrument.get_metrics()
+        # the AI's look-ahead plays are counted too
+        self.assertTrue(metrics['game_play']['count'] > 4)
+        self.assertEqual(metrics['game_play']['max_size'], 4)
+        self.assertEqual(metrics['ai_solve_board']['count'], 2)
+        self.assertEqual(metrics['ai_get_best_word']['count'], 4)
+        self.assertTrue(metrics['ai_get_best_word']['max_size'] > 0)
+        self.assertEqual(len(metrics['game_play']['slowest']), instrument.SLOWEST_SIZE)
+        self.assertEqual(json.loads(instrument.to_json())['ai_get_best_word']['count'], 4)
+
+        text = instrument.to_prometheus()
+        self.assertIn('wordsmush_ai_get_best_word_seconds_count 4\n', text)
+        self.assertIn('wordsmush_game_play_size_max 4\n', text)
@@ -0,0 +1,53 @@
+import unittest
+
+from wordsmush import game_utils
+from wordsmush.game import WordsmushTurn
+from wordsmush.evaluator import WordsmushEvaluator
+from wordsmush.mcts import WordsmushMCTSAIPlayer, snapshot_game, restore_game
+
+
+class TestWordsmushMCTSAIPlayer(unittest.TestCase):
+
+    def setUp(self):
+        self.ai = WordsmushMCTSAIPlayer(iterations=40, move_time=5, workers=1, seed=1)
+        self.game = game_utils.get_board(
+            'espro'
+            'lishm'
+            'tabdi'
+            'entsi'
+            'xfgmn', self.ai)
+
+    def test_snapshot_and_restore(self):
+        turn = WordsmushTurn(self.game)
+        for x, y in [(2, 1), (0, 2), (1, 2), (2, 2)]:  # stab
+            turn.add_tile(self.game.get_tile(x, y))
+        self.game.play(self.game.player1, turn)
+
+        game, player_index = restore_game(snapshot_game(self.game, self.game.player2))
+
+        self.assertEqual(player_index, 1)
+        self.assertEqual([tile.letter for tile in game.tiles],
+                         [tile.letter for tile in self.game.tiles])
+        self.assertEqual(game.state.snapshot(), self.game.state.snapshot())
+        self.assertEqual(list(game.words_played), ['stab'])
+
+    def test_get_best_word(self):
+        self.ai.playable_words[self.game] = WordsmushEvaluator(self.ai.solve_board(self.game))
+        turn = self.ai.get_best_word(self.game)
+
+        self.assertTrue(self.game.is_playable(turn))
+        self.assertEqual(self.ai.last_stats['playouts'], 40)
+        self.assertTrue(self.ai.last_stats['playouts_per_second'] > 0)
+        # choosing a turn selects no tiles on the board
+        self.assertFalse(any(tile.selected for tile in self.game.tiles))
+
+    def test_get_best_word_in_worker_pool(self):
+        self.ai.workers = 2
+        self.ai.playable_words[self.game] = WordsmushEvaluator(self.ai.solve_board(self.game))
+        try:
+            turn = self.ai.get_best_word(self.game)
+        finally:
+            self.ai.close()
+
+        self.assertTrue(self.game.is_playable(turn))
+        self.assertEqual(self.ai.last_stats['playouts'], 40)
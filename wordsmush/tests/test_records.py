@@ -0,0 +1,66 @@
+import unittest
+
+from wordsmush.ai import WordsmushAIPlayer
+from wordsmush.arena import HeadlessWordsmushGameDriver
+from wordsmush.records import (GameRecord, InvalidRecord, PASS, RESIGN, encode_record,
+                               decode_record, index_width, replay, verify_records)
+
+
+class TestRecords(unittest.TestCase):
+
+    def setUp(self):
+        driver = HeadlessWordsmushGameDriver(WordsmushAIPlayer(), WordsmushAIPlayer(),
+                                             seed=3, max_turns=200)
+        self.game = driver.game
+        self.record = driver.recorder.record()
+
+    def test_index_width(self):
+        self.assertEqual(index_width(25), 1)
+        self.assertEqual(index_width(64), 1)
+        self.assertEqual(index_width(65), 2)
+        self.assertEqual(index_width(100 * 100), 3)
+
+    def test_encode_decode(self):
+        self.assertEqual(decode_record(encode_record(self.record)), self.record)
+
+        record = GameRecord(100, 100, None, 'a' * 10000, (0, 1),
+                            ((9999, 0, 4096), PASS, RESIGN))
+        line = encode_record(record)
+        self.assertEqual(line.split()[-1], '2SF000100.-.!')
+        self.assertEqual(decode_record(line), record)
+        self.assertEqual(decode_record('5 5 - %s 0 0' % ('a' * 25)).turns, ())
+
+    def test_decode_malformed(self):
+        for line in ['', '5 5 1 abc 0', '5 x 1 abc 0 0', '5 5 1 abc 0 0 a..b', '5 5 1 abc 0 0 a*']:
+            self.assertRaises(InvalidRecord, decode_record, line)
+
+    def test_replay(self):
+        game = replay(self.record)
+        self.assertEqual(game.words_played.words, self.game.words_played.words)
+        self.assertEqual(game.state.snapshot(), self.game.state.snapshot())
+
+    def test_replay_invalid(self):
+        turns = self.record.turns
+        invalid = [
+            self.record._replace(letters=self.record.letters[::-1]),
+            self.record._replace(scores=self.record.scores[::-1]),
+            self.record._replace(turns=turns[:1] + turns[:1]),
+            self.record._replace(turns=((0, 1, 99),)),
+            self.record._replace(turns=(RESIGN, PASS)),
+        ]
+        for record in invalid:
+            self.assertRaises(InvalidRecord, replay, record)
+
+    def test_pass_and_resign(self):
+        record = self.record._replace(seed=None, scores=(0, 0), turns=(PASS, RESIGN))
+        game = replay(record)
+        self.assertEqual(game.resigned, game.player2)
+
+    def test_verify_records(self):
+        good = encode_record(self.record)
+        bad = encode_record(self.record._replace(scores=(0, 0)))
+        lines = [good, '', bad, good]
+        for workers in (0, 2):
+            results = list(verify_records(lines, workers, chunk_size=1))
+            self.assertEqual([number for number, error in results], [1, 3, 4])
+            self.assertEqual([error is None for number, error in results], [True, False, True])
@@ -0,0 +1,54 @@
+import time
+import unittest
+
+from wordsmush import game_utils
+from wordsmush.game import WordsmushTurn
+from wordsmush.evaluator import WordsmushEvaluator
+from wordsmush.search import WordsmushSearchAIPlayer, ZobristHasher
+
+
+class TestZobristHasher(unittest.TestCase):
+
+    def test_update_matches_full_hash(self):
+        game = game_utils.get_alpha_board()
+        hasher = ZobristHasher(game.state.size)
+        key = hasher.hash_game(game, game.player1)
+
+        plays = [(game.player1, game.player2, [(2,0), (0,0), (4,3)]),     # cat
+                 (game.player2, game.player1, [(1,0), (0,0), (4,3)])]     # bat
+        for player, opponent, coords in plays:
+            turn = WordsmushTurn(game)
+            for x, y in coords:
+                turn.add_tile(game.get_tile(x, y))
+
+            before = hasher.categories(game.state)
+            game.play(player, turn)
+            key = hasher.update(key, before, hasher.categories(game.state), turn.word)
+
+            self.assertEqual(key, hasher.hash_game(game, opponent))
+            self.assertNotEqual(key, hasher.hash_game(game, player))
+
+
+class TestWordsmushSearchAIPlayer(unittest.TestCase):
+
+    def test_take_turn_within_budget(self):
+        ai = WordsmushSearchAIPlayer(move_time=0.3)
+        opponent = WordsmushSearchAIPlayer(move_time=0.3)
+        game = game_utils.get_board(
+            'espro'
+            'lishm'
+            'tabdi'
+            'entsi'
+            'xfgmn', ai, opponent)
+
+        for player in [ai, opponent]:
+            player.playable_words[game] = WordsmushEvaluator(player.solve_board(game))
+
+        for player in [ai, opponent, ai]:
+            started = time.time()
+            turn = player.take_turn(game)
+            self.assertTrue(time.time() - started < 1.0)
+            self.assertTrue(turn.word in game.words_played)
+
+        self.assertEqual(sum(game.scores.values()),
+                         sum(1 for tile in game.tiles if tile.owner is not None))
@@ -0,0 +1,108 @@
+import time
+import socket
+import unittest
+import threading
+
+from mock import Mock
+
+from wordsmush.server import WordsmushServer, run_load
+
+
+class TestServer(unittest.TestCase):
+
+    def setUp(self):
+        self.server = WordsmushServer(port=0, ai_threads=2)
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,))
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join()
+
+    def request(self, f, line):
+        f.write(line + '\n')
+        f.flush()
+        return f.readline().split()
+
+    def test_protocol(self):
+        sock = socket.create_connection(self.server.address)
+        f = sock.makefile('r+')
+
+        response = self.request(f, 'NEW 4 3')
+        self.assertEqual(response[0], 'GAME')
+        self.assertEqual(response[2:4], ['4', '3'])
+        self.assertEqual(len(response[4]), 12)
+
+        self.assertEqual(self.request(f, 'MOVE 999 1,1')[0], 'ERROR')
+        self.assertEqual(self.request(f, 'MOVE %s 9,9' % response[1])[0], 'ERROR')
+        self.assertEqual(self.request(f, 'MOVE %s 1,1 2,1 1,1' % response[1])[0], 'ERROR')
+        # rejected moves, here too short to be words, leave no tiles selected
+        self.assertEqual(self.request(f, 'MOVE %s 1,1 2,1' % response[1])[0], 'ERROR')
+        game = self.server.games[int(response[1])].game
+        self.assertFalse(any(tile.selected for tile in game.tiles))
+        self.assertEqual(self.request(f, 'HELLO')[0], 'ERROR')
+        self.assertEqual(self.request(f, 'NEW 5 5 nosuch')[0], 'ERROR')
+        self.assertEqual(self.request(f, 'NEW 5 5 scrabble_us')[0], 'GAME')
+
+        # passing hands the turn to the server's AI
+        played = self.request(f, 'PASS %s' % response[1])
+        self.assertEqual(played[0], 'PLAYED')
+        self.assertEqual(played[4], 'AI')
+
+        resigned = self.request(f, 'RESIGN %s' % response[1])
+        self.assertEqual(resigned[0], 'PLAYED')
+        self.assertEqual(resigned[3], 'over')
+        self.assertEqual(self.request(f, 'PASS %s' % response[1])[0], 'ERROR')
+        f.close()
+        sock.close()
+
+    def wait_for(self, condition, seconds=5):
+        deadline = time.time() + seconds
+        while not condition() and time.time() < deadline:
+            time.sleep(0.01)
+        return condition()
+
+    def test_ai_error(self):
+        sock = socket.create_connection(self.server.address)
+        f = sock.makefile('r+')
+
+        game_id = self.request(f, 'NEW')[1]
+        self.server.games[int(game_id)].ai.take_turn = Mock(side_effect=RuntimeError('boom'))
+        response = self.request(f, 'PASS %s' % game_id)
+        self.assertEqual(response[0], 'ERROR')
+        self.assertEqual(response[-1], 'boom')
+
+        # the game carries on
+        self.assertEqual(self.request(f, 'RESIGN %s' % game_id)[0], 'PLAYED')
+        f.close()
+        sock.close()
+
+    def test_games_belong_to_connections(self):
+        sock1 = socket.create_connection(self.server.address)
+        f1 = sock1.makefile('r+')
+        sock2 = socket.create_connection(self.server.address)
+        f2 = sock2.makefile('r+')
+
+        game_id = self.request(f1, 'NEW')[1]
+        self.assertEqual(self.request(f2, 'PASS %s' % game_id)[0], 'ERROR')
+        self.assertEqual(self.request(f2, 'RESIGN %s' % game_id)[0], 'ERROR')
+        self.assertEqual(list(self.server.games), [int(game_id)])
+
+        # closing a connection drops its unfinished games
+        self.request(f2, 'NEW')
+        f2.close()
+        sock2.close()
+        self.assertTrue(self.wait_for(lambda: list(self.server.games) == [int(game_id)]))
+        f1.write('QUIT\n')
+        f1.flush()
+        self.assertTrue(self.wait_for(lambda: self.server.games == {}))
+        f1.close()
+        sock1.close()
+
+    def test_run_load(self):
+        results = run_load(self.server.address, connections=2, games=1)
+
+        self.assertEqual(results['games'], 2)
+        self.assertEqual(results['moves'] > 0, True)
+        self.assertEqual(sorted(results['move_latency']), ['max', 'p50', 'p90', 'p99'])
+        self.assertEqual(self.server.games, {})
@@ -0,0 +1,49 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from wordsmush.solve_cache import SolveCache
+
+
+class TestSolveCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'solutions.sqlite')
+        self.solved = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def solve(self, letters):
+        self.solved.append(letters)
+        return ['tac', 'cat', 'act'] if letters == 'act' else []
+
+    def test_memory_cache(self):
+        cache = SolveCache(self.solve, 'v1', size=2)
+
+        self.assertEqual(cache.get('cat'), ['tac', 'cat', 'act'])
+        self.assertEqual(cache.get('tca'), ['tac', 'cat', 'act'])
+        self.assertEqual(self.solved, ['act'])
+
+        # least recently used solutions are evicted
+        cache.get('xyz')
+        cache.get('act')
+        cache.get('dog')
+        cache.get('act')
+        cache.get('xyz')
+        self.assertEqual(self.solved, ['act', 'xyz', 'dgo', 'xyz'])
+
+    def test_disk_cache(self):
+        SolveCache(self.solve, 'v1', path=self.path).get('cat')
+        SolveCache(self.solve, 'v1', path=self.path).get('xyz')
+
+        cache = SolveCache(self.solve, 'v1', path=self.path)
+        self.assertEqual(cache.get('tca'), ['tac', 'cat', 'act'])
+        self.assertEqual(cache.get('zyx'), [])
+        self.assertEqual(self.solved, ['act', 'xyz'])
+
+        # solutions for another version of the word list are not used
+        SolveCache(self.solve, 'v2', path=self.path).get('cat')
+        self.assertEqual(self.solved, ['act', 'xyz', 'act'])
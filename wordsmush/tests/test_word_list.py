@@ -0,0 +1,249 @@
+import os
+import shutil
+import tempfile
+import unittest
+from itertools import product
+
+from wordsmush import word_list
+from wordsmush.word_list.compiled import CompiledWordList
+from wordsmush.word_list.dictionary import Dictionary
+from wordsmush.word_list.letter_counts import LetterCountIndex, count_letters
+from wordsmush.word_list.query import WordQuery
+from wordsmush.word_list.trie import WordTrie
+
+
+class TestCompiledWordList(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.source_path = os.path.join(self.tmp_dir, 'test.words')
+        self.table_path = os.path.join(self.tmp_dir, 'cache', 'test.words.table')
+        self.write_source(['PLANT', 'CAT', 'plan', 'Bat', 'cat', '<br>'])
+
+        self.words = CompiledWordList(self.source_path, self.table_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write_source(self, words):
+        with open(self.source_path, 'w') as f:
+            f.write('\n'.join(words) + '\n')
+
+    def test_lazy_load(self):
+        self.assertFalse(os.path.exists(self.table_path))
+        self.assertTrue('plant' in self.words)
+        self.assertTrue(os.path.exists(self.table_path))
+
+    def test_contains(self):
+        for word in ['bat', 'cat', 'plan', 'plant']:
+            self.assertTrue(word in self.words)
+
+        for word in ['', 'a', 'pla', 'plants', 'zzz', '<br>']:
+            self.assertFalse(word in self.words)
+
+    def test_sorted_sequence(self):
+        self.assertEqual(len(self.words), 4)
+        self.assertEqual(list(self.words), ['bat', 'cat', 'plan', 'plant'])
+        self.assertEqual(self.words[0], 'bat')
+        self.assertEqual(self.words[-1], 'plant')
+        self.assertRaises(IndexError, lambda: self.words[4])
+
+    def test_lookups_across_blocks(self):
+        words = sorted(set(''.join(letters) for letters in
+                           list(product('abcde', 'fghij', 'klm')) + list(product('xyz', 'op'))))
+        self.write_source(words[::2])
+        table = CompiledWordList(self.source_path, self.table_path)
+
+        for position, word in enumerate(words):
+            self.assertEqual(word in table, position % 2 == 0)
+            self.assertEqual(table.index(word), (position + 1) // 2)
+            # remembered answers agree
+            self.assertEqual(word in table, position % 2 == 0)
+        self.assertEqual(table.index(''), 0)
+        self.assertEqual(table.index('zzz'), len(table))
+
+    def test_stale_table_is_rebuilt(self):
+        self.words.load()
+        self.write_source(['dog'])
+        stale_time = os.path.getmtime(self.table_path) - 10
+        os.utime(self.table_path, (stale_time, stale_time))
+
+        words = CompiledWordList(self.source_path, self.table_path)
+        self.assertEqual(list(words), ['dog'])
+
+
+class TestDictionary(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.source_path = os.path.join(self.tmp_dir, 'test.words')
+        self.table_path = os.path.join(self.tmp_dir, 'cache', 'test.words.table')
+        self.write_source(['plant', 'cat', 'plan', 'bat', 'tab', 'act'])
+
+        self.dictionary = Dictionary(self.source_path, table_path=self.table_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write_source(self, words):
+        with open(self.source_path, 'w') as f:
+            f.write('\n'.join(words) + '\n')
+
+    def index_files(self):
+        return sorted(name for name in os.listdir(os.path.dirname(self.table_path))
+                      if name.endswith('.npy'))
+
+    def test_indexes(self):
+        self.assertEqual(self.dictionary.name, 'test')
+        self.assertTrue('plan' in self.dictionary)
+        self.assertTrue(self.dictionary.trie.has_prefix('pla'))
+        self.assertEqual(self.dictionary.letter_index.solve('tacbnlp'),
+                         ['plant', 'plan', 'act', 'bat', 'cat', 'tab'])
+        self.assertEqual(self.dictionary.letter_index.solve('xyz'), [])
+
+    def test_build_caches_letter_index(self):
+        self.dictionary.build()
+        self.assertEqual(len(self.index_files()), 2)
+
+        dictionary = Dictionary(self.source_path, table_path=self.table_path)
+        self.assertEqual(dictionary.letter_index.solve('tca'), ['act', 'cat'])
+
+    def test_build_rebuilds_stale_indexes(self):
+        self.dictionary.build()
+        version, index_files = self.dictionary.version, self.index_files()
+
+        # a new word list with an older modification time is only caught by its checksum
+        table_time = os.path.getmtime(self.table_path)
+        self.write_source(['dog', 'god'])
+        os.utime(self.source_path, (table_time - 10, table_time - 10))
+
+        self.dictionary.build()
+        self.assertNotEqual(self.dictionary.version, version)
+        self.assertEqual(self.dictionary.letter_index.solve('odg'), ['dog', 'god'])
+        self.assertEqual(len(self.index_files()), 2)
+        self.assertFalse(set(index_files) & set(self.index_files()))
+
+    def test_get_dictionary_is_shared(self):
+        dictionary = word_list.get_dictionary(self.source_path)
+        self.assertIs(word_list.get_dictionary(self.source_path), dictionary)
+        self.assertIs(word_list.get_dictionary(), word_list.default_dictionary)
+        self.assertIs(word_list.get_dictionary(word_list.default_dictionary.source_path),
+                      word_list.default_dictionary)
+
+
+    def test_same_named_word_lists(self):
+        cache_dir = os.environ.get('WORDSMUSH_CACHE_DIR')
+        os.environ['WORDSMUSH_CACHE_DIR'] = os.path.join(self.tmp_dir, 'shared')
+        try:
+            dictionaries = []
+            for directory, words in [('a', ['cat', 'act']), ('b', ['dog', 'god'])]:
+                os.mkdir(os.path.join(self.tmp_dir, directory))
+                source_path = os.path.join(self.tmp_dir, directory, 'words.txt')
+                with open(source_path, 'w') as f:
+                    f.write('\n'.join(words) + '\n')
+                dictionaries.append(Dictionary(source_path).build())
+        finally:
+            if cache_dir is None:
+                del os.environ['WORDSMUSH_CACHE_DIR']
+            else:
+                os.environ['WORDSMUSH_CACHE_DIR'] = cache_dir
+
+        a, b = dictionaries
+        self.assertNotEqual(a.words.table_path, b.words.table_path)
+        self.assertNotEqual(a.version, b.version)
+        self.assertTrue('cat' in a and 'dog' not in a)
+        self.assertTrue('dog' in b and 'cat' not in b)
+        # neither dictionary's indexes were replaced by the other's
+        self.assertEqual(Dictionary(a.source_path, table_path=a.words.table_path)
+                         .letter_index.solve('tac'), ['act', 'cat'])
+        self.assertEqual(b.letter_index.solve('dgo'), ['dog', 'god'])
+
+
+class TestWordTrie(unittest.TestCase):
+
+    def setUp(self):
+        self.trie = WordTrie(sorted(['cat', 'cats', 'cast', 'plan', 'plant',
+                                     'planting', 'plants', 'tan']))
+
+    def test_contains(self):
+        self.assertTrue('plan' in self.trie)
+        self.assertTrue('planting' in self.trie)
+        self.assertFalse('pla' in self.trie)
+        self.assertFalse('plantings' in self.trie)
+
+    def test_has_prefix(self):
+        self.assertTrue(self.trie.has_prefix(''))
+        self.assertTrue(self.trie.has_prefix('pla'))
+        self.assertTrue(self.trie.has_prefix('planting'))
+        self.assertFalse(self.trie.has_prefix('plantings'))
+        self.assertFalse(self.trie.has_prefix('x'))
+
+    def test_iter_prefix(self):
+        self.assertEqual(list(self.trie.iter_prefix('plant')),
+                         ['plant', 'planting', 'plants'])
+        self.assertEqual(list(self.trie.iter_prefix('ca')), ['cast', 'cat', 'cats'])
+        self.assertEqual(list(self.trie.iter_prefix('dog')), [])
+
+    def test_children(self):
+        node = self.trie.node('plant')
+        self.assertTrue(node.is_word)
+        self.assertEqual([letter for letter, child in node.children()], ['i', 's'])
+        self.assertEqual(node.child('x'), None)
+        self.assertEqual(list(node.child('s')), ['plants'])
+
+    def test_spellable(self):
+        self.assertEqual(sorted(self.trie.spellable('tacsnp')), ['cast', 'cat', 'cats', 'tan'])
+        self.assertEqual(sorted(self.trie.spellable('tacsnp', prefix='cat')), ['cat', 'cats'])
+        self.assertEqual(list(self.trie.spellable('tacnp', prefix='pl')), [])
+
+
+class TestWordQuery(unittest.TestCase):
+
+    def setUp(self):
+        self.index = LetterCountIndex(['cat', 'cats', 'cast', 'act', 'acts', 'scat', 'tact',
+                                       'at', 'a', 'taco', 'coat', 'coats', 'ascot'])
+
+    def query(self, **constraints):
+        return list(self.index.query('tacsot', WordQuery(**constraints)))
+
+    def test_unconstrained(self):
+        self.assertEqual(self.query(), self.index.solve('tacsot'))
+
+    def test_lengths(self):
+        self.assertEqual(self.query(min_length=5), ['ascot', 'coats'])
+        self.assertEqual(self.query(max_length=2), ['at', 'a'])
+        self.assertEqual(self.query(min_length=3, max_length=3), ['act', 'cat'])
+
+    def test_include(self):
+        self.assertEqual(self.query(include='os'), ['ascot', 'coats'])
+        self.assertEqual(self.query(include='tt'), ['tact'])
+        self.assertEqual(self.query(include='z'), [])
+
+    def test_excluded_prefixes_and_played(self):
+        self.assertEqual(self.query(min_length=4, excluded_prefixes=['co', 'ta']),
+                         ['ascot', 'acts', 'cast', 'cats', 'scat'])
+        # the played words and their prefixes may not be played
+        self.assertEqual(self.query(min_length=3, played=['cats', 'coat']),
+                         ['ascot', 'coats', 'acts', 'cast', 'scat', 'taco', 'tact', 'act'])
+
+    def test_limit_and_key(self):
+        self.assertEqual(self.query(limit=3), ['ascot', 'coats', 'acts'])
+        self.assertEqual(self.query(key=lambda word: word.count('t'), limit=2),
+                         ['tact', 'ascot'])
+        self.assertEqual(self.query(key=len, min_length=4, max_length=4)[:2], ['acts', 'cast'])
+
+    def test_letters_outside_alphabet(self):
+        self.assertEqual(count_letters('abca')[:3].tolist(), [2, 1, 1])
+        for letters in ['abc1', 'ab c', 'ABC']:
+            self.assertRaises(ValueError, count_letters, letters)
+            self.assertRaises(ValueError, list, self.index.query(letters, WordQuery()))
+
+    def test_select_matches_search(self):
+        words = word_list.get_dictionary().letter_index.solve('esprolishmtabdientsixfgmn')
+        queries = [WordQuery(min_length=3, played=['establishment']),
+                   WordQuery(min_length=4, max_length=6, include='ee', limit=50),
+                   WordQuery(excluded_prefixes=['dis'], limit=5000),
+                   WordQuery(key=lambda word: word.count('s'), limit=10)]
+        for query in queries:
+            self.assertEqual(list(query.select(words)), list(word_list.get_dictionary().query(
+                'esprolishmtabdientsixfgmn', query)))
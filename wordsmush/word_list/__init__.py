@@ -1,10 +1,63 @@
-"""Rudimentary word lookup in python. Simply dumps the system word list into
-memory and looks through it."""
+"""Rudimentary word lookup in python. The word list is compiled to a sorted,
+memory-mapped table on first use and looked up by binary search. Prefix
+queries go through the trie view over the same table.
 
-from pkg_resources import resource_stream
-from contextlib import closing
+Importing this module is cheap: nothing is read until the first lookup.
+
+Word lists are wrapped in Dictionary objects, shared through get_dictionary
+so that games and players using the same word list share its indexes. words,
+trie and get_letter_index are those of the default dictionary."""
+
+import os
+import threading
+
+from wordsmush.word_list.dictionary import Dictionary
 
 WORDS_FILE = 'data/scrabble_us.words'
 
-with closing(resource_stream(__name__, WORDS_FILE)) as f:
-    words = {word.strip().lower(): True for word in f.readlines()}
+# the dictionaries shipped with wordsmush, by name
+DICTIONARIES = {
+    'scrabble_us': WORDS_FILE,
+}
+DEFAULT_DICTIONARY = 'scrabble_us'
+
+_dictionaries = {}
+_dictionaries_lock = threading.Lock()
+
+
+def resource_path(name):
+    """Returns the path of a file installed with this package"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+    if not os.path.exists(path):
+        # e.g. installed as a zipped egg, which pkg_resources (slow to import) extracts
+        from pkg_resources import resource_filename
+        path = resource_filename(__name__, name)
+    return path
+
+
+def get_dictionary(name=None):
+    """Returns the Dictionary for a word list, creating it on first use. Each
+    word list has one Dictionary per process, however many games use it.
+    :param name: name of a dictionary shipped with wordsmush, or the path of a
+    word list (optional, defaults to DEFAULT_DICTIONARY)"""
+    name = name or DEFAULT_DICTIONARY
+    if name in DICTIONARIES:
+        path = resource_path(DICTIONARIES[name])
+    else:
+        path, name = name, None
+
+    key = os.path.realpath(path)
+    with _dictionaries_lock:
+        if key not in _dictionaries:
+            _dictionaries[key] = Dictionary(path, name)
+        return _dictionaries[key]
+
+
+default_dictionary = get_dictionary()
+words = default_dictionary.words
+trie = default_dictionary.trie
+
+
+def get_letter_index():
+    """Returns the letter-count index for the word list, building it on first use"""
+    return default_dictionary.letter_index
@@ -0,0 +1,239 @@
+"""Compiled, memory-mapped word table.
+
+The plain text word list is compiled once into a binary file holding the
+sorted words back to back plus a table of offsets into them. The file is
+memory-mapped on first lookup, so processes share its pages through the OS
+page cache rather than each holding a private copy of the word list.
+
+File layout (all integers little-endian uint32):
+    magic, SHA-1 of the word list, word count, offsets (word count + 1),
+    concatenated words
+"""
+
+import os
+import sys
+import mmap
+import array
+import struct
+import hashlib
+import tempfile
+from bisect import bisect_right
+
+MAGIC = 'WSMTBL02'
+HEADER = struct.Struct('<8s20sI')
+OFFSET = struct.Struct('<I')
+
+# words per block of the in-memory index of the first word of each block
+BLOCK_SIZE = 32
+
+# most lookups remembered by a word list, after which they are forgotten
+MEMO_SIZE = 1 << 16
+
+# array typecode of unsigned 4 byte integers, for the table of offsets
+OFFSET_TYPECODE = 'I' if array.array('I').itemsize == OFFSET.size else 'L'
+
+
+def default_cache_dir():
+    """Returns the directory compiled word tables are written to"""
+    return (os.environ.get('WORDSMUSH_CACHE_DIR') or
+            os.path.join(os.path.expanduser('~'), '.cache', 'wordsmush'))
+
+
+def default_table_path(source_path):
+    """Returns the path a word list is compiled to in the cache directory:
+    its file name plus a short hash of its real path, so word lists with the
+    same name in different directories get tables of their own"""
+    real_path = os.path.realpath(source_path)
+    return os.path.join(default_cache_dir(), '%s-%s.table' % (
+        os.path.basename(real_path), hashlib.sha1(real_path).hexdigest()[:12]))
+
+
+def compile_word_table(source_path, table_path):
+    """Compiles a plain text word list (one word per line) into a word table.
+    The table is written to a temporary file and renamed into place, so
+    concurrent builders never expose a half-written table.
+    :param source_path: path of the word list to compile
+    :param table_path: path the compiled table is written to"""
+
+    with open(source_path, 'rb') as f:
+        source = f.read()
+
+    checksum = hashlib.sha1(source).digest()
+    words = sorted(set(word.strip().lower() for word in source.splitlines()
+                       if word.strip().isalpha()))
+
+    offsets = [0]
+    for word in words:
+        offsets.append(offsets[-1] + len(word))
+
+    table_dir = os.path.dirname(table_path)
+    if not os.path.isdir(table_dir):
+        try:
+            os.makedirs(table_dir)
+        except OSError:  # created by a concurrent builder
+            pass
+
+    fd, tmp_path = tempfile.mkstemp(dir=table_dir)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, checksum, len(words)))
+            f.write(struct.pack('<%dI' % len(offsets), *offsets))
+            f.write(''.join(words))
+        os.chmod(tmp_path, 0644)
+        os.rename(tmp_path, table_path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+
+class CompiledWordList(object):
+    """Read-only, sorted sequence of words backed by a memory-mapped word
+    table. Nothing is read until the first lookup."""
+
+    def __init__(self, source_path, table_path=None):
+        """:param source_path: path of the plain text word list
+        :param table_path: path of the compiled table (optional, defaults to a
+        file in the wordsmush cache directory)"""
+        self.source_path = source_path
+        self.table_path = table_path or default_table_path(source_path)
+        self._map = None
+        self._offsets = None
+        self._block_words = None
+        self._memo = {}
+        self._count = None
+        self._words_start = None
+        self._checksum = None
+
+    def _is_stale(self):
+        return (not os.path.exists(self.table_path) or
+                os.path.getmtime(self.table_path) < os.path.getmtime(self.source_path))
+
+    def _map_table(self):
+        """Returns the mapped table, or None if it was compiled in another format"""
+        with open(self.table_path, 'rb') as f:
+            table = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if table.size() < HEADER.size or HEADER.unpack_from(table, 0)[0] != MAGIC:
+            table.close()
+            return None
+        return table
+
+    def load(self):
+        """Maps the compiled table into memory, compiling it first if it is
+        missing, older than the word list or in an older format"""
+        if self._map is not None:
+            return
+
+        if self._is_stale():
+            compile_word_table(self.source_path, self.table_path)
+
+        table = self._map_table()
+        if table is None:
+            compile_word_table(self.source_path, self.table_path)
+            table = self._map_table()
+
+        magic, self._checksum, count = HEADER.unpack_from(table, 0)
+        self._count = count
+        self._words_start = HEADER.size + (count + 1) * OFFSET.size
+
+        # the offsets are read once, so lookups index them rather than
+        # unpacking from the table at every probe
+        offsets = array.array(OFFSET_TYPECODE)
+        offsets.fromstring(table[HEADER.size:self._words_start])
+        if sys.byteorder == 'big':
+            offsets.byteswap()
+        self._offsets = offsets
+        self._map = table
+        # the first word of every block, so a lookup only bisects the table
+        # within one block
+        self._block_words = [self[index] for index in xrange(0, count, BLOCK_SIZE)]
+
+    def close(self):
+        """Unmaps the table. It is mapped again on the next lookup."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+            self._offsets = None
+            self._block_words = None
+            self._memo = {}
+
+    def verify(self):
+        """Recompiles the table if it was compiled from other words than the
+        word list holds now, going by checksum rather than modification time.
+        Returns whether the table was recompiled."""
+        self.load()
+        with open(self.source_path, 'rb') as f:
+            checksum = hashlib.sha1(f.read()).digest()
+        if checksum == self._checksum:
+            return False
+
+        self.close()
+        compile_word_table(self.source_path, self.table_path)
+        self.load()
+        return True
+
+    @property
+    def version(self):
+        """Identifies the words in the table: the SHA-1 of the word list, in hex"""
+        self.load()
+        return self._checksum.encode('hex')
+
+    def __len__(self):
+        self.load()
+        return self._count
+
+    def __getitem__(self, index):
+        self.load()
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("word index out of range")
+
+        start = self._words_start
+        return self._map[start + self._offsets[index]:start + self._offsets[index + 1]]
+
+    def __iter__(self):
+        self.load()
+        start, offsets = self._words_start, self._offsets
+        blob = self._map[start:start + offsets[self._count]]
+        for index in xrange(self._count):
+            yield blob[offsets[index]:offsets[index + 1]]
+
+    def layout(self):
+        """Returns (table, offsets start, words start, word count): the mapped
+        table and the positions of its offsets and words, for readers which
+        look up many words at once"""
+        self.load()
+        return self._map, HEADER.size, self._words_start, self._count
+
+    def index(self, word):
+        """Returns the position of word in the table, or the position it would
+        be inserted at if it is not present"""
+        self.load()
+        table, offsets, start = self._map, self._offsets, self._words_start
+        block = bisect_right(self._block_words, word)
+        if not block:
+            return 0
+        lo = (block - 1) * BLOCK_SIZE
+        hi = min(lo + BLOCK_SIZE, self._count)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if table[start + offsets[mid]:start + offsets[mid + 1]] < word:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def __contains__(self, word):
+        # games look the same words up again and again, as turns are
+        # considered and played, so recent answers are remembered
+        found = self._memo.get(word)
+        if found is None:
+            position = self.index(word)
+            found = (position < self._count and
+                     self._map[self._words_start + self._offsets[position]:
+                               self._words_start + self._offsets[position + 1]] == word)
+            if len(self._memo) >= MEMO_SIZE:
+                self._memo.clear()
+            self._memo[word] = found
+        return found
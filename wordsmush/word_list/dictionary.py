@@ -0,0 +1,109 @@
+"""Dictionaries: a word list together with its indexes.
+
+A Dictionary holds three indexes over one word list: the compiled table for
+word lookups, the trie view over the table for prefix queries, and the
+letter-count index for solving boards. Each is built on first use, or all at
+once by build(), and cached on disk next to the compiled table. The cached
+letter-count arrays are named after the word list's checksum, so arrays for
+an older version are never picked up, and all indexes are memory-mapped, so
+processes using the same dictionary share their pages.
+"""
+
+import os
+import glob
+import tempfile
+import threading
+
+from wordsmush.word_list.compiled import CompiledWordList
+from wordsmush.word_list.trie import WordTrie
+
+
+def save_array(path, array):
+    """Saves a numpy array to path, writing to a temporary file and renaming
+    it into place so concurrent builders never expose a half-written file"""
+    import numpy
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            numpy.save(f, array)
+        os.chmod(tmp_path, 0644)
+        os.rename(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+
+class Dictionary(object):
+
+    def __init__(self, source_path, name=None, table_path=None):
+        """:param source_path: path of the plain text word list
+        :param name: name of the dictionary (optional, defaults to the word
+        list's file name)
+        :param table_path: path of the compiled table (optional, defaults to a
+        file in the wordsmush cache directory)"""
+        self.source_path = source_path
+        self.name = name or os.path.splitext(os.path.basename(source_path))[0]
+        self.words = CompiledWordList(source_path, table_path)
+        self.trie = WordTrie(self.words)
+        self._letter_index = None
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return 'Dictionary(%r)' % self.name
+
+    def __contains__(self, word):
+        return word in self.words
+
+    @property
+    def version(self):
+        """Identifies the words in the dictionary: the SHA-1 of the word list, in hex"""
+        return self.words.version
+
+    def build(self, verify=True):
+        """Builds every index not already built or cached, so the first
+        lookups of a game do not pay for it. Returns the dictionary.
+        :param verify: check the compiled table against the word list's
+        checksum, not just its modification time (optional)"""
+        if verify and self.words.verify():
+            self._letter_index = None
+        self.letter_index
+        return self
+
+    @property
+    def letter_index(self):
+        """The TableLetterCountIndex for solving boards, loaded on first use"""
+        if self._letter_index is None:
+            with self._lock:
+                if self._letter_index is None:
+                    self._letter_index = self.load_letter_index()
+        return self._letter_index
+
+    def query(self, letters, query):
+        """Returns an iterator of the best words spellable from letters which
+        meet the constraints of a WordQuery, found with the letter index
+        :param letters: iterable of letters available (e.g. the board letters)"""
+        return self.letter_index.query(letters, query)
+
+    def index_path(self, kind):
+        """Returns the path of a cached index array for this version of the words"""
+        return '%s.%s.%s.npy' % (self.words.table_path, self.version[:16], kind)
+
+    def load_letter_index(self):
+        """Returns the letter-count index, memory-mapped from its cached
+        arrays, which are built first if there are none for this version"""
+        import numpy
+        from wordsmush.word_list.letter_counts import TableLetterCountIndex
+
+        order_path, counts_path = self.index_path('order'), self.index_path('columns')
+        if not (os.path.exists(order_path) and os.path.exists(counts_path)):
+            order, counts = TableLetterCountIndex.build_arrays(self.words)
+            # arrays cached for older versions of the words are never used again
+            for path in glob.glob('%s.*.npy' % self.words.table_path):
+                if path not in (order_path, counts_path):
+                    os.remove(path)
+            save_array(order_path, order)
+            save_array(counts_path, counts)
+
+        return TableLetterCountIndex(self.words, numpy.load(order_path, mmap_mode='r'),
+                                     numpy.load(counts_path, mmap_mode='r'))
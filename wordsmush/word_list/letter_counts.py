@@ -0,0 +1,191 @@
+"""Letter-count index over a word list. Each word is reduced to a row of 26
+letter counts, so every word spellable from a set of letters can be found with
+a single vectorised comparison instead of a Counter per word."""
+
+import numpy
+
+ALPHABET_SIZE = 26
+
+# letters checked against every word by match_positions, before only the
+# words still matching are checked against the rest
+DENSE_LETTERS = 4
+
+
+def count_letters(letters):
+    """Returns a vector of 26 letter counts for an iterable of letters a-z.
+    Raises ValueError for any other letters."""
+    codes = numpy.fromiter((ord(letter) for letter in letters), dtype=numpy.intp) - ord('a')
+    invalid = codes[(codes < 0) | (codes >= ALPHABET_SIZE)]
+    if len(invalid):
+        raise ValueError("Letters must be a-z, not %s" % ', '.join(
+            sorted(set(repr(unichr(code + ord('a')).encode('unicode_escape'))
+                       for code in invalid))))
+    return numpy.bincount(codes, minlength=ALPHABET_SIZE)
+
+
+class LetterCountIndex(object):
+
+    def __init__(self, words):
+        """Builds the index.
+        :param words: iterable of lower case words made up of the letters a-z"""
+        ordered = sorted(words, key=lambda word: (-len(word), word))
+
+        # words are kept longest first, so matches come out already sorted
+        self.words = numpy.array(ordered, dtype=object)
+        self.counts = numpy.asfortranarray(self.build_counts(ordered))
+
+    @staticmethod
+    def build_counts(words):
+        """Returns a uint8 matrix with a row of letter counts for each word"""
+        lengths = numpy.fromiter((len(word) for word in words), dtype=numpy.intp,
+                                 count=len(words))
+        letters = numpy.frombuffer(''.join(words), dtype=numpy.uint8) - ord('a')
+        rows = numpy.repeat(numpy.arange(len(words)), lengths)
+
+        flat = numpy.bincount(rows * ALPHABET_SIZE + letters,
+                              minlength=len(words) * ALPHABET_SIZE)
+        return flat.reshape(len(words), ALPHABET_SIZE).astype(numpy.uint8)
+
+    def __len__(self):
+        return len(self.counts)
+
+    @property
+    def column_max(self):
+        """The most of each letter any word has"""
+        if getattr(self, '_column_max', None) is None:
+            self._column_max = self.counts.max(axis=0)
+        return self._column_max
+
+    @property
+    def lengths(self):
+        """The length of each word, longest first"""
+        if getattr(self, '_lengths', None) is None:
+            self._lengths = self.counts.sum(axis=1, dtype=numpy.intp)
+        return self._lengths
+
+    def matches(self, letters):
+        """Returns a boolean mask of the words spellable from the given letters
+        :param letters: iterable of letters available (e.g. the board letters)"""
+        return (self.counts <= count_letters(letters)).all(axis=1)
+
+    def length_range(self, min_length=1, max_length=None):
+        """Returns (start, stop) of the positions of the words between
+        min_length and max_length long, which are contiguous as words are
+        kept longest first"""
+        lengths = self.lengths
+        start = 0 if max_length is None else numpy.count_nonzero(lengths > max_length)
+        return start, numpy.count_nonzero(lengths >= min_length)
+
+    def match_positions(self, letters, start=0, stop=None, required=()):
+        """Returns the positions, in order, of the words spellable from the
+        given letters. Only letters some word has more of than are available
+        are checked, scarcest first, and after the first few only the words
+        still matching are looked at. Counts stored a column per letter
+        (Fortran order) make each check a contiguous scan.
+        :param letters: iterable of letters available (e.g. the board letters)
+        :param start, stop: only look at the words between these positions (optional)
+        :param required: ((letter, count), ...) of letters the words must
+        have at least count of (optional)"""
+        stop = len(self.counts) if stop is None else stop
+        available = count_letters(letters)
+        # (column, most allowed, fewest needed) of each letter to check
+        checks = [(letter, available[letter], 0)
+                  for letter in numpy.argsort(available, kind='mergesort')
+                  if available[letter] < self.column_max[letter]]
+        for letter, count in required:
+            column = ord(letter) - ord('a')
+            if count > available[column]:
+                return numpy.arange(0)
+            checks.insert(0, (column, available[column], count))
+        if not checks or start >= stop:
+            return numpy.arange(start, max(start, stop))
+
+        columns = self.counts.T
+        mask = None
+        for column, most, fewest in checks[:DENSE_LETTERS]:
+            values = columns[column][start:stop]
+            check = (values <= most) & (values >= fewest) if fewest else values <= most
+            mask = check if mask is None else mask & check
+
+        positions = numpy.flatnonzero(mask)
+        for column, most, fewest in checks[DENSE_LETTERS:]:
+            values = columns[column][start:stop][positions]
+            positions = positions[(values <= most) & (values >= fewest)]
+        return positions + start
+
+    def count_words(self, letters, min_length=1):
+        """Returns the number of words at least min_length long spellable
+        from the given letters
+        :param letters: iterable of letters available (e.g. the board letters)
+        :param min_length: shortest word counted (optional)"""
+        # words are longest first, so those long enough come before the rest
+        long_enough = numpy.count_nonzero(self.lengths >= min_length)
+        return int(numpy.searchsorted(self.match_positions(letters), long_enough))
+
+    def words_for(self, positions):
+        """Returns a list of the words at an array of positions"""
+        return self.words[positions].tolist()
+
+    def solve(self, letters):
+        """Returns all words spellable from the given letters, longest first
+        :param letters: iterable of letters available (e.g. the board letters)"""
+        return self.words_for(self.match_positions(letters))
+
+    def query(self, letters, query):
+        """Returns an iterator of the best words spellable from the given
+        letters which meet the constraints of a WordQuery
+        :param letters: iterable of letters available (e.g. the board letters)"""
+        return query.search(self, letters)
+
+
+class TableLetterCountIndex(LetterCountIndex):
+    """Letter-count index over a CompiledWordList which does not hold the
+    words itself, only their positions in the table and their letter counts.
+    Both arrays may be memory-mapped from disk, so processes using the same
+    word list share them."""
+
+    def __init__(self, table, order, counts):
+        """:param table: CompiledWordList the index is over
+        :param order: positions of the table's words, longest first
+        :param counts: letter counts of the words, in the same order, best
+        stored in Fortran order"""
+        self.table = table
+        self.order = order
+        self.counts = counts
+
+        # views of the mapped table, so words are read without copying it
+        mapped, offsets_start, words_start, count = table.layout()
+        self.offsets = numpy.frombuffer(mapped, dtype='<u4', count=count + 1,
+                                        offset=offsets_start)
+        self.blob = numpy.frombuffer(mapped, dtype=numpy.uint8, offset=words_start)
+
+    @staticmethod
+    def build_arrays(table):
+        """Returns (order, counts) for a CompiledWordList"""
+        words = list(table)
+        lengths = numpy.fromiter((len(word) for word in words), dtype=numpy.intp,
+                                 count=len(words))
+        # the table is sorted, so words of the same length stay alphabetical
+        order = numpy.lexsort((numpy.arange(len(words)), -lengths)).astype(numpy.uint32)
+        counts = LetterCountIndex.build_counts([words[position] for position in order])
+        return order, numpy.asfortranarray(counts)
+
+    def words_at(self, positions):
+        """Returns a list of the words at an array of table positions. The
+        words' bytes are gathered into one newline separated string in a
+        single vectorised pass, then split, rather than sliced one by one."""
+        if not len(positions):
+            return []
+
+        starts = self.offsets[positions].astype(numpy.intp)
+        lengths = self.offsets[positions + 1].astype(numpy.intp) - starts
+        sizes = lengths + 1
+        out_starts = numpy.cumsum(sizes) - sizes
+
+        source = numpy.arange(sizes.sum()) - numpy.repeat(out_starts - starts, sizes)
+        gathered = self.blob[numpy.minimum(source, len(self.blob) - 1)]
+        gathered[out_starts + lengths] = ord('\n')
+        return gathered.tostring().split('\n')[:-1]
+
+    def words_for(self, positions):
+        return self.words_at(self.order[positions])
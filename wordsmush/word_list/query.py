@@ -0,0 +1,109 @@
+"""Constrained word queries with streamed, top-k results.
+
+A WordQuery describes the words wanted: how long they may be, letters they
+must include, prefixes they must not start with, words already played (whose
+prefixes may not be played either), and how to choose the best of them.
+
+A query runs over a letter-count index, where only the slice of words of the
+right lengths is checked and required letters are vectorised checks like the
+available ones, or filters any sequence of words sorted longest first, such
+as a cached solution. Either way results stream: without a key, words come
+out longest first as they are found, and with a key and a limit a heap keeps
+only the best limit words, so neither sorts every word spellable from the
+letters.
+
+    query = WordQuery(min_length=4, include='q', played=game.words_played, limit=10)
+    best = list(dictionary.query(letters, query))
+"""
+
+import sys
+import heapq
+from collections import Counter
+from itertools import islice, takewhile
+
+# words gathered from an index at a time while streaming
+CHUNK_SIZE = 256
+
+# words of an index checked first when only a few are wanted, each block
+# checked after that being twice the size of the last
+BLOCK_SIZE = 4096
+
+
+class WordQuery(object):
+
+    def __init__(self, min_length=1, max_length=None, include='', excluded_prefixes=(),
+                 played=(), key=None, limit=None):
+        """:param min_length: shortest word wanted (optional)
+        :param max_length: longest word wanted (optional)
+        :param include: letters every word must have, a letter repeated as
+        many times as it is needed (optional)
+        :param excluded_prefixes: words starting with any of these are left
+        out (optional)
+        :param played: words already played; they and their prefixes are
+        left out (optional, e.g. game.words_played)
+        :param key: function of a word, the words with the largest keys being
+        the best (optional, defaults to longest first, then alphabetical)
+        :param limit: most words wanted, the best ones (optional)"""
+        self.min_length = min_length
+        self.max_length = max_length
+        self.required = sorted(Counter(include).items())
+        self.excluded_prefixes = tuple(excluded_prefixes)
+        self.blocked = frozenset(word[:end] for word in played
+                                 for end in range(1, len(word) + 1))
+        self.key = key
+        self.limit = limit
+
+    def accepts(self, word):
+        """Returns whether word meets every constraint"""
+        return (self.min_length <= len(word) and
+                (self.max_length is None or len(word) <= self.max_length) and
+                all(word.count(letter) >= count for letter, count in self.required) and
+                self.allows(word))
+
+    def allows(self, word):
+        """Returns whether word avoids the excluded prefixes and played words,
+        the constraints an index does not check"""
+        return word not in self.blocked and not word.startswith(self.excluded_prefixes)
+
+    def best(self, words):
+        """Iterator of the best of an iterable of words meeting the
+        constraints, in the order they come if there is no key"""
+        if self.key is None:
+            return islice(words, self.limit)
+        if self.limit is None:
+            return iter(sorted(words, key=self.key, reverse=True))
+        return iter(heapq.nlargest(self.limit, words, key=self.key))
+
+    def select(self, words):
+        """Iterator of the best words meeting the constraints from an iterable
+        of words sorted longest first, e.g. a solution from the solve cache"""
+        words = takewhile(lambda word: len(word) >= self.min_length, words)
+        return self.best(word for word in words if self.accepts(word))
+
+    def search(self, index, letters):
+        """Iterator of the best words meeting the constraints spellable from
+        letters, found with a LetterCountIndex
+        :param letters: iterable of letters available (e.g. the board letters)"""
+        # words are only read a chunk at a time if not all of them may be wanted
+        chunk_size = CHUNK_SIZE if self.key is None and self.limit is not None else sys.maxsize
+        return self.best(word for positions in self.walk(index, letters)
+                         for offset in xrange(0, len(positions), chunk_size)
+                         for word in index.words_for(positions[offset:offset + chunk_size])
+                         if self.allows(word))
+
+    def walk(self, index, letters):
+        """Iterator of arrays of the positions in a LetterCountIndex of the
+        words of the right lengths, with the required letters, spellable from
+        letters. When only the first few are wanted, the index is walked in
+        blocks, doubling in size, stopping once enough words are found."""
+        start, stop = index.length_range(self.min_length, self.max_length)
+        if self.key is not None or self.limit is None:
+            yield index.match_positions(letters, start, stop, self.required)
+            return
+
+        block_size = BLOCK_SIZE
+        while start < stop:
+            yield index.match_positions(letters, start, min(start + block_size, stop),
+                                        self.required)
+            start += block_size
+            block_size *= 2
@@ -0,0 +1,118 @@
+"""Prefix queries over a sorted word sequence.
+
+A sorted word list is an implicit trie: the words sharing a prefix always form
+one contiguous range. A node is therefore just a prefix and the bounds of its
+range, found by bisection, and the trie costs no memory beyond the word list.
+"""
+
+from bisect import bisect_left
+from collections import Counter
+
+# sorts after every lower case letter, used to find the end of a prefix range
+PREFIX_END = '{'
+
+
+class WordTrieNode(object):
+
+    def __init__(self, trie, prefix, lo, hi):
+        """:param trie: the WordTrie this node belongs to
+        :param prefix: the prefix this node represents
+        :param lo: index of the first word starting with prefix
+        :param hi: index after the last word starting with prefix"""
+        self.trie = trie
+        self.prefix = prefix
+        self.lo = lo
+        self.hi = hi
+
+    @property
+    def is_word(self):
+        """Whether the prefix of this node is itself a word"""
+        return self.trie.words[self.lo] == self.prefix
+
+    def child(self, letter):
+        """Returns the node for this prefix extended by letter, or None if no
+        word starts with the extended prefix"""
+        return self.trie.node(self.prefix + letter, self.lo, self.hi)
+
+    def children(self):
+        """Iterator of (letter, node) for each letter extending this prefix"""
+        words = self.trie.words
+        depth = len(self.prefix)
+        lo = self.lo + 1 if self.is_word else self.lo
+
+        while lo < self.hi:
+            letter = words[lo][depth]
+            hi = bisect_left(words, self.prefix + letter + PREFIX_END, lo, self.hi)
+            yield letter, WordTrieNode(self.trie, self.prefix + letter, lo, hi)
+            lo = hi
+
+    def __iter__(self):
+        """Iterator of all words starting with this prefix, in sorted order"""
+        words = self.trie.words
+        for index in xrange(self.lo, self.hi):
+            yield words[index]
+
+    def __len__(self):
+        return self.hi - self.lo
+
+
+class WordTrie(object):
+
+    def __init__(self, words):
+        """:param words: sorted sequence of words supporting len() and indexing"""
+        self.words = words
+
+    def node(self, prefix, lo=0, hi=None):
+        """Returns the node for prefix, or None if no word starts with prefix.
+        :param lo, hi: optional bounds to search within, e.g. a parent node's"""
+        if hi is None:
+            hi = len(self.words)
+
+        lo = bisect_left(self.words, prefix, lo, hi)
+        if lo == hi or not self.words[lo].startswith(prefix):
+            return None
+
+        hi = bisect_left(self.words, prefix + PREFIX_END, lo, hi)
+        return WordTrieNode(self, prefix, lo, hi)
+
+    @property
+    def root(self):
+        return WordTrieNode(self, '', 0, len(self.words))
+
+    def __contains__(self, word):
+        node = self.node(word)
+        return node is not None and node.is_word
+
+    def has_prefix(self, prefix):
+        """Returns whether any word starts with prefix"""
+        return self.node(prefix) is not None
+
+    def iter_prefix(self, prefix):
+        """Iterator of all words starting with prefix, in sorted order"""
+        node = self.node(prefix)
+        return iter(node) if node is not None else iter(())
+
+    def spellable(self, letters, prefix=''):
+        """Iterator of all words starting with prefix that can be spelled from
+        letters. Branches are pruned as soon as no word can follow them.
+        :param letters: iterable of letters available (e.g. the board letters)
+        :param prefix: optional prefix the words must start with, spelled
+        from the available letters too"""
+        available = Counter(letters)
+        available.subtract(prefix)
+        if any(count < 0 for count in available.values()):
+            return iter(())
+
+        node = self.node(prefix)
+        return self._spellable(node, available) if node else iter(())
+
+    def _spellable(self, node, available):
+        if node.is_word:
+            yield node.prefix
+
+        for letter, child in node.children():
+            if available[letter] > 0:
+                available[letter] -= 1
+                for word in self._spellable(child, available):
+                    yield word
+                available[letter] += 1